@@ -0,0 +1,113 @@
+"""Serialization cost of read-route payloads: jsonable_encoder + JSONResponse vs FastJSONResponse.
+
+    python benchmarks/bench_json_responses.py [--engineers 5000] [--work-orders 200] [--repeat 20]
+
+Rows are synthetic but shaped like dict_row results from engineer_board, work_orders_current
+and work_order_parts (UUIDs, timestamptz, NUMERIC quantities).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from src.api import responses  # noqa: E402
+from src.api.responses import FastJSONResponse  # noqa: E402
+
+NOW = datetime(2024, 6, 1, 9, 30, tzinfo=timezone.utc)
+
+
+def board_rows(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "engineer_id": uuid.uuid4(),
+            "status": random.choice(["AVAILABLE", "TRAVEL", "WORK"]),
+            "current_work_order_id": uuid.uuid4(),
+            "last_seen_at": NOW - timedelta(seconds=random.randint(0, 3600)),
+        }
+        for _ in range(count)
+    ]
+
+
+def work_order_rows(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "work_order_id": uuid.uuid4(),
+            "client_id": uuid.uuid4(),
+            "asset_id": uuid.uuid4(),
+            "priority": "HIGH",
+            "work_type": "REPAIR",
+            "business_state": "IN_PROGRESS",
+            "execution_state": "WORK",
+            "sla_state": "IN_SLA",
+            "assigned_engineer_id": uuid.uuid4(),
+            "assigned_team_id": uuid.uuid4(),
+            "scheduled_start": NOW,
+            "scheduled_end": NOW + timedelta(hours=2),
+            "actual_start_reported": NOW,
+            "actual_start_effective": NOW,
+            "actual_end_reported": None,
+            "actual_end_effective": None,
+            "downtime_minutes": None,
+            "last_event_id": uuid.uuid4(),
+            "last_event_at": NOW,
+            "version": 7,
+            "parts": [
+                {"part_id": uuid.uuid4(), "reserved_qty": Decimal("2"), "installed_qty": Decimal("1.500")}
+                for _ in range(3)
+            ],
+        }
+        for _ in range(count)
+    ]
+
+
+def measure(render: Callable[[], bytes], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--engineers", type=int, default=5000)
+    parser.add_argument("--work-orders", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = {
+        f"/v1/engineers/board ({args.engineers} rows)": {"items": board_rows(args.engineers)},
+        f"/v1/work-orders ({args.work_orders} rows + parts)": {"items": work_order_rows(args.work_orders)},
+    }
+    encoder = "orjson" if responses.orjson is not None else "stdlib json"
+    print(f"FastJSONResponse encoder: {encoder}")
+    for name, content in payloads.items():
+        assert json.loads(FastJSONResponse(content).body) == json.loads(JSONResponse(jsonable_encoder(content)).body)
+        before = measure(lambda: JSONResponse(jsonable_encoder(content)).body, args.repeat)
+        after = measure(lambda: FastJSONResponse(content).body, args.repeat)
+        stdlib = measure(
+            lambda: json.dumps(content, default=responses._default, separators=(",", ":")).encode("utf-8"), args.repeat
+        )
+        print(
+            f"{name}: jsonable_encoder {before:.1f} ms -> FastJSONResponse {after:.1f} ms ({before / after:.1f}x); "
+            f"stdlib fallback {stdlib:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""End-to-end cost of rebuild_kpi_daily per engine, database side included.
+
+    DATABASE_URL=postgresql://... python benchmarks/bench_kpi_rebuild.py [--work-orders 100000] [--days 90] [--repeat 3]
+
+Needs a database with the migrations applied, including the KPI ones (004, 011-013).
+Synthetic CREATED/STARTED/COMPLETED triples and sla_view rows are copied in inside one
+transaction that is rolled back at the end. Each engine runs the whole rebuild (fetch,
+compute, COPY into kpi_daily, rollups); the columnar engine is timed with and without
+the opt-in facts pass. kpi_daily is checked to be identical across engines.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import psycopg  # noqa: E402
+from psycopg.rows import dict_row  # noqa: E402
+
+from src.domain import kpi, kpi_columnar  # noqa: E402
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+KINDS = ("WORK_ORDER.CREATED", "WORK.STARTED", "WORK.COMPLETED")
+
+
+def seed(conn: psycopg.Connection, work_orders: int, days: int) -> None:
+    clients = [str(uuid.uuid4()) for _ in range(50)]
+    sla_rows = []
+    with conn.cursor() as cur:
+        with cur.copy(
+            "COPY event_store (entity_type, entity_id, event_type, payload, source, created_at_system, created_at_reported)"
+            " FROM STDIN"
+        ) as copy:
+            for index in range(work_orders):
+                work_order_id = str(uuid.uuid4())
+                at = BASE + timedelta(seconds=random.randint(0, days * 86400))
+                for event_type in KINDS:
+                    at += timedelta(minutes=random.randint(1, 600))
+                    payload = {"client_id": random.choice(clients)} if event_type == "WORK_ORDER.CREATED" else {}
+                    reported = at - timedelta(seconds=random.randint(0, 300))
+                    copy.write_row(("work_order", work_order_id, event_type, json.dumps(payload), "api", at, reported))
+                if index % 5 == 0:
+                    sla_rows.append((work_order_id, random.choice(["IN_SLA", "BREACHED"])))
+        with cur.copy("COPY sla_view (work_order_id, state) FROM STDIN") as copy:
+            for row in sla_rows:
+                copy.write_row(row)
+
+
+def kpi_daily(conn: psycopg.Connection, date_from: date, date_to: date) -> List[Tuple[Any, ...]]:
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT {', '.join(kpi.KPI_COLUMNS)} FROM kpi_daily WHERE day >= %s AND day <= %s ORDER BY day, client_id",
+            (date_from, date_to),
+        )
+        return [tuple(row.values()) for row in cur.fetchall()]
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--work-orders", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if not kpi_columnar.available():
+        sys.exit("NumPy is not installed: only the scalar engine is available")
+
+    random.seed(7)
+    date_from = BASE.date()
+    date_to = date_from + timedelta(days=args.days + 2)
+    with psycopg.connect(os.environ["DATABASE_URL"], row_factory=dict_row) as conn:
+        try:
+            seed(conn, args.work_orders, args.days)
+            conn.execute("ANALYZE event_store")
+
+            results = {}
+            # the scalar engine derives facts from the pass it makes anyway
+            runs = [("scalar+facts", "scalar", True), ("columnar", "columnar", False), ("columnar+facts", "columnar", True)]
+            for name, engine, facts in runs:
+                results[name] = timed(
+                    lambda: kpi.rebuild_kpi_daily(conn, date_from, date_to, engine=engine, facts=facts), args.repeat
+                )
+                rows = kpi_daily(conn, date_from, date_to)
+                if engine == "scalar":
+                    expected = rows
+                assert [tuple(map(str, row)) for row in rows] == [tuple(map(str, row)) for row in expected]
+        finally:
+            conn.rollback()
+
+    print(f"{args.work_orders * len(KINDS)} events, {len(expected)} kpi_daily rows")
+    for name, seconds in results.items():
+        print(f"{name:<15} {seconds * 1000:9.1f} ms  ({results['scalar+facts'] / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
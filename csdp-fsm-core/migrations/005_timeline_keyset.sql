@@ -0,0 +1,3 @@
+-- Keyset pagination / streaming over a work order timeline: (created_at_system, event_id).
+CREATE INDEX IF NOT EXISTS ix_timeline_work_order_keyset
+  ON work_order_timeline(work_order_id, created_at_system, event_id);
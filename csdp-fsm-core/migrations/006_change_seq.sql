@@ -0,0 +1,14 @@
+-- Monotonic change sequence for delta sync: bumped on every projection update and
+-- stamped on timeline rows with the value of the projection update that produced them.
+CREATE SEQUENCE IF NOT EXISTS projection_change_seq;
+
+ALTER TABLE work_orders_current
+  ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('projection_change_seq');
+
+ALTER TABLE work_order_timeline
+  ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('projection_change_seq');
+
+CREATE INDEX IF NOT EXISTS ix_work_orders_engineer_change
+  ON work_orders_current(assigned_engineer_id, change_seq);
+CREATE INDEX IF NOT EXISTS ix_timeline_work_order_change
+  ON work_order_timeline(work_order_id, change_seq);
@@ -0,0 +1,3 @@
+-- Export / change-data feed over the whole event_store: cursor (created_at_system, event_id).
+CREATE INDEX IF NOT EXISTS ix_event_store_export
+  ON event_store(created_at_system, event_id);
@@ -0,0 +1,7 @@
+-- Engineer board as a change stream: team for filtering, change_seq for incremental refresh.
+ALTER TABLE engineer_board
+  ADD COLUMN IF NOT EXISTS team_id UUID NULL,
+  ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('projection_change_seq');
+
+CREATE INDEX IF NOT EXISTS ix_engineer_board_change
+  ON engineer_board(change_seq);
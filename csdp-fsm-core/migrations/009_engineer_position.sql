@@ -0,0 +1,5 @@
+-- Last known engineer position (from WORK.ARRIVED_ON_SITE gps), served by the nearest-engineer index.
+ALTER TABLE engineer_board
+  ADD COLUMN IF NOT EXISTS last_lat DOUBLE PRECISION NULL,
+  ADD COLUMN IF NOT EXISTS last_lon DOUBLE PRECISION NULL,
+  ADD COLUMN IF NOT EXISTS last_position_at TIMESTAMPTZ NULL;
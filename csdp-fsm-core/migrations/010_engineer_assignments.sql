@@ -0,0 +1,13 @@
+-- Engineer schedule: one slot per assigned work order, indexed for overlap lookups.
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+CREATE TABLE IF NOT EXISTS engineer_assignments (
+  work_order_id UUID PRIMARY KEY,
+  engineer_id UUID NOT NULL,
+  during TSTZRANGE NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- (engineer_id, during): "slots of this engineer overlapping [from, to)" is one index probe.
+CREATE INDEX IF NOT EXISTS ix_engineer_assignments_during
+  ON engineer_assignments USING gist (engineer_id, during);
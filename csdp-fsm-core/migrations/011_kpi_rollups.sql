@@ -0,0 +1,57 @@
+-- KPI as additive sums/counts, so any set of buckets combines into exact weighted averages,
+-- plus week/month rollups of kpi_daily for long-range queries. The *_avg_minutes and
+-- sla_compliance_percent columns stay for readers of single days.
+ALTER TABLE kpi_daily
+  ADD COLUMN IF NOT EXISTS reaction_sum_minutes NUMERIC NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS reaction_count INT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS mttr_sum_minutes NUMERIC NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS mttr_count INT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS sla_compliant_total INT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS sla_total INT NOT NULL DEFAULT 0;
+
+-- Backfill sums from the averages already stored (counts are approximated by the order count).
+UPDATE kpi_daily
+SET reaction_count = CASE WHEN reaction_avg_minutes IS NULL THEN 0 ELSE work_orders_total END,
+    reaction_sum_minutes = COALESCE(reaction_avg_minutes * work_orders_total, 0),
+    mttr_count = CASE WHEN mttr_avg_minutes IS NULL THEN 0 ELSE work_orders_total END,
+    mttr_sum_minutes = COALESCE(mttr_avg_minutes * work_orders_total, 0),
+    sla_total = CASE WHEN sla_compliance_percent IS NULL THEN 0 ELSE work_orders_total END,
+    sla_compliant_total = COALESCE(round(sla_compliance_percent * work_orders_total / 100), 0)
+WHERE reaction_count = 0 AND mttr_count = 0 AND sla_total = 0;
+
+-- bucket_start: Monday of the ISO week / first day of the month.
+CREATE TABLE IF NOT EXISTS kpi_weekly (
+  bucket_start DATE NOT NULL,
+  client_id UUID NOT NULL,
+  reaction_sum_minutes NUMERIC NOT NULL DEFAULT 0,
+  reaction_count INT NOT NULL DEFAULT 0,
+  mttr_sum_minutes NUMERIC NOT NULL DEFAULT 0,
+  mttr_count INT NOT NULL DEFAULT 0,
+  sla_compliant_total INT NOT NULL DEFAULT 0,
+  sla_total INT NOT NULL DEFAULT 0,
+  work_orders_total INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (bucket_start, client_id)
+);
+
+CREATE TABLE IF NOT EXISTS kpi_monthly (LIKE kpi_weekly INCLUDING ALL);
+
+-- Per-client dashboards probe by client first.
+CREATE INDEX IF NOT EXISTS ix_kpi_daily_client ON kpi_daily(client_id, day);
+CREATE INDEX IF NOT EXISTS ix_kpi_weekly_client ON kpi_weekly(client_id, bucket_start);
+CREATE INDEX IF NOT EXISTS ix_kpi_monthly_client ON kpi_monthly(client_id, bucket_start);
+
+INSERT INTO kpi_weekly
+SELECT date_trunc('week', day)::date, client_id,
+       sum(reaction_sum_minutes), sum(reaction_count), sum(mttr_sum_minutes), sum(mttr_count),
+       sum(sla_compliant_total), sum(sla_total), sum(work_orders_total)
+FROM kpi_daily
+GROUP BY 1, 2
+ON CONFLICT DO NOTHING;
+
+INSERT INTO kpi_monthly
+SELECT date_trunc('month', day)::date, client_id,
+       sum(reaction_sum_minutes), sum(reaction_count), sum(mttr_sum_minutes), sum(mttr_count),
+       sum(sla_compliant_total), sum(sla_total), sum(work_orders_total)
+FROM kpi_daily
+GROUP BY 1, 2
+ON CONFLICT DO NOTHING;
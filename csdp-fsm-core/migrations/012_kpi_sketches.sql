@@ -0,0 +1,13 @@
+-- Mergeable quantile sketches (src/domain/sketch.py, DDSketch) of reaction time and MTTR in
+-- minutes, per bucket and client. NULL when the bucket has no such durations.
+ALTER TABLE kpi_daily
+  ADD COLUMN IF NOT EXISTS reaction_sketch BYTEA NULL,
+  ADD COLUMN IF NOT EXISTS mttr_sketch BYTEA NULL;
+
+ALTER TABLE kpi_weekly
+  ADD COLUMN IF NOT EXISTS reaction_sketch BYTEA NULL,
+  ADD COLUMN IF NOT EXISTS mttr_sketch BYTEA NULL;
+
+ALTER TABLE kpi_monthly
+  ADD COLUMN IF NOT EXISTS reaction_sketch BYTEA NULL,
+  ADD COLUMN IF NOT EXISTS mttr_sketch BYTEA NULL;
@@ -0,0 +1,27 @@
+-- One row per work order with its KPI measures and dimensions, written by the same pass
+-- that rebuilds kpi_daily. Breakdowns by priority/work type/engineer/asset aggregate these
+-- rows instead of re-reading event_store.
+CREATE TABLE IF NOT EXISTS kpi_work_order_facts (
+  work_order_id UUID PRIMARY KEY,
+  day DATE NOT NULL,
+  client_id UUID NULL,
+  priority TEXT NULL,
+  work_type TEXT NULL,
+  engineer_id UUID NULL,
+  asset_id UUID NULL,
+  reaction_minutes DOUBLE PRECISION NULL,
+  mttr_minutes DOUBLE PRECISION NULL,
+  paused_minutes DOUBLE PRECISION NOT NULL DEFAULT 0,
+  visits INT NOT NULL DEFAULT 0,
+  -- NULL until the work order is completed.
+  first_time_fix BOOLEAN NULL,
+  parts_quantity NUMERIC NOT NULL DEFAULT 0,
+  sla_state TEXT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_kpi_facts_day ON kpi_work_order_facts (day);
+CREATE INDEX IF NOT EXISTS idx_kpi_facts_client_day ON kpi_work_order_facts (client_id, day);
+CREATE INDEX IF NOT EXISTS idx_kpi_facts_priority_day ON kpi_work_order_facts (priority, day);
+CREATE INDEX IF NOT EXISTS idx_kpi_facts_work_type_day ON kpi_work_order_facts (work_type, day);
+CREATE INDEX IF NOT EXISTS idx_kpi_facts_engineer_day ON kpi_work_order_facts (engineer_id, day) WHERE engineer_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_kpi_facts_asset_day ON kpi_work_order_facts (asset_id, day);
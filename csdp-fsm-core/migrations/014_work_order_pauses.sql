@@ -0,0 +1,10 @@
+-- Pause accounting on the projection, maintained per WORK.PAUSED/WORK.RESUMED event:
+-- downtime_minutes stays the gross start..end time, net_downtime_minutes leaves out the
+-- pauses after work started, waiting_seconds totals every pause by reason_code.
+ALTER TABLE work_orders_current
+  ADD COLUMN IF NOT EXISTS net_downtime_minutes INT NULL,
+  ADD COLUMN IF NOT EXISTS waiting_seconds JSONB NULL,
+  ADD COLUMN IF NOT EXISTS work_paused_seconds INT NULL,
+  -- the open pause, if any
+  ADD COLUMN IF NOT EXISTS paused_at TIMESTAMPTZ NULL,
+  ADD COLUMN IF NOT EXISTS pause_reason TEXT NULL;
@@ -0,0 +1,23 @@
+-- Working-time calendars for SLAs (src/domain/sla_calendar.py). week_hours maps the ISO
+-- weekday (0 = Monday) to working intervals in local time: {"0": [["09:00", "18:00"]], ...}.
+CREATE TABLE IF NOT EXISTS sla_calendars (
+  calendar_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  name TEXT NOT NULL,
+  timezone TEXT NOT NULL DEFAULT 'UTC',
+  week_hours JSONB NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS sla_calendar_holidays (
+  calendar_id UUID NOT NULL REFERENCES sla_calendars(calendar_id) ON DELETE CASCADE,
+  day DATE NOT NULL,
+  PRIMARY KEY (calendar_id, day)
+);
+
+-- Calendar the deadlines were computed in (NULL: wall-clock time).
+ALTER TABLE sla_view
+  ADD COLUMN IF NOT EXISTS calendar_id UUID NULL;
+
+-- Contracts (003_contracts.sql) count reaction/restore minutes in their calendar.
+ALTER TABLE IF EXISTS contracts
+  ADD COLUMN IF NOT EXISTS calendar_id UUID NULL REFERENCES sla_calendars(calendar_id);
@@ -0,0 +1,21 @@
+-- Pending deadline of an open work order: reaction until work started, restore after,
+-- NULL once it is completed, closed or cancelled. Maintained by apply_event/replay
+-- (fold.pending_deadline); GET /v1/sla lists open orders by it.
+ALTER TABLE sla_view
+  ADD COLUMN IF NOT EXISTS due_at TIMESTAMPTZ NULL;
+
+UPDATE sla_view s
+SET due_at = CASE WHEN w.actual_start_effective IS NULL THEN s.reaction_deadline_at ELSE s.restore_deadline_at END
+FROM work_orders_current w
+WHERE w.work_order_id = s.work_order_id
+  AND w.business_state NOT IN ('COMPLETED', 'CLOSED', 'CANCELLED');
+
+-- Only the non-terminal rows are indexed: breached and finished orders, the bulk of the
+-- table over time, never enter them. AT_RISK gets its own, much smaller, index.
+CREATE INDEX IF NOT EXISTS ix_sla_view_open_due
+  ON sla_view (due_at, work_order_id)
+  WHERE state IN ('IN_SLA', 'AT_RISK') AND due_at IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_sla_view_at_risk_due
+  ON sla_view (due_at, work_order_id)
+  WHERE state = 'AT_RISK' AND due_at IS NOT NULL;
@@ -0,0 +1,29 @@
+-- Dashboard counters (src/domain/counters.py): work orders per dimension value, overall
+-- (scope 'all', scope_id ''), per client and per team. Every key is spread over a few
+-- slots to keep concurrent writers off each other's rows; readers sum the slots.
+CREATE TABLE IF NOT EXISTS work_order_counters (
+  scope TEXT NOT NULL CHECK (scope IN ('all', 'client', 'team')),
+  scope_id TEXT NOT NULL,
+  dimension TEXT NOT NULL,
+  value TEXT NOT NULL,
+  slot SMALLINT NOT NULL,
+  count BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (scope, scope_id, dimension, value, slot)
+);
+
+-- Backfill from the projection; apply_event keeps it current from here on.
+INSERT INTO work_order_counters (scope, scope_id, dimension, value, slot, count)
+SELECT sc.scope, sc.scope_id, d.dimension, d.value, 0, count(*)
+FROM work_orders_current w
+CROSS JOIN LATERAL (
+  VALUES ('business_state', w.business_state),
+         ('execution_state', w.execution_state),
+         ('sla_state', w.sla_state),
+         ('priority', w.priority)
+) AS d(dimension, value)
+CROSS JOIN LATERAL (
+  VALUES ('all', ''), ('client', w.client_id::text), ('team', w.assigned_team_id::text)
+) AS sc(scope, scope_id)
+WHERE d.value IS NOT NULL AND sc.scope_id IS NOT NULL
+GROUP BY sc.scope, sc.scope_id, d.dimension, d.value
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,42 @@
+-- Insertion order of events. created_at_system is now() of the writing transaction, so
+-- events appended together tie on it and event_id (random) would order them at random;
+-- timelines and replays order by event_seq instead. Existing rows are numbered in their
+-- previous (created_at_system, event_id) order.
+CREATE SEQUENCE IF NOT EXISTS event_store_event_seq;
+
+ALTER TABLE event_store
+  ADD COLUMN IF NOT EXISTS event_seq BIGINT NULL;
+
+UPDATE event_store e
+SET event_seq = numbered.seq
+FROM (
+  SELECT event_id, row_number() OVER (ORDER BY created_at_system, event_id) AS seq
+  FROM event_store
+  WHERE event_seq IS NULL
+) AS numbered
+WHERE e.event_id = numbered.event_id;
+
+SELECT setval('event_store_event_seq', GREATEST((SELECT max(event_seq) FROM event_store), 1));
+
+ALTER TABLE event_store
+  ALTER COLUMN event_seq SET DEFAULT nextval('event_store_event_seq'),
+  ALTER COLUMN event_seq SET NOT NULL;
+ALTER SEQUENCE event_store_event_seq OWNED BY event_store.event_seq;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_event_store_event_seq ON event_store(event_seq);
+CREATE INDEX IF NOT EXISTS ix_event_store_entity_seq ON event_store(entity_id, event_seq);
+
+-- Timeline rows carry the event's event_seq: keyset pages and streams follow it.
+ALTER TABLE work_order_timeline
+  ADD COLUMN IF NOT EXISTS event_seq BIGINT NULL;
+
+UPDATE work_order_timeline t
+SET event_seq = e.event_seq
+FROM event_store e
+WHERE e.event_id = t.event_id AND t.event_seq IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_timeline_work_order_seq
+  ON work_order_timeline(work_order_id, event_seq);
+
+-- Replaced by ix_timeline_work_order_seq (005_timeline_keyset.sql).
+DROP INDEX IF EXISTS ix_timeline_work_order_keyset;
@@ -0,0 +1,30 @@
+-- Commit-safe delta sync. change_seq is drawn when a row is written but becomes visible at
+-- commit, so a slow transaction can commit a lower change_seq after clients moved past it.
+-- Rows also record the writing transaction (change_xid); /v1/sync pages on
+-- (change_xid, change_seq) and only moves its cursor over rows of transactions older than
+-- the oldest one still running (pg_snapshot_xmin), so nothing can commit behind it.
+-- Existing rows get the id of this migration's transaction.
+ALTER TABLE work_orders_current
+  ADD COLUMN IF NOT EXISTS change_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+
+ALTER TABLE work_order_timeline
+  ADD COLUMN IF NOT EXISTS change_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+
+CREATE INDEX IF NOT EXISTS ix_work_orders_engineer_change_xid
+  ON work_orders_current(assigned_engineer_id, change_xid, change_seq);
+
+-- Replaced by ix_work_orders_engineer_change_xid (006_change_seq.sql).
+DROP INDEX IF EXISTS ix_work_orders_engineer_change;
+
+-- Work orders that left an engineer (reassigned, or rebuilt with another assignee): sync
+-- tells that engineer's device to drop them. Cleared when the order comes back to them.
+CREATE TABLE IF NOT EXISTS engineer_sync_removals (
+  engineer_id UUID NOT NULL,
+  work_order_id UUID NOT NULL,
+  change_seq BIGINT NOT NULL DEFAULT nextval('projection_change_seq'),
+  change_xid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+  PRIMARY KEY (engineer_id, work_order_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_engineer_sync_removals_change
+  ON engineer_sync_removals(engineer_id, change_xid, change_seq);
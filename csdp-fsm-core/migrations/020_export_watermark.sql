@@ -0,0 +1,14 @@
+-- Commit-safe event export. created_at_system is the writer's transaction start and imports
+-- may backdate it, so a (created_at_system, event_id) cursor skipped late-committing and
+-- backdated rows. Events also record the writing transaction (change_xid); the export pages
+-- on (change_xid, event_seq) and only returns rows of transactions older than the oldest one
+-- still running (pg_snapshot_xmin), so nothing can commit behind the cursor.
+-- Existing rows get the id of this migration's transaction and keep their event_seq order.
+ALTER TABLE event_store
+  ADD COLUMN IF NOT EXISTS change_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+
+CREATE INDEX IF NOT EXISTS ix_event_store_export_xid
+  ON event_store(change_xid, event_seq);
+
+-- Replaced by ix_event_store_export_xid (007_event_export.sql).
+DROP INDEX IF EXISTS ix_event_store_export;
@@ -0,0 +1,11 @@
+-- Commit-safe engineer board refresh (see 019_sync_watermark.sql): board rows record the
+-- writing transaction, and board views and clients page on (change_xid, change_seq), only
+-- moving their cursor over rows of transactions below pg_snapshot_xmin.
+ALTER TABLE engineer_board
+  ADD COLUMN IF NOT EXISTS change_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+
+CREATE INDEX IF NOT EXISTS ix_engineer_board_change_xid
+  ON engineer_board(change_xid, change_seq);
+
+-- Replaced by ix_engineer_board_change_xid (008_engineer_board_changes.sql).
+DROP INDEX IF EXISTS ix_engineer_board_change;
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+
+from src.api.responses import FastJSONResponse
+
+
+def etag_for(version_row: Dict[str, Any]) -> str:
+    # version grows with every applied event and last_event_id pins it to the exact event,
+    # so the pair identifies every representation derived from work_orders_current.
+    return f'"{version_row["version"]}-{version_row["last_event_id"]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def with_etag(content: Any, etag: Optional[str]) -> FastJSONResponse:
+    headers = {"ETag": etag} if etag else None
+    return FastJSONResponse(content, headers=headers)
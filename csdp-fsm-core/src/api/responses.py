@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+from src.storage.jsonb import RawJSON, orjson
+
+
+def _decimal(value: Decimal) -> Any:
+    # Same rule as fastapi.encoders.decimal_encoder: NUMERIC(x, 0) -> int, anything else -> float.
+    exponent = value.as_tuple().exponent
+    if isinstance(exponent, int) and exponent >= 0:
+        return int(value)
+    return float(value)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return _decimal(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None and hasattr(orjson, "Fragment"):
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS
+
+    def _orjson_default(value: Any) -> Any:
+        # Subclass passthrough routes str subclasses here: RawJSON is spliced in as is.
+        if isinstance(value, RawJSON):
+            return orjson.Fragment(str(value))
+        if isinstance(value, str):
+            return str(value)
+        return _default(value)
+
+    def dumps(content: Any) -> bytes:
+        # orjson encodes str/int/float/dict/list/datetime/UUID natively; only Decimal & co hit the default.
+        return orjson.dumps(content, default=_orjson_default, option=_ORJSON_OPTIONS)
+
+else:
+
+    def dumps(content: Any) -> bytes:
+        # Without orjson.Fragment there is no way to splice JSON text, so RawJSON is decoded first.
+        return json.dumps(_decode_raw(content), default=_default, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+
+    def _decode_raw(value: Any) -> Any:
+        if isinstance(value, RawJSON):
+            return json.loads(value)
+        if isinstance(value, dict):
+            return {key: _decode_raw(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [_decode_raw(item) for item in value]
+        return value
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse for database rows: UUID/datetime/Decimal values are encoded in one pass.
+
+    Routes return it directly, which skips FastAPI's jsonable_encoder walk over the content.
+    Output matches jsonable_encoder for the types rows contain.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,17 +1,65 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 
-from src.storage.db import get_tx
+from src.api.cursors import decode_cursor, encode_cursor
+from src.api.responses import FastJSONResponse
 from src.storage import projections_repo
+from src.storage.board_view import board_view
+from src.storage.db import get_tx
 
 router = APIRouter()
 
 
 @router.get("/v1/engineers/board")
-def get_engineer_board() -> Dict[str, Any]:
+def get_engineer_board(
+    status: str | None = Query(default=None),
+    team_id: str | None = Query(default=None),
+    since: str | None = Query(default=None),
+) -> FastJSONResponse:
+    after = tuple(decode_cursor(since, 2)) if since else None
+    if after is not None and not all(isinstance(part, int) for part in after):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if board_view.needs_refresh():
+        with get_tx() as conn:
+            board_view.refresh(conn)
+    cursor = encode_cursor(*board_view.settled_key)
+    items = board_view.items(status=status, team_id=team_id, since=after)
+    return FastJSONResponse({"items": items, "next_cursor": cursor})
+
+
+@router.get("/v1/engineers/nearest")
+def get_nearest_engineers(
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    status: str | None = Query(default="AVAILABLE"),
+    k: int = Query(default=5, ge=1, le=100),
+    max_km: float | None = Query(default=None, gt=0),
+) -> FastJSONResponse:
+    if board_view.needs_refresh():
+        with get_tx() as conn:
+            board_view.refresh(conn)
+    items = [
+        {**row, "distance_km": round(distance, 3)}
+        for distance, row in board_view.nearest(lat, lon, k, status=status or None, max_km=max_km)
+    ]
+    return FastJSONResponse({"items": items})
+
+
+@router.get("/v1/engineers/{engineer_id}/schedule")
+def get_engineer_schedule(
+    engineer_id: str,
+    window_from: datetime | None = Query(default=None, alias="from"),
+    window_to: datetime | None = Query(default=None, alias="to"),
+) -> FastJSONResponse:
+    window_from = window_from or datetime.now(timezone.utc)
+    window_to = window_to or window_from + timedelta(days=7)
+    if window_to <= window_from:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+
     with get_tx() as conn:
-        items = projections_repo.fetch_engineer_board(conn)
-    return {"items": items}
+        items = projections_repo.fetch_engineer_schedule(conn, engineer_id, window_from, window_to)
+    return FastJSONResponse({"engineer_id": engineer_id, "from": window_from, "to": window_to, "items": items})
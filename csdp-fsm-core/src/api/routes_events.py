@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+from typing import Any
 
-from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
-from src.domain.apply_event import apply_event
-from src.domain.validator import Actor, validate_event
-from src.storage import event_store_repo
-from src.storage.db import get_tx
+from src.domain.dispatcher import QueueFull, get_dispatcher
+from src.domain.ingest import submit_event_tx
+from src.domain.validator import Actor
+from src.storage import jsonb
 
 router = APIRouter()
 
@@ -18,39 +21,21 @@ async def post_event(
     x_idempotency_key: str | None = Header(default=None, alias="X-Idempotency-Key"),
     x_role: str | None = Header(default=None, alias="X-Role"),
     x_actor_id: str | None = Header(default=None, alias="X-Actor-Id"),
-) -> Dict[str, Any]:
-    payload = await request.json()
+) -> Any:
+    payload = jsonb.loads(await request.body())
     if x_idempotency_key and not payload.get("idempotency_key"):
         payload["idempotency_key"] = x_idempotency_key
     actor = Actor(role=(x_role or "SYSTEM"), actor_id=x_actor_id)
 
-    with get_tx() as conn:
-        validation = validate_event(conn, payload, actor)
-        if validation.decision != "ACCEPTED":
-            return {
-                "decision": validation.decision,
-                "reason_code": validation.reason_code,
-                "details": validation.details,
-            }
-
-        normalized_event = validation.normalized_event or payload
-        normalized_event["created_by"] = actor.actor_id
-        event_id, duplicate = event_store_repo.insert_event(conn, normalized_event)
-        if duplicate:
-            return {
-                "decision": "ACCEPTED",
-                "reason_code": "DUPLICATE_IGNORED",
-                "event_id": event_id,
-            }
-
-        stored = event_store_repo.fetch_event_by_id(conn, event_id)
-        if not stored:
-            raise HTTPException(status_code=500, detail="event_store insert failed")
-        normalized_event["event_id"] = event_id
-        normalized_event["created_at_system"] = stored["created_at_system"]
-        apply_event(conn, normalized_event)
-        return {
-            "decision": "ACCEPTED",
-            "reason_code": "OK",
-            "event_id": event_id,
-        }
+    dispatcher = get_dispatcher()
+    if dispatcher is None:
+        return await run_in_threadpool(submit_event_tx, payload, actor)
+    try:
+        future = dispatcher.submit(payload, actor)
+    except QueueFull as exc:
+        return JSONResponse(
+            {"detail": "Ingestion queue is full, retry later"},
+            status_code=429,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+    return await asyncio.wrap_future(future)
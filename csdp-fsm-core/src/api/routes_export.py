@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from src.storage.db import get_tx
+from src.storage import event_store_repo
+
+router = APIRouter()
+
+
+@router.get("/v1/export/events")
+def export_events(
+    after_xid: int | None = Query(default=None, ge=0),
+    after_event_seq: int | None = Query(default=None, ge=0),
+    format: str = Query(default="ndjson", pattern="^(ndjson|columnar)$"),
+    batch_size: int = Query(default=5000, ge=1, le=50000),
+    limit: int | None = Query(default=None, ge=1),
+) -> StreamingResponse:
+    """Stream event_store after the (after_xid, after_event_seq) cursor in commit-safe order.
+
+    ndjson: one event per line; resume from the last line's change_xid and event_seq.
+    columnar: one batch per line with an array per column and the batch's "last" cursor.
+    """
+    if (after_xid is None) != (after_event_seq is None):
+        raise HTTPException(status_code=400, detail="after_xid and after_event_seq go together")
+    after = (after_xid, after_event_seq) if after_xid is not None else None
+    return StreamingResponse(_stream_export(after, format, batch_size, limit), media_type="application/x-ndjson")
+
+
+def _stream_export(after: tuple | None, format: str, batch_size: int, limit: int | None) -> Iterator[str]:
+    iter_export = event_store_repo.iter_export_batches if format == "columnar" else event_store_repo.iter_export_ndjson
+    with get_tx() as conn:
+        for line in iter_export(conn, after, limit=limit, batch_size=batch_size):
+            yield line + "\n"
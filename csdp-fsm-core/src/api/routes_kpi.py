@@ -3,8 +3,10 @@ from __future__ import annotations
 from datetime import date, datetime
 from typing import Any, Dict, List
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 
+from src.api.responses import FastJSONResponse
+from src.domain import kpi
 from src.storage.db import get_tx
 
 router = APIRouter()
@@ -17,67 +19,133 @@ def _parse_date(value: str | None) -> date | None:
 
 
 @router.get("/v1/kpi")
-def get_kpi(period_from: str | None = Query(default=None), period_to: str | None = Query(default=None)) -> Dict[str, Any]:
-    date_from = _parse_date(period_from)
-    date_to = _parse_date(period_to)
+def get_kpi(
+    period_from: str | None = Query(default=None),
+    period_to: str | None = Query(default=None),
+    client_id: str | None = Query(default=None),
+) -> FastJSONResponse:
+    try:
+        date_from = _parse_date(period_from)
+        date_to = _parse_date(period_to)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid period")
+
+    with get_tx() as conn:
+        if date_from is None or date_to is None:
+            first_day, last_day = _kpi_day_bounds(conn, client_id)
+            date_from = date_from or first_day
+            date_to = date_to or last_day
+        items: List[Dict[str, Any]] = []
+        facts: Dict[str, Any] = {}
+        if date_from is not None and date_to is not None and date_from <= date_to:
+            items = _fetch_kpi_buckets(conn, kpi.plan_buckets(date_from, date_to), client_id)
+            facts = _fetch_fact_groups(conn, date_from, date_to, [], {"client_id": client_id})[0]
+    return FastJSONResponse(
+        {
+            "period_from": date_from,
+            "period_to": date_to,
+            "items": [_public(item) for item in items],
+            "aggregate": {
+                **kpi.combine(items),
+                "net_mttr_avg_minutes": facts.get("net_mttr_avg_minutes"),
+                "first_time_fix_percent": facts.get("first_time_fix_percent"),
+                "pause_share_percent": facts.get("pause_share_percent"),
+                "parts_per_order": facts.get("parts_per_order"),
+            },
+        }
+    )
+
+
+@router.get("/v1/kpi/breakdown")
+def get_kpi_breakdown(
+    period_from: str = Query(),
+    period_to: str = Query(),
+    group_by: str = Query(default="priority"),
+    client_id: str | None = Query(default=None),
+    priority: str | None = Query(default=None),
+    work_type: str | None = Query(default=None),
+    engineer_id: str | None = Query(default=None),
+    asset_id: str | None = Query(default=None),
+) -> FastJSONResponse:
+    try:
+        date_from = _parse_date(period_from)
+        date_to = _parse_date(period_to)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid period")
+    if date_from is None or date_to is None:
+        raise HTTPException(status_code=400, detail="Invalid period")
+    dimensions = [name.strip() for name in group_by.split(",") if name.strip()]
+    unknown = [name for name in dimensions if name not in kpi.FACT_DIMENSIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by: {', '.join(unknown)}")
+
+    filters = {"client_id": client_id, "priority": priority, "work_type": work_type, "engineer_id": engineer_id, "asset_id": asset_id}
     with get_tx() as conn:
-        items = _fetch_kpi_rows(conn, date_from, date_to)
-    aggregate = _aggregate_kpi(items)
-    return {"items": items, "aggregate": aggregate}
+        items = _fetch_fact_groups(conn, date_from, date_to, dimensions, filters)
+    return FastJSONResponse({"period_from": date_from, "period_to": date_to, "group_by": dimensions, "items": items})
 
 
-def _fetch_kpi_rows(conn, date_from: date | None, date_to: date | None) -> List[Dict[str, Any]]:
-    clauses = []
-    params: List[Any] = []
-    if date_from:
-        clauses.append("day >= %s")
-        params.append(date_from)
-    if date_to:
-        clauses.append("day <= %s")
-        params.append(date_to)
-    where = "WHERE " + " AND ".join(clauses) if clauses else ""
-    query = f"""
-        SELECT day, client_id, reaction_avg_minutes, mttr_avg_minutes, sla_compliance_percent, work_orders_total
+def _public(item: Dict[str, Any]) -> Dict[str, Any]:
+    # Sketch bytes stay internal; the bucket exposes the quantiles computed from them.
+    row = {key: value for key, value in item.items() if key not in kpi.SKETCH_COLUMNS}
+    return {**row, **kpi.combine([item])}
+
+
+def _kpi_day_bounds(conn, client_id: str | None) -> tuple:
+    query = """
+        SELECT min(day) AS first_day, max(day) AS last_day
         FROM kpi_daily
-        {where}
-        ORDER BY day, client_id NULLS FIRST
+        WHERE (%(client_id)s::uuid IS NULL OR client_id = %(client_id)s::uuid)
     """
     with conn.cursor() as cur:
-        cur.execute(query, params)
-        return cur.fetchall()
+        cur.execute(query, {"client_id": client_id})
+        row = cur.fetchone()
+    return row["first_day"], row["last_day"]
 
 
-def _aggregate_kpi(items: List[Dict[str, Any]]) -> Dict[str, Any]:
-    if not items:
-        return {
-            "reaction_time_avg_minutes": None,
-            "mttr_avg_minutes": None,
-            "sla_compliance_percent": None,
-            "work_orders_total": 0,
-        }
-    total_orders = sum(item["work_orders_total"] for item in items)
-    reaction_values = [item["reaction_avg_minutes"] for item in items if item["reaction_avg_minutes"] is not None]
-    mttr_values = [item["mttr_avg_minutes"] for item in items if item["mttr_avg_minutes"] is not None]
-    sla_values = [item["sla_compliance_percent"] for item in items if item["sla_compliance_percent"] is not None]
-    return {
-        "reaction_time_avg_minutes": sum(reaction_values) / len(reaction_values) if reaction_values else None,
-        "mttr_avg_minutes": sum(mttr_values) / len(mttr_values) if mttr_values else None,
-        "sla_compliance_percent": sum(sla_values) / len(sla_values) if sla_values else None,
-        "work_orders_total": total_orders,
-from typing import Any, Dict
-
-from fastapi import APIRouter, Query
-
-router = APIRouter()
+def _fetch_kpi_buckets(conn, plan: List[kpi.Bucket], client_id: str | None) -> List[Dict[str, Any]]:
+    # One statement for the whole plan: each run of the covering buckets is a range scan
+    # of the matching rollup table, so the row count follows the plan, not the day count.
+    selects = []
+    params: List[Any] = []
+    for grain, first, last in plan:
+        table, bucket_column = kpi.ROLLUP_TABLES[grain]
+        selects.append(
+            f"""
+            SELECT '{grain}' AS grain, {bucket_column} AS bucket_start, client_id, {", ".join(kpi.SUM_COLUMNS + kpi.SKETCH_COLUMNS)}
+            FROM {table}
+            WHERE {bucket_column} >= %s AND {bucket_column} <= %s
+              AND (%s::uuid IS NULL OR client_id = %s::uuid)
+            """
+        )
+        params.extend([first, last, client_id, client_id])
+    if not selects:
+        return []
+    query = " UNION ALL ".join(selects) + " ORDER BY bucket_start, client_id"
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
 
 
-@router.get("/v1/kpi")
-def get_kpi(period_from: str | None = Query(default=None), period_to: str | None = Query(default=None)) -> Dict[str, Any]:
-    return {
-        "period_from": period_from,
-        "period_to": period_to,
-        "reaction_time_avg_minutes": None,
-        "mttr_avg_minutes": None,
-        "sla_compliance_percent": None,
-        "first_time_fix_percent": None,
-    }
+def _fetch_fact_groups(
+    conn, date_from: date, date_to: date, dimensions: List[str], filters: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    # Dimension names are checked against kpi.FACT_DIMENSIONS before they reach the SQL.
+    columns = [f"{kpi.FACT_DIMENSIONS[name]} AS {name}" for name in dimensions]
+    where = ["day >= %(date_from)s", "day <= %(date_to)s"]
+    params: Dict[str, Any] = {"date_from": date_from, "date_to": date_to}
+    for column, value in filters.items():
+        if value is not None:
+            where.append(f"{column} = %({column})s")
+            params[column] = value
+    query = f"""
+        SELECT {", ".join(columns + [kpi.FACT_AGGREGATES])}
+        FROM kpi_work_order_facts
+        WHERE {" AND ".join(where)}
+    """
+    if dimensions:
+        positions = ", ".join(str(position) for position in range(1, len(dimensions) + 1))
+        query += f" GROUP BY {positions} ORDER BY {positions}"
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
@@ -1,19 +1,48 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from datetime import datetime
+from typing import Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
 
+from src.api.conditional import etag_for, etag_matches, not_modified, with_etag
+from src.api.cursors import decode_cursor, encode_cursor
+from src.api.responses import FastJSONResponse
 from src.storage.db import get_tx
 from src.storage import projections_repo
 
 router = APIRouter()
 
 
+@router.get("/v1/sla")
+def get_sla_board(
+    state: str | None = Query(default=None, pattern="^(IN_SLA|AT_RISK)$"),
+    due_before: datetime | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = Query(default=None),
+) -> FastJSONResponse:
+    after = tuple(decode_cursor(cursor, 2)) if cursor else None
+    with get_tx() as conn:
+        items = projections_repo.fetch_sla_board(conn, state, limit + 1, due_before, after)
+    # limit + 1 rows fetched: the extra one only signals that another page exists.
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["due_at"], items[-1]["work_order_id"])
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor})
+
+
 @router.get("/v1/sla/{work_order_id}")
-def get_sla_view(work_order_id: str) -> Dict[str, Any]:
+def get_sla_view(
+    work_order_id: str,
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+) -> Any:
     with get_tx() as conn:
+        version = projections_repo.fetch_work_order_version(conn, work_order_id)
+        etag = etag_for(version) if version else None
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
         row = projections_repo.fetch_sla_view(conn, work_order_id)
     if not row:
         raise HTTPException(status_code=404, detail="Not found")
-    return row
+    return with_etag(row, etag)
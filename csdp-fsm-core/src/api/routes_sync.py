@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, HTTPException, Query
+
+from src.api.cursors import decode_cursor, encode_cursor
+from src.api.responses import FastJSONResponse
+from src.storage.db import get_tx
+from src.storage import projections_repo
+
+router = APIRouter()
+
+_CURSOR_FIELDS = ("change_xid", "change_seq", "settled", "removed")
+
+
+@router.get("/v1/sync")
+def get_sync(
+    engineer_id: str = Query(),
+    since: str | None = Query(default=None),
+    limit: int = Query(default=200, ge=1, le=1000),
+    include_timeline: bool = Query(default=True),
+) -> FastJSONResponse:
+    after = tuple(decode_cursor(since, 2)) if since else (0, 0)
+    if not all(isinstance(part, int) for part in after):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    with get_tx() as conn:
+        rows = projections_repo.fetch_engineer_changes(conn, engineer_id, after, limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        changed = [row for row in rows if not row["removed"]]
+        timeline: List[Dict[str, Any]] = []
+        if include_timeline and changed:
+            timeline = projections_repo.fetch_timeline_changes(conn, [row["work_order_id"] for row in changed], after)
+
+    # Rows of transactions that may still be followed by lower keys are sent, but the cursor
+    # stays before them: they come again next time and are deduplicated by version.
+    next_key = after
+    for row in rows:
+        if not row["settled"]:
+            break
+        next_key = (row["change_xid"], row["change_seq"])
+
+    return FastJSONResponse(
+        {
+            "work_orders": [_compact(row) for row in changed],
+            "removed": [row["work_order_id"] for row in rows if row["removed"]],
+            "timeline": [_compact(row) for row in timeline],
+            "next_cursor": encode_cursor(*next_key),
+            "has_more": has_more and next_key != after,
+        }
+    )
+
+
+def _compact(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in row.items() if value is not None and key not in _CURSOR_FIELDS}
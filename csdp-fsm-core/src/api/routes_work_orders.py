@@ -1,9 +1,17 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Body, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
+from src.api.conditional import etag_for, etag_matches, not_modified, with_etag
+from src.api.cursors import decode_cursor, encode_cursor
+from src.api.responses import FastJSONResponse, dumps
+from src.domain import replay
+from src.domain.counters import COUNTER_DIMENSIONS
 from src.storage.db import get_tx
 from src.storage import projections_repo
 
@@ -17,37 +25,170 @@ def list_work_orders(
     asset_id: str | None = Query(default=None),
     limit: int = Query(default=50, ge=1, le=200),
     cursor: str | None = Query(default=None),
-) -> Dict[str, Any]:
+) -> FastJSONResponse:
     with get_tx() as conn:
         items = projections_repo.list_work_orders(conn, business_state, assigned_engineer_id, asset_id, limit, cursor)
-    return {"items": items, "next_cursor": None}
+    return FastJSONResponse({"items": items, "next_cursor": None})
+
+
+@router.post("/v1/work-orders:batchGet")
+def batch_get_work_orders(
+    ids: List[UUID] = Body(embed=True, min_length=1, max_length=5000),
+    since_version: Dict[UUID, int] | None = Body(default=None, embed=True),
+) -> FastJSONResponse:
+    requested = list(dict.fromkeys(str(wo_id) for wo_id in ids))
+    since_versions = {str(wo_id): version for wo_id, version in (since_version or {}).items()}
+    with get_tx() as conn:
+        items = projections_repo.fetch_work_orders(conn, requested, since_versions)
+    return FastJSONResponse({"items": items})
+
+
+# Declared before /v1/work-orders/{work_order_id}, which would otherwise match "stats".
+@router.get("/v1/work-orders/stats")
+def get_work_order_stats(
+    client_id: UUID | None = Query(default=None),
+    team_id: UUID | None = Query(default=None),
+) -> FastJSONResponse:
+    if client_id and team_id:
+        raise HTTPException(status_code=400, detail="Use either client_id or team_id")
+    scope, scope_id = "all", ""
+    if client_id:
+        scope, scope_id = "client", str(client_id)
+    elif team_id:
+        scope, scope_id = "team", str(team_id)
+    with get_tx() as conn:
+        rows = projections_repo.fetch_work_order_counts(conn, scope, scope_id)
+    counts: Dict[str, Dict[str, int]] = {dimension: {} for dimension in COUNTER_DIMENSIONS}
+    for row in rows:
+        counts.setdefault(row["dimension"], {})[row["value"]] = row["count"]
+    # Every work order has a business_state: its counts add up to the number of work orders.
+    total = sum(counts["business_state"].values())
+    return FastJSONResponse({"client_id": client_id, "team_id": team_id, "total": total, **counts})
 
 
 @router.get("/v1/work-orders/{work_order_id}")
-def get_work_order(work_order_id: str) -> Dict[str, Any]:
+def get_work_order(
+    work_order_id: str,
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+) -> Any:
     with get_tx() as conn:
         row = projections_repo.fetch_work_order(conn, work_order_id)
     if not row:
         raise HTTPException(status_code=404, detail="Not found")
-    return row
+    etag = etag_for(row)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return with_etag(row, etag)
+
+
+@router.get("/v1/work-orders/{work_order_id}/as-of")
+def get_work_order_as_of(work_order_id: str, at: datetime = Query()) -> FastJSONResponse:
+    with get_tx() as conn:
+        state = replay.state_at(conn, work_order_id, at)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return FastJSONResponse({"as_of": at, **state.as_dict()})
 
 
 @router.get("/v1/work-orders/{work_order_id}/timeline")
-def get_work_order_timeline(work_order_id: str, limit: int = Query(default=200, ge=1, le=500)) -> Dict[str, Any]:
+def get_work_order_timeline(
+    work_order_id: str,
+    limit: int = Query(default=200, ge=1, le=500),
+    cursor: str | None = Query(default=None),
+    include_payload: bool = Query(default=True),
+    payload_fields: List[str] | None = Query(default=None),
+    format: str = Query(default="json", pattern="^(json|ndjson)$"),
+) -> Any:
+    after = decode_cursor(cursor, 1)[0] if cursor else None
+    if cursor is not None and not isinstance(after, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if format == "ndjson":
+        # NDJSON streams everything after the cursor; limit applies to paged JSON only.
+        return StreamingResponse(
+            _stream_timeline(work_order_id, after, include_payload, payload_fields),
+            media_type="application/x-ndjson",
+        )
+
+    with get_tx() as conn:
+        events = projections_repo.fetch_timeline(
+            conn, work_order_id, limit + 1, after, include_payload, payload_fields
+        )
+    return FastJSONResponse({"work_order_id": work_order_id, **_timeline_page(events, limit)})
+
+
+def _timeline_page(events: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    # Callers fetch limit + 1 rows; the extra row only signals that another page exists.
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        last = events[-1]
+        next_cursor = encode_cursor(last["event_seq"])
+    return {"events": events, "next_cursor": next_cursor}
+
+
+def _stream_timeline(
+    work_order_id: str,
+    after: int | None,
+    include_payload: bool,
+    payload_fields: List[str] | None,
+) -> Iterator[bytes]:
+    with get_tx() as conn:
+        for row in projections_repo.iter_timeline(conn, work_order_id, after, include_payload, payload_fields):
+            yield dumps(row) + b"\n"
+
+
+@router.get("/v1/work-orders/{work_order_id}/full")
+def get_work_order_full(
+    work_order_id: UUID,
+    timeline_limit: int = Query(default=200, ge=1, le=500),
+) -> FastJSONResponse:
     with get_tx() as conn:
-        events = projections_repo.fetch_timeline(conn, work_order_id, limit)
-    return {"work_order_id": work_order_id, "events": events}
+        bundles = projections_repo.fetch_work_order_bundles(conn, [str(work_order_id)], timeline_limit + 1)
+    if not bundles:
+        raise HTTPException(status_code=404, detail="Not found")
+    return FastJSONResponse(_bundle_response(bundles[0], timeline_limit))
+
+
+@router.post("/v1/work-orders:batchGetFull")
+def batch_get_work_orders_full(
+    ids: List[UUID] = Body(embed=True, min_length=1, max_length=100),
+    timeline_limit: int = Body(default=50, embed=True, ge=1, le=500),
+) -> FastJSONResponse:
+    requested = list(dict.fromkeys(str(wo_id) for wo_id in ids))
+    with get_tx() as conn:
+        bundles = projections_repo.fetch_work_order_bundles(conn, requested, timeline_limit + 1)
+    items = [_bundle_response(bundle, timeline_limit) for bundle in bundles]
+    found = {str(item["work_order"]["work_order_id"]) for item in items}
+    return FastJSONResponse({"items": items, "missing": [wo_id for wo_id in requested if wo_id not in found]})
+
+
+def _bundle_response(bundle: Dict[str, Any], timeline_limit: int) -> Dict[str, Any]:
+    return {**bundle, "timeline": _timeline_page(bundle["timeline"], timeline_limit)}
 
 
 @router.get("/v1/work-orders/{work_order_id}/parts")
-def get_work_order_parts(work_order_id: str) -> Dict[str, Any]:
+def get_work_order_parts(
+    work_order_id: str,
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+) -> Any:
     with get_tx() as conn:
+        version = projections_repo.fetch_work_order_version(conn, work_order_id)
+        etag = etag_for(version) if version else None
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
         items = projections_repo.fetch_parts(conn, work_order_id)
-    return {"work_order_id": work_order_id, "items": items}
+    return with_etag({"work_order_id": work_order_id, "items": items}, etag)
 
 
 @router.get("/v1/work-orders/{work_order_id}/evidence")
-def get_work_order_evidence(work_order_id: str) -> Dict[str, Any]:
+def get_work_order_evidence(
+    work_order_id: str,
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+) -> Any:
     with get_tx() as conn:
+        version = projections_repo.fetch_work_order_version(conn, work_order_id)
+        etag = etag_for(version) if version else None
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
         items = projections_repo.fetch_evidence(conn, work_order_id)
-    return {"work_order_id": work_order_id, "items": items}
+    return with_etag({"work_order_id": work_order_id, "items": items}, etag)
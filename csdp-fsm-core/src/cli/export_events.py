@@ -0,0 +1,60 @@
+"""Export event_store for downstream consumers (BI, lakes) after a durable cursor.
+
+    python -m src.cli.export_events --after-xid 1234 --after-event-seq 5678 \\
+        --format columnar -o events.ndjson
+
+The cursor to resume from is printed to stderr as JSON when the export finishes.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Optional, Sequence
+
+from src.storage import event_store_repo
+from src.storage.db import get_conn
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli.export_events", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--after-xid", type=int, help="cursor: change_xid of the last exported event")
+    parser.add_argument("--after-event-seq", type=int, help="cursor: event_seq of the last exported event")
+    parser.add_argument("--format", choices=("ndjson", "columnar"), default="ndjson")
+    parser.add_argument("--batch-size", type=int, default=5000, help="server-side fetch / columnar batch size")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many events")
+    parser.add_argument("-o", "--output", default="-", help="output file (default stdout)")
+    args = parser.parse_args(argv)
+
+    if (args.after_xid is None) != (args.after_event_seq is None):
+        parser.error("--after-xid and --after-event-seq go together")
+    after = (args.after_xid, args.after_event_seq) if args.after_xid is not None else None
+    iter_export = event_store_repo.iter_export_batches if args.format == "columnar" else event_store_repo.iter_export_ndjson
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    last: Optional[str] = None
+    try:
+        with get_conn() as conn:
+            for line in iter_export(conn, after, limit=args.limit, batch_size=args.batch_size):
+                out.write(line)
+                out.write("\n")
+                last = line
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(json.dumps({"next_cursor": _cursor_of(last, args.format)}), file=sys.stderr)
+    return 0
+
+
+def _cursor_of(line: Optional[str], format: str) -> Any:
+    if line is None:
+        return None
+    document = json.loads(line)
+    if format == "columnar":
+        document = document["last"]
+    return {"after_xid": document["change_xid"], "after_event_seq": document["event_seq"]}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""Bulk import of historical events into event_store.
+
+    python -m src.cli.import_events legacy-2019.ndjson legacy-2020.ndjson --rejected rejected.ndjson
+
+Each input line is an event envelope (schemas/event-envelope.schema.json). Two extra
+fields are accepted for legacy data: ``created_at_system`` keeps the original append
+time, so rebuilt projections replay events in their original order, and ``created_by``.
+
+Lines without created_at_system or created_at_reported are stamped with the import time
+plus one microsecond per input line, so they keep their file order.
+
+Envelopes are schema-validated in worker processes, de-duplicated on
+(entity_id, client_event_id) / (entity_id, idempotency_key) within each batch, loaded into
+a temp staging table with COPY and moved into event_store in file order with ON CONFLICT
+DO NOTHING, so events that are already stored (or repeated in an earlier batch) are
+skipped. Projections of the imported work orders are then rebuilt from event_store.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import psycopg
+
+from src.domain.replay import rebuild_work_orders
+from src.domain.validator import validate_schema
+from src.storage.db import get_conn
+from src.storage.jsonb import raw
+
+COPY_COLUMNS = (
+    "event_id",
+    "entity_type",
+    "entity_id",
+    "event_type",
+    "payload",
+    "source",
+    "created_at_system",
+    "created_at_reported",
+    "client_event_id",
+    "idempotency_key",
+    "correlation_id",
+    "causation_id",
+    "schema_version",
+    "created_by",
+)
+
+VALIDATION_CHUNK = 2000
+REBUILD_CHUNK = 500
+
+_CREATE_STAGING = """
+    CREATE TEMP TABLE IF NOT EXISTS import_staging (LIKE event_store INCLUDING DEFAULTS)
+    ON COMMIT DELETE ROWS
+"""
+
+_COPY_STAGING = f"COPY import_staging ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+
+# import_staging.event_seq is drawn as rows are copied, so it is the input order; event_store
+# draws its own event_seq, which replay orders by, in that order.
+_MOVE_STAGED = f"""
+    INSERT INTO event_store ({', '.join(COPY_COLUMNS)})
+    SELECT {', '.join(COPY_COLUMNS)} FROM import_staging
+    ORDER BY event_seq
+    ON CONFLICT DO NOTHING
+    RETURNING entity_type, entity_id
+"""
+
+Line = Tuple[str, int, str]
+Rejection = Dict[str, Any]
+
+
+def parse_line(path: str, line_no: int, text: str) -> Tuple[Optional[Dict[str, Any]], Optional[Rejection]]:
+    """One input line -> (row for COPY, None) or (None, rejection).
+
+    created_at_system is None when the line carries no timestamp; run_import stamps it.
+    """
+    try:
+        record = json.loads(text)
+    except ValueError as exc:
+        return None, _rejection(path, line_no, "ERR_INVALID_JSON", {"error": str(exc)})
+    if not isinstance(record, dict):
+        return None, _rejection(path, line_no, "ERR_INVALID_JSON", {"error": "line is not a JSON object"})
+
+    created_at_system = record.pop("created_at_system", None)
+    created_by = record.pop("created_by", None)
+    result = validate_schema(record)
+    if result is not None:
+        return None, _rejection(path, line_no, result.reason_code, result.details)
+
+    row = {column: record.get(column) for column in COPY_COLUMNS}
+    row["event_id"] = record.get("event_id") or str(uuid.uuid4())
+    row["payload"] = raw(record["payload"])
+    row["created_at_system"] = created_at_system or record.get("created_at_reported")
+    row["schema_version"] = record.get("schema_version") or 1
+    row["created_by"] = created_by
+    return row, None
+
+
+def dedupe_keys(row: Dict[str, Any]) -> List[Tuple[str, ...]]:
+    keys = [("event_id", row["event_id"])]
+    if row.get("client_event_id"):
+        keys.append(("client_event_id", row["entity_id"], row["client_event_id"]))
+    if row.get("idempotency_key"):
+        keys.append(("idempotency_key", row["entity_id"], row["idempotency_key"]))
+    return keys
+
+
+def run_import(
+    paths: Sequence[str],
+    batch_size: int = 50000,
+    workers: int = 0,
+    dry_run: bool = False,
+    rejected_path: Optional[str] = None,
+    rebuild: bool = True,
+) -> Dict[str, int]:
+    stats = {
+        "lines": 0,
+        "valid": 0,
+        "rejected": 0,
+        "duplicates": 0,
+        "inserted": 0,
+        "already_stored": 0,
+        "rebuilt_work_orders": 0,
+        "replay_skipped_events": 0,
+    }
+    imported_at = datetime.now(timezone.utc)
+    # Keys of the current batch only; repeats across batches are left to ON CONFLICT DO NOTHING.
+    seen: set = set()
+    work_order_ids: set = set()
+    batch: List[Dict[str, Any]] = []
+
+    with ExitStack() as stack:
+        report = stack.enter_context(open(rejected_path, "w", encoding="utf-8")) if rejected_path else None
+        conn = None if dry_run else stack.enter_context(get_conn())
+        pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers)) if workers > 0 else None
+
+        for row, rejection in _validated(pool, _read_lines(paths), workers):
+            stats["lines"] += 1
+            if rejection is None:
+                keys = dedupe_keys(row)
+                if any(key in seen for key in keys):
+                    rejection = _rejection(row.pop("_path"), row.pop("_line"), "DUPLICATE_IGNORED", None)
+                    stats["duplicates"] += 1
+                else:
+                    seen.update(keys)
+                    stats["valid"] += 1
+            else:
+                stats["rejected"] += 1
+            if rejection is not None:
+                if report is not None:
+                    report.write(json.dumps(rejection, ensure_ascii=False) + "\n")
+                continue
+
+            if row["created_at_system"] is None:
+                row["created_at_system"] = imported_at + timedelta(microseconds=stats["lines"])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                if conn is not None:
+                    _load_batch(conn, batch, stats, work_order_ids)
+                batch = []
+                seen.clear()
+
+        if conn is not None:
+            if batch:
+                _load_batch(conn, batch, stats, work_order_ids)
+            if rebuild:
+                _rebuild(conn, sorted(work_order_ids), stats)
+    return stats
+
+
+def _read_lines(paths: Sequence[str]) -> Iterator[Line]:
+    for path in paths:
+        handle = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+        try:
+            for line_no, text in enumerate(handle, start=1):
+                if text.strip():
+                    yield path, line_no, text
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+
+def _validate_chunk(chunk: List[Line]) -> List[Tuple[Optional[Dict[str, Any]], Optional[Rejection]]]:
+    results = []
+    for path, line_no, text in chunk:
+        row, rejection = parse_line(path, line_no, text)
+        if row is not None:
+            row["_path"], row["_line"] = path, line_no
+        results.append((row, rejection))
+    return results
+
+
+def _validated(
+    pool: Optional[ProcessPoolExecutor], lines: Iterable[Line], workers: int
+) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[Rejection]]]:
+    """Validation results in input order; keeps at most 2 chunks per worker in flight."""
+    chunks = _chunks(lines, VALIDATION_CHUNK)
+    if pool is None:
+        for chunk in chunks:
+            yield from _validate_chunk(chunk)
+        return
+
+    pending: Deque["Future[Any]"] = deque()
+    for chunk in chunks:
+        pending.append(pool.submit(_validate_chunk, chunk))
+        if len(pending) >= workers * 2:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _chunks(lines: Iterable[Line], size: int) -> Iterator[List[Line]]:
+    chunk: List[Line] = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _load_batch(conn: psycopg.Connection, batch: List[Dict[str, Any]], stats: Dict[str, int], work_order_ids: set) -> None:
+    with conn.cursor() as cur:
+        cur.execute(_CREATE_STAGING)
+        with cur.copy(_COPY_STAGING) as copy:
+            for row in batch:
+                copy.write_row([row[column] for column in COPY_COLUMNS])
+        cur.execute(_MOVE_STAGED)
+        inserted = cur.fetchall()
+    conn.commit()
+
+    stats["inserted"] += len(inserted)
+    stats["already_stored"] += len(batch) - len(inserted)
+    work_order_ids.update(str(row["entity_id"]) for row in inserted if row["entity_type"] == "work_order")
+
+
+def _rebuild(conn: psycopg.Connection, work_order_ids: List[str], stats: Dict[str, int]) -> None:
+    for start in range(0, len(work_order_ids), REBUILD_CHUNK):
+        result = rebuild_work_orders(conn, work_order_ids[start : start + REBUILD_CHUNK])
+        conn.commit()
+        stats["rebuilt_work_orders"] += result["work_orders"]
+        stats["replay_skipped_events"] += result["skipped"]
+
+
+def _rejection(path: str, line_no: int, reason_code: str, details: Optional[Dict[str, Any]]) -> Rejection:
+    return {"file": path, "line": line_no, "reason_code": reason_code, "details": details}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli.import_events", description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="+", help="NDJSON files with one event envelope per line ('-' for stdin)")
+    parser.add_argument("--batch-size", type=int, default=50000, help="rows per COPY batch (default 50000)")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="validation processes (0 validates inline)"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="validate and de-duplicate only, write nothing")
+    parser.add_argument("--rejected", metavar="PATH", help="write rejected and duplicate rows to PATH as NDJSON")
+    parser.add_argument("--no-rebuild", action="store_true", help="skip the projection rebuild after loading")
+    args = parser.parse_args(argv)
+
+    stats = run_import(
+        args.paths,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        dry_run=args.dry_run,
+        rejected_path=args.rejected,
+        rebuild=not args.no_rebuild,
+    )
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""Recount the dashboard counters from work_orders_current and repair any drift; run it periodically.
+
+    python -m src.cli.reconcile_counters
+
+Prints the number of counter keys and of keys that had drifted as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Optional, Sequence
+
+from src.domain.counters import reconcile_counters
+from src.storage.db import get_conn
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli.reconcile_counters", description=__doc__.split("\n\n")[0])
+    parser.parse_args(argv)
+
+    with get_conn() as conn:
+        stats = reconcile_counters(conn)
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
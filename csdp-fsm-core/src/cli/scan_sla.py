@@ -0,0 +1,35 @@
+"""Move open work orders between IN_SLA, AT_RISK and BREACHED with SLA events; run it periodically.
+
+    python -m src.cli.scan_sla [--at-risk-minutes 60]
+
+Prints the counts of scanned rows, of state changes and of skipped changes as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Optional, Sequence
+
+from src.domain.sla_scanner import AT_RISK_MINUTES, scan_sla
+from src.storage.db import get_conn
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli.scan_sla", description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--at-risk-minutes",
+        type=int,
+        default=AT_RISK_MINUTES,
+        help="working minutes before the deadline at which an order is AT_RISK",
+    )
+    args = parser.parse_args(argv)
+
+    with get_conn() as conn:
+        stats = scan_sla(conn, at_risk_minutes=args.at_risk_minutes)
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Dashboard counters: work orders per state/priority value, overall, per client and per team.
+
+fold turns every state change into deltas (old keys -1, new keys +1) that state_store adds
+to work_order_counters in the event's transaction, so reads never count projection rows.
+Each key is split over COUNTER_SLOTS rows picked by work order id: concurrent events on
+different work orders rarely wait on the same row lock, and readers sum the slots.
+reconcile_counters recounts from work_orders_current and rewrites the table if it drifted.
+"""
+from __future__ import annotations
+
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import psycopg
+
+COUNTER_DIMENSIONS = ("business_state", "execution_state", "sla_state", "priority")
+COUNTER_SLOTS = 16
+
+CounterKey = Tuple[str, str, str, str]  # (scope, scope_id, dimension, value)
+CounterDelta = Tuple[str, str, str, str, int]
+
+# One pass over the projection; scope_id '' is the "all" scope (same as 017_work_order_counters.sql's backfill).
+_RECOUNT_QUERY = """
+    SELECT sc.scope, sc.scope_id, d.dimension, d.value, count(*) AS count
+    FROM work_orders_current w
+    CROSS JOIN LATERAL (
+      VALUES ('business_state', w.business_state),
+             ('execution_state', w.execution_state),
+             ('sla_state', w.sla_state),
+             ('priority', w.priority)
+    ) AS d(dimension, value)
+    CROSS JOIN LATERAL (
+      VALUES ('all', ''), ('client', w.client_id::text), ('team', w.assigned_team_id::text)
+    ) AS sc(scope, scope_id)
+    WHERE d.value IS NOT NULL AND sc.scope_id IS NOT NULL
+    GROUP BY sc.scope, sc.scope_id, d.dimension, d.value
+"""
+
+_COUNTER_TOTALS_QUERY = """
+    SELECT scope, scope_id, dimension, value, sum(count) AS count
+    FROM work_order_counters
+    GROUP BY scope, scope_id, dimension, value
+"""
+
+
+def counter_keys(state: Any) -> List[CounterKey]:
+    """Counter keys a work order state contributes one to."""
+    if state is None:
+        return []
+    scopes = [("all", ""), ("client", _scope_id(state.client_id))]
+    if state.assigned_team_id:
+        scopes.append(("team", _scope_id(state.assigned_team_id)))
+    keys = []
+    for scope, scope_id in scopes:
+        for dimension in COUNTER_DIMENSIONS:
+            value = getattr(state, dimension)
+            if value is not None:
+                keys.append((scope, scope_id, dimension, str(value)))
+    return keys
+
+
+def counter_deltas(old: Any, new: Any) -> List[CounterDelta]:
+    """Non-zero count changes for a work order going from state old to new (either may be None)."""
+    changes: Counter = Counter(counter_keys(new))
+    changes.subtract(counter_keys(old))
+    return [(*key, delta) for key, delta in sorted(changes.items()) if delta]
+
+
+def counter_slot(work_order_id: Any) -> int:
+    return zlib.crc32(str(work_order_id).encode("utf-8")) % COUNTER_SLOTS
+
+
+def reconcile_counters(conn: psycopg.Connection) -> Dict[str, int]:
+    """Recount from work_orders_current; rewrite work_order_counters if any key drifted.
+
+    The table is locked against writers for the duration, so events applied concurrently
+    either land before the recount or add their deltas after the rewrite. Reads go on.
+    """
+    with conn.cursor() as cur:
+        cur.execute("LOCK TABLE work_order_counters IN EXCLUSIVE MODE")
+        cur.execute(_RECOUNT_QUERY)
+        expected = {_key(row): row["count"] for row in cur.fetchall()}
+        cur.execute(_COUNTER_TOTALS_QUERY)
+        actual = {_key(row): row["count"] for row in cur.fetchall() if row["count"]}
+        drifted = sum(1 for key in expected.keys() | actual.keys() if expected.get(key, 0) != actual.get(key, 0))
+        if drifted:
+            cur.execute("DELETE FROM work_order_counters")
+            cur.executemany(
+                "INSERT INTO work_order_counters (scope, scope_id, dimension, value, slot, count) VALUES (%s, %s, %s, %s, 0, %s)",
+                [(*key, count) for key, count in sorted(expected.items())],
+            )
+    return {"keys": len(expected), "drifted": drifted}
+
+
+def _key(row: Dict[str, Any]) -> CounterKey:
+    return (row["scope"], row["scope_id"], row["dimension"], row["value"])
+
+
+def _scope_id(value: Optional[Any]) -> str:
+    # Same text as Postgres' uuid::text, whatever form the payload used.
+    try:
+        return str(UUID(str(value)))
+    except ValueError:
+        return str(value)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import zlib
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+Handler = Callable[[Dict[str, Any], Any], Dict[str, Any]]
+
+
+class QueueFull(Exception):
+    def __init__(self, shard: int, retry_after: int) -> None:
+        super().__init__(f"ingest shard {shard} is full")
+        self.shard = shard
+        self.retry_after = retry_after
+
+
+class IngestDispatcher:
+    """Routes envelopes to one of N single-worker queues by hash(entity_id).
+
+    Events of one work order are handled serially and in arrival order by the same
+    worker thread, so they never contend for the same work_orders_current row; different
+    work orders spread over the shards and run in parallel. Queues are bounded: when a
+    shard is full, submit raises QueueFull instead of buffering without limit.
+
+    This orders events within one process only. Across processes the compare-and-set
+    in state_store keeps concurrent writers correct (see ingest.submit_event).
+    """
+
+    def __init__(self, handler: Handler, shards: int, queue_size: int, retry_after: int = 1) -> None:
+        self.handler = handler
+        self.retry_after = retry_after
+        self._queues: List["queue.Queue[Any]"] = [queue.Queue(maxsize=queue_size) for _ in range(shards)]
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def shard_for(self, entity_id: Any) -> int:
+        return zlib.crc32(str(entity_id).encode("utf-8")) % len(self._queues)
+
+    def submit(self, envelope: Dict[str, Any], actor: Any) -> "Future[Dict[str, Any]]":
+        self._ensure_started()
+        shard = self.shard_for(envelope.get("entity_id"))
+        future: "Future[Dict[str, Any]]" = Future()
+        try:
+            self._queues[shard].put_nowait((envelope, actor, future))
+        except queue.Full:
+            raise QueueFull(shard, self.retry_after)
+        return future
+
+    def depths(self) -> List[int]:
+        return [shard_queue.qsize() for shard_queue in self._queues]
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for shard_queue in self._queues:
+            shard_queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for index, shard_queue in enumerate(self._queues):
+                thread = threading.Thread(
+                    target=self._run, args=(shard_queue,), name=f"ingest-shard-{index}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self, shard_queue: "queue.Queue[Any]") -> None:
+        while True:
+            item = shard_queue.get()
+            if item is None:
+                return
+            envelope, actor, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self.handler(envelope, actor))
+            except BaseException as exc:  # surfaced to the awaiting request
+                future.set_exception(exc)
+
+
+_dispatcher: Optional[IngestDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> Optional[IngestDispatcher]:
+    """Process-wide dispatcher, created on first use; None when INGEST_SHARDS=0 (apply inline)."""
+    global _dispatcher
+    shards = int(os.environ.get("INGEST_SHARDS", "8"))
+    if shards <= 0:
+        return None
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                from src.domain.ingest import submit_event_tx
+
+                _dispatcher = IngestDispatcher(
+                    submit_event_tx,
+                    shards=shards,
+                    queue_size=int(os.environ.get("INGEST_QUEUE_SIZE", "1000")),
+                )
+    return _dispatcher
@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from src.domain import fsm
+from src.domain.counters import counter_deltas
+from src.domain.sla_calendar import WALL_CLOCK
+
+# Side effects are plain (kind, work_order_id, data) tuples; state_store.persist_effects
+# turns them into SQL. fold itself never touches the database. UPDATE_WORK_ORDER carries
+# (version the change was folded from, changed columns) so persistence can compare-and-set.
+INSERT_WORK_ORDER = "insert_work_order"
+UPDATE_WORK_ORDER = "update_work_order"
+SLA_DEADLINES = "sla_deadlines"
+SLA_BREACHED = "sla_breached"
+SLA_STATE = "sla_state"
+SLA_DUE = "sla_due"
+COUNTERS = "counters"
+PARTS = "parts"
+EVIDENCE = "evidence"
+TIMELINE = "timeline"
+ENGINEER_BOARD = "engineer_board"
+ENGINEER_POSITION = "engineer_position"
+ENGINEER_ASSIGNMENT = "engineer_assignment"
+ENGINEER_HANDOVER = "engineer_handover"
+
+Effect = Tuple[str, Any, Any]
+
+# Columns of work_orders_current mirrored by WorkOrderState (version is maintained by persistence).
+PROJECTION_COLUMNS = (
+    "client_id",
+    "asset_id",
+    "priority",
+    "work_type",
+    "business_state",
+    "execution_state",
+    "sla_state",
+    "assigned_engineer_id",
+    "assigned_team_id",
+    "scheduled_start",
+    "scheduled_end",
+    "actual_start_reported",
+    "actual_start_effective",
+    "actual_end_reported",
+    "actual_end_effective",
+    "downtime_minutes",
+    "net_downtime_minutes",
+    "waiting_seconds",
+    "work_paused_seconds",
+    "paused_at",
+    "pause_reason",
+    "last_event_id",
+)
+
+TERMINAL_BUSINESS_STATES = frozenset({"COMPLETED", "CLOSED", "CANCELLED"})
+
+_PART_QTY_FIELDS = {
+    "PART.RESERVED": "reserved_qty",
+    "PART.INSTALLED": "installed_qty",
+    "PART.CONSUMED": "consumed_qty",
+}
+
+_EVIDENCE_TYPES = {
+    "EVIDENCE.PHOTO_ADDED": "PHOTO",
+    "EVIDENCE.DOCUMENT_ADDED": "DOCUMENT",
+    "EVIDENCE.SIGNATURE_CAPTURED": "SIGNATURE",
+}
+
+
+class TransitionRejected(Exception):
+    def __init__(self, reason_code: str, details: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(reason_code)
+        self.reason_code = reason_code
+        self.details = details
+
+
+class WorkOrderState:
+    """Everything the command path needs to know about one work order.
+
+    Mirrors work_orders_current plus the sla_view deadlines/state used by the breach checks.
+    """
+
+    __slots__ = (
+        "work_order_id",
+        *PROJECTION_COLUMNS,
+        "version",
+        "reaction_deadline_at",
+        "restore_deadline_at",
+        "sla_calendar_id",
+        "sla_view_state",
+    )
+
+    def __init__(self, **values: Any) -> None:
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    @classmethod
+    def from_row(cls, row: Optional[Mapping[str, Any]]) -> Optional["WorkOrderState"]:
+        if row is None:
+            return None
+        return cls(**row)
+
+    def copy(self) -> "WorkOrderState":
+        clone = object.__new__(WorkOrderState)
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def fold(state: Optional[WorkOrderState], event: Mapping[str, Any]) -> Tuple[WorkOrderState, List[Effect]]:
+    """Apply one event to the state: returns the next state and the side effects to persist.
+
+    Raises TransitionRejected when the FSM does not allow the event in the current state.
+    """
+    event_type = event["event_type"]
+    payload = event["payload"]
+    event_id = event.get("event_id")
+    work_order_id = event["entity_id"]
+    effective_time = _as_datetime(event.get("effective_time"))
+    effects: List[Effect] = []
+
+    if event_type == "WORK_ORDER.CREATED":
+        if state is not None:
+            raise TransitionRejected("ERR_INVALID_TRANSITION")
+        new = WorkOrderState(
+            work_order_id=work_order_id,
+            client_id=payload["client_id"],
+            asset_id=payload["asset_id"],
+            priority=payload["priority"],
+            work_type=payload["type"],
+            business_state="NEW",
+            execution_state="NOT_STARTED",
+            sla_state="IN_SLA",
+            last_event_id=event_id,
+            version=1,
+        )
+        effects.append((INSERT_WORK_ORDER, work_order_id, new))
+        _ensure_sla_deadlines(new, event, effects)
+    else:
+        if state is None:
+            raise TransitionRejected("ERR_INVALID_TRANSITION")
+        transition = fsm.lookup(state.business_state, state.execution_state, state.sla_state, event_type)
+        if transition.decision != "ACCEPTED":
+            raise TransitionRejected(transition.reason_code, transition.details)
+
+        new = state.copy()
+        new.business_state, new.execution_state, new.sla_state = transition.next_states(payload)
+        new.last_event_id = event_id
+        new.version = (state.version or 0) + 1
+
+        if event_type == "WORK_ORDER.ASSIGNED":
+            new.assigned_engineer_id = payload.get("engineer_id")
+            new.assigned_team_id = payload.get("team_id")
+            new.scheduled_start = payload.get("scheduled_start")
+            new.scheduled_end = payload.get("scheduled_end")
+
+        elif event_type == "WORK.STARTED":
+            new.actual_start_reported = payload.get("actual_start_reported") or event.get("created_at_reported")
+            new.actual_start_effective = effective_time
+
+        elif event_type == "WORK.PAUSED":
+            if state.paused_at is None:
+                new.paused_at = effective_time
+                new.pause_reason = payload.get("reason_code")
+
+        elif event_type == "WORK.RESUMED":
+            _close_pause(new, effective_time)
+
+        elif event_type == "WORK.COMPLETED":
+            new.actual_end_reported = payload.get("actual_end_reported") or event.get("created_at_reported")
+            new.actual_end_effective = effective_time
+            _close_pause(new, effective_time)
+            start = _as_datetime(state.actual_start_effective)
+            if start and effective_time:
+                gross = (effective_time - start).total_seconds()
+                new.downtime_minutes = int(gross // 60)
+                new.net_downtime_minutes = int(max(gross - (new.work_paused_seconds or 0), 0) // 60)
+
+        effects.append((UPDATE_WORK_ORDER, work_order_id, (state.version, _changes(state, new))))
+
+        if event_type == "WORK_ORDER.ASSIGNED":
+            _ensure_sla_deadlines(new, event, effects)
+        elif event_type == "WORK.STARTED":
+            _check_deadline(new, new.reaction_deadline_at, effective_time, effects)
+        elif event_type == "WORK.COMPLETED":
+            _check_deadline(new, new.restore_deadline_at, effective_time, effects)
+        elif event_type.startswith("SLA."):
+            new.sla_view_state = new.sla_state
+            effects.append((SLA_STATE, work_order_id, new.sla_state))
+
+        if event_type == "WORK_ORDER.ASSIGNED":
+            slot = assignment_slot(payload) if new.assigned_engineer_id else None
+            effects.append((ENGINEER_ASSIGNMENT, work_order_id, (new.assigned_engineer_id, slot)))
+        elif event_type == "WORK_ORDER.CANCELLED" and state.assigned_engineer_id:
+            effects.append((ENGINEER_ASSIGNMENT, work_order_id, (None, None)))
+        if str(state.assigned_engineer_id or "") != str(new.assigned_engineer_id or ""):
+            effects.append((ENGINEER_HANDOVER, work_order_id, (state.assigned_engineer_id, new.assigned_engineer_id)))
+
+        if event_type == "WORK.ARRIVED_ON_SITE" and new.assigned_engineer_id and payload.get("gps"):
+            gps = payload["gps"]
+            effects.append(
+                (ENGINEER_POSITION, work_order_id, (new.assigned_engineer_id, gps["lat"], gps["lon"], effective_time))
+            )
+
+        if event_type in _PART_QTY_FIELDS:
+            effects.append((PARTS, work_order_id, (_PART_QTY_FIELDS[event_type], payload["part_id"], payload["quantity"])))
+
+        elif event_type in _EVIDENCE_TYPES:
+            meta = payload.copy()
+            url = meta.pop("url", None) or meta.pop("signature_url", None)
+            effects.append((EVIDENCE, work_order_id, (_EVIDENCE_TYPES[event_type], url, meta, event.get("created_by"))))
+
+    due_at = pending_deadline(new)
+    if state is None or due_at != pending_deadline(state):
+        effects.append((SLA_DUE, work_order_id, due_at))
+    deltas = counter_deltas(state, new)
+    if deltas:
+        effects.append((COUNTERS, work_order_id, deltas))
+
+    effects.append(
+        (
+            TIMELINE,
+            work_order_id,
+            # payload_json: the payload as already serialized for event_store, reused as is
+            (
+                event_id,
+                event_type,
+                event.get("created_at_system"),
+                event.get("created_by"),
+                event.get("payload_json", payload),
+            ),
+        )
+    )
+    if new.assigned_engineer_id and _board_changed(state, new):
+        effects.append(
+            (
+                ENGINEER_BOARD,
+                work_order_id,
+                (new.assigned_engineer_id, engineer_status(new.execution_state), new.assigned_team_id),
+            )
+        )
+    return new, effects
+
+
+def assignment_slot(payload: Mapping[str, Any]) -> Optional[Tuple[datetime, datetime]]:
+    """[start, end) an assignment blocks in the engineer's schedule, None if it is not scheduled.
+
+    A job expected to run past scheduled_end keeps the engineer busy until it is done.
+    """
+    start = _as_datetime(payload.get("scheduled_start"))
+    end = _as_datetime(payload.get("scheduled_end"))
+    if start is None or end is None:
+        return None
+    if payload.get("expected_duration_minutes"):
+        end = max(end, start + timedelta(minutes=payload["expected_duration_minutes"]))
+    return start, end
+
+
+def pause_seconds(since: datetime, until: datetime, work_start: Optional[datetime]) -> Tuple[int, int]:
+    """(whole pause, part of it after work started) in seconds for a pause [since, until)."""
+    total = max(int((until - since).total_seconds()), 0)
+    if work_start is None:
+        return total, 0
+    return total, max(int((until - max(since, work_start)).total_seconds()), 0)
+
+
+def pending_deadline(state: WorkOrderState) -> Optional[datetime]:
+    """The deadline an open work order is racing (sla_view.due_at): reaction until work started, then restore."""
+    if state.business_state in TERMINAL_BUSINESS_STATES:
+        return None
+    if state.actual_start_effective is None:
+        return _as_datetime(state.reaction_deadline_at)
+    return _as_datetime(state.restore_deadline_at)
+
+
+def engineer_status(execution_state: str) -> str:
+    if execution_state == "TRAVEL":
+        return "TRAVEL"
+    if execution_state in {"WORK", "WAITING_PARTS", "WAITING_CLIENT"}:
+        return "WORK"
+    return "AVAILABLE"
+
+
+def _board_changed(old: Optional[WorkOrderState], new: WorkOrderState) -> bool:
+    # Board rows only hold (status, current work order, team); most events change none of them.
+    if old is None or old.assigned_engineer_id != new.assigned_engineer_id:
+        return True
+    return (
+        engineer_status(old.execution_state) != engineer_status(new.execution_state)
+        or old.assigned_team_id != new.assigned_team_id
+    )
+
+
+def effective_time_of(event: Mapping[str, Any]) -> Optional[datetime]:
+    """effective_time of a stored event, as the time policy would have computed it (for replays)."""
+    payload = event["payload"]
+    reported = event.get("created_at_reported")
+    if event["event_type"] == "WORK.STARTED":
+        reported = payload.get("actual_start_reported") or reported
+    elif event["event_type"] == "WORK.COMPLETED":
+        reported = payload.get("actual_end_reported") or reported
+    return _as_datetime(reported) or _as_datetime(event.get("created_at_system"))
+
+
+def sla_durations(priority: str) -> Tuple[timedelta, timedelta]:
+    mapping = {
+        "CRITICAL": (timedelta(hours=2), timedelta(hours=8)),
+        "HIGH": (timedelta(hours=4), timedelta(hours=16)),
+        "MEDIUM": (timedelta(hours=8), timedelta(hours=48)),
+        "LOW": (timedelta(hours=8), timedelta(hours=72)),
+    }
+    return mapping.get(priority, (timedelta(hours=8), timedelta(hours=72)))
+
+
+def _changes(old: WorkOrderState, new: WorkOrderState) -> Dict[str, Any]:
+    changes = {"last_event_id": new.last_event_id}
+    for column in PROJECTION_COLUMNS:
+        value = getattr(new, column)
+        if value != getattr(old, column):
+            changes[column] = value
+    return changes
+
+
+def _close_pause(state: WorkOrderState, until: Optional[datetime]) -> None:
+    # Constant work per event: the closed pause is added to running totals, so completion
+    # never has to look back at the timeline.
+    since = _as_datetime(state.paused_at)
+    if since is None or until is None:
+        return
+    total, in_work = pause_seconds(since, until, _as_datetime(state.actual_start_effective))
+    reason = state.pause_reason or "OTHER"
+    waiting = dict(state.waiting_seconds or {})
+    waiting[reason] = waiting.get(reason, 0) + total
+    state.waiting_seconds = waiting
+    state.work_paused_seconds = (state.work_paused_seconds or 0) + in_work
+    state.paused_at = None
+    state.pause_reason = None
+
+
+def _ensure_sla_deadlines(state: WorkOrderState, event: Mapping[str, Any], effects: List[Effect]) -> None:
+    if state.reaction_deadline_at is not None and state.restore_deadline_at is not None:
+        return
+    # event["sla_policy"] (sla_policy.SlaPolicy): contract minutes counted in its working-time
+    # calendar, attached by apply_event/replay. Without one: priority defaults, wall clock.
+    policy = event.get("sla_policy")
+    reaction_delta, restore_delta = sla_durations(state.priority)
+    reaction_minutes = reaction_delta.total_seconds() / 60
+    restore_minutes = restore_delta.total_seconds() / 60
+    calendar = WALL_CLOCK
+    if policy is not None:
+        reaction_minutes = policy.reaction_minutes
+        restore_minutes = policy.restore_minutes if policy.restore_minutes is not None else restore_minutes
+        calendar, state.sla_calendar_id = policy.calendar, policy.calendar_id
+
+    # Base SLA deadlines on scheduled_start if provided, otherwise created_at_system.
+    base = _as_datetime(state.scheduled_start) or _as_datetime(event.get("created_at_system"))
+    if base is None:
+        base = datetime.now(timezone.utc)
+
+    if state.reaction_deadline_at is None:
+        state.reaction_deadline_at = calendar.add_minutes(base, reaction_minutes)
+    if state.restore_deadline_at is None:
+        state.restore_deadline_at = calendar.add_minutes(base, restore_minutes)
+    if state.sla_view_state is None:
+        state.sla_view_state = "IN_SLA"
+    effects.append(
+        (SLA_DEADLINES, state.work_order_id, (state.reaction_deadline_at, state.restore_deadline_at, state.sla_calendar_id))
+    )
+
+
+def _check_deadline(
+    state: WorkOrderState, deadline: Any, effective_time: Optional[datetime], effects: List[Effect]
+) -> None:
+    deadline = _as_datetime(deadline)
+    if effective_time is None or deadline is None:
+        return
+    if effective_time > deadline:
+        state.sla_view_state = "BREACHED"
+        effects.append((SLA_BREACHED, state.work_order_id, None))
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
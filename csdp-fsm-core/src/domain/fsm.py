@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import product
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+BUSINESS_STATES = ("NEW", "PLANNED", "IN_PROGRESS", "ON_HOLD", "COMPLETED", "CLOSED", "CANCELLED")
+EXECUTION_STATES = ("NOT_STARTED", "TRAVEL", "WORK", "WAITING_PARTS", "WAITING_CLIENT", "FINISHED")
+SLA_STATES = ("IN_SLA", "AT_RISK", "BREACHED", "ACCEPTED_BREACH")
+
+BUSINESS_TRANSITIONS = {
+    "NEW": {
+        "WORK_ORDER.ASSIGNED": "PLANNED",
+        "WORK_ORDER.CANCELLED": "CANCELLED",
+    },
+    "PLANNED": {
+        "WORK.STARTED": "IN_PROGRESS",
+        "WORK.PAUSED": "ON_HOLD",
+        "WORK_ORDER.CANCELLED": "CANCELLED",
+    },
+    "IN_PROGRESS": {
+        "WORK.PAUSED": "ON_HOLD",
+        "WORK.COMPLETED": "COMPLETED",
+    },
+    "ON_HOLD": {
+        "WORK.RESUMED": "IN_PROGRESS",
+    },
+    "COMPLETED": {
+        "WORK_ORDER.CLOSED": "CLOSED",
+    },
+}
+
+# Execution FSM валидация здесь делается через "разрешенные события из состояния".
+# Конкретный next-state (WAITING_PARTS/WAITING_CLIENT и т.п.) зависит от payload.reason_code,
+# см. PAUSE_EXECUTION_STATES.
+EXECUTION_ALLOWED = {
+    "NOT_STARTED": {"WORK.DISPATCHED", "WORK.STARTED"},
+    "TRAVEL": {"WORK.ARRIVED_ON_SITE", "WORK.STARTED"},
+    "WORK": {"WORK.PAUSED", "WORK.COMPLETED"},
+    "WAITING_PARTS": {"WORK.RESUMED"},
+    "WAITING_CLIENT": {"WORK.RESUMED"},
+    "FINISHED": set(),
+}
+
+SLA_TRANSITIONS = {
+    "IN_SLA": {"SLA.AT_RISK": "AT_RISK", "SLA.BREACHED": "BREACHED"},
+    "AT_RISK": {"SLA.RECOVERED": "IN_SLA", "SLA.BREACHED": "BREACHED"},
+    "BREACHED": {"SLA.BREACH_ACCEPTED": "ACCEPTED_BREACH"},
+}
+
+# Инварианты согласованности business_state и execution_state.
+COMPOSITE_INVARIANTS = {
+    "NEW": {"NOT_STARTED"},
+    "PLANNED": {"NOT_STARTED", "TRAVEL"},
+    "IN_PROGRESS": {"TRAVEL", "WORK", "WAITING_PARTS", "WAITING_CLIENT"},
+    "ON_HOLD": {"WORK", "WAITING_PARTS", "WAITING_CLIENT"},
+    "COMPLETED": {"FINISHED"},
+    "CLOSED": {"FINISHED", "NOT_STARTED"},
+    "CANCELLED": {"FINISHED", "NOT_STARTED"},
+}
+
+PAUSE_EXECUTION_STATES = {"PARTS": "WAITING_PARTS", "CLIENT": "WAITING_CLIENT"}
+
+# Parts and evidence do not move any FSM; they are allowed while the work order is open.
+STATE_NEUTRAL_EVENTS = (
+    "PART.RESERVED",
+    "PART.INSTALLED",
+    "PART.CONSUMED",
+    "EVIDENCE.PHOTO_ADDED",
+    "EVIDENCE.DOCUMENT_ADDED",
+    "EVIDENCE.SIGNATURE_CAPTURED",
+)
+
+EVENT_TYPES = (
+    "WORK_ORDER.ASSIGNED",
+    "WORK_ORDER.CANCELLED",
+    "WORK_ORDER.CLOSED",
+    "WORK.DISPATCHED",
+    "WORK.ARRIVED_ON_SITE",
+    "WORK.STARTED",
+    "WORK.PAUSED",
+    "WORK.RESUMED",
+    "WORK.COMPLETED",
+    "SLA.AT_RISK",
+    "SLA.RECOVERED",
+    "SLA.BREACHED",
+    "SLA.BREACH_ACCEPTED",
+) + STATE_NEUTRAL_EVENTS
+
+
+@dataclass(frozen=True)
+class Transition:
+    decision: str
+    reason_code: str
+    business_state: Optional[str]
+    execution_state: Optional[str]
+    sla_state: Optional[str]
+    # WORK.PAUSED from WORK: execution target depends on payload.reason_code (default: unchanged).
+    execution_by_reason: Optional[Mapping[str, str]] = None
+    details: Optional[Dict[str, Any]] = None
+
+    def next_states(self, payload: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        execution_state = self.execution_state
+        if self.execution_by_reason is not None:
+            execution_state = self.execution_by_reason.get(payload.get("reason_code"), execution_state)
+        return self.business_state, execution_state, self.sla_state
+
+
+def lookup(business_state: str, execution_state: str, sla_state: str, event_type: str) -> Transition:
+    """Decision and target states for event_type applied in the given composite state.
+
+    One probe into a table compiled at import time; states or event types outside the
+    FSM fall back to REJECTED/ERR_INVALID_TRANSITION with the states left unchanged.
+    """
+    try:
+        index = (
+            (_BUSINESS_INDEX[business_state] * len(EXECUTION_STATES) + _EXECUTION_INDEX[execution_state])
+            * len(SLA_STATES)
+            + _SLA_INDEX[sla_state]
+        ) * len(EVENT_TYPES) + _EVENT_INDEX[event_type]
+    except KeyError:
+        return Transition("REJECTED", "ERR_INVALID_TRANSITION", business_state, execution_state, sla_state)
+    return _TABLE[index]
+
+
+def _decide(business_state: str, execution_state: str, sla_state: str, event_type: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    if execution_state not in COMPOSITE_INVARIANTS[business_state]:
+        return "ERR_STATE_MISMATCH", {"business_state": business_state, "execution_state": execution_state}
+
+    if event_type.startswith("SLA."):
+        if event_type in SLA_TRANSITIONS.get(sla_state, {}):
+            return "OK", None
+        return "ERR_INVALID_TRANSITION", None
+
+    if event_type in STATE_NEUTRAL_EVENTS:
+        if business_state in {"CLOSED", "CANCELLED"}:
+            return "ERR_INVALID_TRANSITION", None
+        return "OK", None
+
+    if event_type in BUSINESS_TRANSITIONS.get(business_state, {}):
+        return "OK", None
+
+    # Execution-события допустимы из execution_state только при согласованном business_state.
+    if event_type in EXECUTION_ALLOWED.get(execution_state, set()):
+        required_business = {
+            "WORK.DISPATCHED": {"PLANNED", "IN_PROGRESS"},
+            "WORK.ARRIVED_ON_SITE": {"PLANNED", "IN_PROGRESS"},
+            "WORK.STARTED": {"PLANNED"},
+            "WORK.PAUSED": {"PLANNED", "IN_PROGRESS"},
+            "WORK.RESUMED": {"ON_HOLD"},
+            "WORK.COMPLETED": {"IN_PROGRESS"},
+        }
+        if business_state in required_business.get(event_type, {business_state}):
+            return "OK", None
+
+    return "ERR_INVALID_TRANSITION", None
+
+
+def _targets(business_state: str, execution_state: str, sla_state: str, event_type: str) -> Transition:
+    business_to, execution_to, sla_to = business_state, execution_state, sla_state
+    execution_by_reason = None
+    business_to = BUSINESS_TRANSITIONS.get(business_state, {}).get(event_type, business_to)
+    sla_to = SLA_TRANSITIONS.get(sla_state, {}).get(event_type, sla_to)
+
+    if event_type == "WORK.DISPATCHED" and execution_state == "NOT_STARTED":
+        execution_to = "TRAVEL"
+    elif event_type == "WORK.ARRIVED_ON_SITE" and execution_state == "TRAVEL":
+        execution_to = "WORK"
+    elif event_type == "WORK.STARTED" and execution_state in {"NOT_STARTED", "TRAVEL"}:
+        execution_to = "WORK"
+    elif event_type == "WORK.PAUSED" and execution_state == "WORK":
+        execution_by_reason = PAUSE_EXECUTION_STATES
+    elif event_type == "WORK.RESUMED":
+        execution_to = "WORK"
+    elif event_type == "WORK.COMPLETED":
+        execution_to = "FINISHED"
+
+    return Transition("ACCEPTED", "OK", business_to, execution_to, sla_to, execution_by_reason)
+
+
+def _compile() -> Tuple[Transition, ...]:
+    table = []
+    for business_state, execution_state, sla_state, event_type in product(
+        BUSINESS_STATES, EXECUTION_STATES, SLA_STATES, EVENT_TYPES
+    ):
+        reason_code, details = _decide(business_state, execution_state, sla_state, event_type)
+        if reason_code == "OK":
+            table.append(_targets(business_state, execution_state, sla_state, event_type))
+        else:
+            table.append(
+                Transition("REJECTED", reason_code, business_state, execution_state, sla_state, details=details)
+            )
+    return tuple(table)
+
+
+_BUSINESS_INDEX = {state: index for index, state in enumerate(BUSINESS_STATES)}
+_EXECUTION_INDEX = {state: index for index, state in enumerate(EXECUTION_STATES)}
+_SLA_INDEX = {state: index for index, state in enumerate(SLA_STATES)}
+_EVENT_INDEX = {event_type: index for index, event_type in enumerate(EVENT_TYPES)}
+_TABLE = _compile()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import psycopg
+
+from src.domain.apply_event import apply_event
+from src.domain.state_store import ConcurrencyConflict, load_state, state_cache
+from src.domain.validator import Actor, validate_event
+from src.storage import event_store_repo
+from src.storage.db import get_tx
+from src.storage.jsonb import raw
+
+# Conflicts only happen between writers of the same work order, so a couple of retries is plenty.
+MAX_CONFLICT_RETRIES = 3
+
+
+def submit_event(conn: psycopg.Connection, envelope: Dict[str, Any], actor: Actor) -> Dict[str, Any]:
+    """Validate, append and project one event with optimistic concurrency on the work order.
+
+    Append and projection run under a savepoint and the projection update is a
+    compare-and-set on work_orders_current.version. If another writer got there first the
+    savepoint is rolled back: events that pinned expected_version are rejected with
+    ERR_VERSION_CONFLICT, the rest are re-validated against the fresh state and retried.
+    """
+    attempt = 0
+    while True:
+        validation = validate_event(conn, envelope, actor)
+        if validation.decision != "ACCEPTED":
+            return {
+                "decision": validation.decision,
+                "reason_code": validation.reason_code,
+                "details": validation.details,
+            }
+
+        normalized_event = validation.normalized_event or dict(envelope)
+        normalized_event["created_by"] = actor.actor_id
+        normalized_event["payload_json"] = raw(normalized_event["payload"])
+        try:
+            with conn.transaction():
+                event_id, duplicate = event_store_repo.insert_event(conn, normalized_event)
+                if duplicate:
+                    return {
+                        "decision": "ACCEPTED",
+                        "reason_code": "DUPLICATE_IGNORED",
+                        "event_id": event_id,
+                    }
+
+                stored = event_store_repo.fetch_event_by_id(conn, event_id)
+                normalized_event["event_id"] = event_id
+                normalized_event["created_at_system"] = stored["created_at_system"]
+                apply_event(conn, normalized_event, validation.state)
+        except ConcurrencyConflict as exc:
+            state_cache.invalidate(envelope["entity_id"])
+            if envelope.get("expected_version") is None and attempt < MAX_CONFLICT_RETRIES:
+                attempt += 1
+                continue
+            current = load_state(conn, envelope["entity_id"])
+            return {
+                "decision": "REJECTED",
+                "reason_code": "ERR_VERSION_CONFLICT",
+                "details": {
+                    "expected_version": exc.expected_version,
+                    "current_version": current.version if current else 0,
+                },
+            }
+        return {
+            "decision": "ACCEPTED",
+            "reason_code": "OK",
+            "event_id": event_id,
+        }
+
+
+def submit_event_tx(envelope: Dict[str, Any], actor: Actor) -> Dict[str, Any]:
+    """submit_event in its own transaction; the unit of work run by the ingest dispatcher."""
+    with get_tx() as conn:
+        return submit_event(conn, envelope, actor)
+
@@ -1,41 +1,282 @@
 from __future__ import annotations
 
-from datetime import date, datetime
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import psycopg
 
+from src.domain import kpi_columnar
+from src.domain.fold import pause_seconds
+from src.domain.sketch import DDSketch, merge_bytes
 
-def rebuild_kpi_daily(conn: psycopg.Connection, date_from: date, date_to: date) -> None:
-    _clear_range(conn, date_from, date_to)
-    events = _fetch_events(conn, date_from, date_to)
-    work_orders = _build_work_order_metrics(events)
-    _insert_kpi_rows(conn, work_orders)
+# Additive columns shared by kpi_daily, kpi_weekly and kpi_monthly: any set of buckets is
+# combined by summing them, and averages are derived from the totals (see combine()).
+SUM_COLUMNS = (
+    "reaction_sum_minutes",
+    "reaction_count",
+    "mttr_sum_minutes",
+    "mttr_count",
+    "sla_compliant_total",
+    "sla_total",
+    "work_orders_total",
+)
 
+KPI_COLUMNS = (
+    "day",
+    "client_id",
+    "reaction_avg_minutes",
+    "mttr_avg_minutes",
+    "sla_compliance_percent",
+    "work_orders_total",
+    "reaction_sum_minutes",
+    "reaction_count",
+    "mttr_sum_minutes",
+    "mttr_count",
+    "sla_compliant_total",
+    "sla_total",
+    "reaction_sketch",
+    "mttr_sketch",
+)
 
-def _clear_range(conn: psycopg.Connection, date_from: date, date_to: date) -> None:
+# DDSketch columns (src/domain/sketch.py): merged, not summed.
+SKETCH_COLUMNS = ("reaction_sketch", "mttr_sketch")
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+# kpi_work_order_facts: one row per work order, dimensions first.
+FACT_COLUMNS = (
+    "work_order_id",
+    "day",
+    "client_id",
+    "priority",
+    "work_type",
+    "engineer_id",
+    "asset_id",
+    "reaction_minutes",
+    "mttr_minutes",
+    "paused_minutes",
+    "visits",
+    "first_time_fix",
+    "parts_quantity",
+    "sla_state",
+)
+
+# group_by name -> kpi_work_order_facts column
+FACT_DIMENSIONS = {
+    "day": "day",
+    "client": "client_id",
+    "priority": "priority",
+    "work_type": "work_type",
+    "engineer": "engineer_id",
+    "asset": "asset_id",
+}
+
+# Aggregates over any slice of kpi_work_order_facts.
+FACT_AGGREGATES = """
+    count(*) AS work_orders_total,
+    avg(reaction_minutes) AS reaction_time_avg_minutes,
+    avg(mttr_minutes) AS mttr_avg_minutes,
+    avg(mttr_minutes - paused_minutes) AS net_mttr_avg_minutes,
+    (100.0 * count(*) FILTER (WHERE first_time_fix) / nullif(count(first_time_fix), 0))::float8 AS first_time_fix_percent,
+    (100.0 * sum(paused_minutes) FILTER (WHERE mttr_minutes IS NOT NULL) / nullif(sum(mttr_minutes), 0))::float8 AS pause_share_percent,
+    (sum(parts_quantity) / count(*))::float8 AS parts_per_order
+"""
+
+# grain -> (table, bucket column)
+ROLLUP_TABLES = {
+    "month": ("kpi_monthly", "bucket_start"),
+    "week": ("kpi_weekly", "bucket_start"),
+    "day": ("kpi_daily", "day"),
+}
+
+Bucket = Tuple[str, date, date]
+
+
+def rebuild_kpi_daily(
+    conn: psycopg.Connection, date_from: date, date_to: date, engine: str = "auto", facts: bool = False
+) -> None:
+    """Recompute kpi_daily for [date_from, date_to] from event_store, then its rollups.
+
+    engine: "columnar" (NumPy, see kpi_columnar), "scalar", or "auto" for columnar when
+    NumPy is installed. Both produce identical rows.
+    facts: also rebuild kpi_work_order_facts for the range. The scalar path takes them from
+    the pass it already makes; on the columnar path this adds the per-event Python pass of
+    rebuild_kpi_facts, which costs more than the columnar rebuild itself.
+    """
+    _clear_range(conn, "kpi_daily", date_from, date_to)
+    if engine == "auto":
+        engine = "columnar" if kpi_columnar.available() else "scalar"
+    if engine == "columnar":
+        events, sla = kpi_columnar.fetch_columns(conn, date_from, date_to)
+        write_kpi_rows(conn, kpi_columnar.kpi_rows(events, sla))
+        if facts:
+            rebuild_kpi_facts(conn, date_from, date_to)
+    else:
+        work_orders, sla_by_id = _work_order_metrics(conn, date_from, date_to)
+        write_kpi_rows(conn, kpi_rows(work_orders, sla_by_id))
+        if facts:
+            _clear_range(conn, "kpi_work_order_facts", date_from, date_to)
+            write_fact_rows(conn, fact_rows(work_orders, sla_by_id))
+    refresh_rollups(conn, date_from, date_to)
+
+
+def rebuild_kpi_facts(conn: psycopg.Connection, date_from: date, date_to: date) -> None:
+    """Recompute kpi_work_order_facts for [date_from, date_to]: one per-event pass over event_store."""
+    _clear_range(conn, "kpi_work_order_facts", date_from, date_to)
+    work_orders, sla_by_id = _work_order_metrics(conn, date_from, date_to)
+    write_fact_rows(conn, fact_rows(work_orders, sla_by_id))
+
+
+def refresh_rollups(conn: psycopg.Connection, date_from: date, date_to: date) -> None:
+    """Re-roll the weeks and months touching [date_from, date_to] from kpi_daily."""
+    sums = ", ".join(f"sum({column})" for column in SUM_COLUMNS)
     with conn.cursor() as cur:
-        cur.execute(
-            "DELETE FROM kpi_daily WHERE day >= %s AND day <= %s",
-            (date_from, date_to),
-        )
+        for grain in ("week", "month"):
+            table, _ = ROLLUP_TABLES[grain]
+            first = _bucket_start(grain, date_from)
+            end = _next_bucket(grain, _bucket_start(grain, date_to))
+            cur.execute(f"DELETE FROM {table} WHERE bucket_start >= %s AND bucket_start < %s", (first, end))
+            cur.execute(
+                f"""
+                INSERT INTO {table} (bucket_start, client_id, {", ".join(SUM_COLUMNS)})
+                SELECT date_trunc('{grain}', day)::date, client_id, {sums}
+                FROM kpi_daily
+                WHERE day >= %s AND day < %s
+                GROUP BY 1, 2
+                """,
+                (first, end),
+            )
+            _roll_sketches(cur, grain, table, first, end)
+
+
+def _roll_sketches(cur: psycopg.Cursor, grain: str, table: str, first: date, end: date) -> None:
+    cur.execute(
+        f"""
+        SELECT date_trunc('{grain}', day)::date AS bucket_start, client_id, {", ".join(SKETCH_COLUMNS)}
+        FROM kpi_daily
+        WHERE day >= %s AND day < %s AND (reaction_sketch IS NOT NULL OR mttr_sketch IS NOT NULL)
+        """,
+        (first, end),
+    )
+    merged: Dict[Tuple[date, Any], Dict[str, List[bytes]]] = {}
+    for row in cur.fetchall():
+        parts = merged.setdefault((row["bucket_start"], row["client_id"]), {column: [] for column in SKETCH_COLUMNS})
+        for column in SKETCH_COLUMNS:
+            parts[column].append(row[column])
+    updates = []
+    for (bucket_start, client_id), parts in merged.items():
+        sketches = [merge_bytes(parts[column]) for column in SKETCH_COLUMNS]
+        updates.append([sketch.to_bytes() if sketch else None for sketch in sketches] + [bucket_start, client_id])
+    cur.executemany(
+        f"UPDATE {table} SET reaction_sketch = %s, mttr_sketch = %s WHERE bucket_start = %s AND client_id IS NOT DISTINCT FROM %s",
+        updates,
+    )
+
+
+def plan_buckets(date_from: date, date_to: date) -> List[Bucket]:
+    """Cover [date_from, date_to] with the fewest whole months, weeks and days.
+
+    Returns (grain, first bucket_start, last bucket_start) runs in date order. Weeks never
+    straddle into a month that is covered whole, so a two-year range costs about 24 month
+    rows plus a few weeks and days at either end.
+    """
+    plan: List[Bucket] = []
+    cursor = date_from
+    while cursor <= date_to:
+        grain = _coarsest_grain(cursor, date_to)
+        if plan and plan[-1][0] == grain:
+            plan[-1] = (grain, plan[-1][1], cursor)
+        else:
+            plan.append((grain, cursor, cursor))
+        cursor = _next_bucket(grain, cursor)
+    return plan
+
+
+def combine(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Weighted KPI over any set of kpi_daily/weekly/monthly rows; quantiles from their merged sketches."""
+    totals = {column: 0 for column in SUM_COLUMNS}
+    for row in rows:
+        for column in SUM_COLUMNS:
+            totals[column] += row[column] or 0
+    return {
+        "reaction_time_avg_minutes": _ratio(totals["reaction_sum_minutes"], totals["reaction_count"]),
+        "mttr_avg_minutes": _ratio(totals["mttr_sum_minutes"], totals["mttr_count"]),
+        "sla_compliance_percent": _ratio(totals["sla_compliant_total"] * 100.0, totals["sla_total"]),
+        "work_orders_total": totals["work_orders_total"],
+        "reaction_time_quantiles_minutes": _quantiles(rows, "reaction_sketch"),
+        "mttr_quantiles_minutes": _quantiles(rows, "mttr_sketch"),
+    }
+
+
+def _quantiles(rows: List[Dict[str, Any]], column: str) -> Dict[str, Optional[float]]:
+    sketch = merge_bytes(row.get(column) for row in rows) or DDSketch()
+    return {name: sketch.quantile(q) for name, q in QUANTILES.items()}
+
+
+def _coarsest_grain(cursor: date, date_to: date) -> str:
+    if cursor.day == 1 and _next_bucket("month", cursor) - timedelta(days=1) <= date_to:
+        return "month"
+    if cursor.weekday() == 0 and cursor + timedelta(days=6) <= date_to:
+        next_month = _next_bucket("month", cursor.replace(day=1))
+        crosses = cursor + timedelta(days=6) >= next_month
+        if not crosses or _next_bucket("month", next_month) - timedelta(days=1) > date_to:
+            return "week"
+    return "day"
+
+
+def _bucket_start(grain: str, day: date) -> date:
+    if grain == "month":
+        return day.replace(day=1)
+    if grain == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _next_bucket(grain: str, start: date) -> date:
+    if grain == "month":
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    if grain == "week":
+        return start + timedelta(days=7)
+    return start + timedelta(days=1)
+
+
+def _ratio(total: Any, count: int) -> Optional[float]:
+    return float(total) / count if count else None
 
 
-def _fetch_events(conn: psycopg.Connection, date_from: date, date_to: date) -> List[Dict[str, Any]]:
+def _clear_range(conn: psycopg.Connection, table: str, date_from: date, date_to: date) -> None:
+    with conn.cursor() as cur:
+        cur.execute(f"DELETE FROM {table} WHERE day >= %s AND day <= %s", (date_from, date_to))
+
+
+def _work_order_metrics(
+    conn: psycopg.Connection, date_from: date, date_to: date
+) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[str]]]:
+    # One streaming pass yields every per-work-order measure: kpi_daily rows and fact rows.
+    work_orders = _build_work_order_metrics(_stream_events(conn, date_from, date_to))
+    return work_orders, _fetch_sla_states(conn, [record["work_order_id"] for record in work_orders])
+
+
+def _stream_events(conn: psycopg.Connection, date_from: date, date_to: date, batch_size: int = 5000) -> Iterator[Dict[str, Any]]:
     query = """
         SELECT event_type, entity_id, payload, created_at_system, created_at_reported
         FROM event_store
         WHERE created_at_system::date >= %s AND created_at_system::date <= %s
           AND event_type IN (
             'WORK_ORDER.CREATED',
+            'WORK_ORDER.ASSIGNED',
+            'WORK.ARRIVED_ON_SITE',
             'WORK.STARTED',
-            'WORK.COMPLETED'
+            'WORK.PAUSED',
+            'WORK.RESUMED',
+            'WORK.COMPLETED',
+            'PART.CONSUMED'
           )
         ORDER BY created_at_system
     """
-    with conn.cursor() as cur:
+    with conn.cursor(name="kpi_events") as cur:
+        cur.itersize = batch_size
         cur.execute(query, (date_from, date_to))
-        return cur.fetchall()
+        yield from cur
 
 
 def _effective_time(event_type: str, payload: Dict[str, Any], created_at_reported: Optional[datetime], created_at_system: datetime) -> datetime:
@@ -46,7 +287,15 @@ def _effective_time(event_type: str, payload: Dict[str, Any], created_at_reporte
     return created_at_reported or created_at_system
 
 
-def _build_work_order_metrics(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+_DAY_EVENTS = ("WORK_ORDER.CREATED", "WORK.STARTED", "WORK.COMPLETED")
+
+
+def _build_work_order_metrics(events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-work-order measures in one pass over events ordered by created_at_system.
+
+    Only work orders with a CREATED/STARTED/COMPLETED event in the pass get a day (the day
+    of the first such event, or of CREATED); the others are skipped by kpi_rows and fact_rows.
+    """
     per_work_order: Dict[str, Dict[str, Any]] = {}
     for event in events:
         event_type = event["event_type"]
@@ -62,79 +311,181 @@ def _build_work_order_metrics(events: List[Dict[str, Any]]) -> List[Dict[str, An
                 "started_time": None,
                 "completed_time": None,
                 "client_id": None,
-                "day": created_at_system.date(),
+                "day": None,
+                "priority": None,
+                "work_type": None,
+                "engineer_id": None,
+                "asset_id": None,
+                "visits": 0,
+                "paused_seconds": 0,
+                "paused_since": None,
+                "parts_pause": False,
+                "parts_quantity": 0,
             },
         )
+        if event_type in _DAY_EVENTS and record["day"] is None:
+            record["day"] = created_at_system.date()
         if event_type == "WORK_ORDER.CREATED":
             record["created_time"] = _effective_time(event_type, payload, created_at_reported, created_at_system)
             record["client_id"] = payload.get("client_id")
+            record["priority"] = payload.get("priority")
+            record["work_type"] = payload.get("type")
+            record["asset_id"] = payload.get("asset_id")
             record["day"] = created_at_system.date()
+        elif event_type == "WORK_ORDER.ASSIGNED":
+            record["engineer_id"] = payload.get("engineer_id")
+        elif event_type == "WORK.ARRIVED_ON_SITE":
+            record["visits"] += 1
         elif event_type == "WORK.STARTED":
             record["started_time"] = _effective_time(event_type, payload, created_at_reported, created_at_system)
+        elif event_type == "WORK.PAUSED":
+            if record["paused_since"] is None:
+                record["paused_since"] = created_at_reported or created_at_system
+            if payload.get("reason_code") == "PARTS":
+                record["parts_pause"] = True
+        elif event_type == "WORK.RESUMED":
+            _close_pause(record, created_at_reported or created_at_system)
         elif event_type == "WORK.COMPLETED":
             record["completed_time"] = _effective_time(event_type, payload, created_at_reported, created_at_system)
+            _close_pause(record, record["completed_time"])
+        elif event_type == "PART.CONSUMED":
+            record["parts_quantity"] += payload.get("quantity") or 0
     return list(per_work_order.values())
 
 
-def _insert_kpi_rows(conn: psycopg.Connection, work_orders: List[Dict[str, Any]]) -> None:
+def _close_pause(record: Dict[str, Any], until: datetime) -> None:
+    # Same accounting as the projection's net downtime (fold.pause_seconds).
+    if record["paused_since"] is not None:
+        record["paused_seconds"] += pause_seconds(record["paused_since"], until, record["started_time"])[1]
+        record["paused_since"] = None
+
+
+def kpi_rows(work_orders: List[Dict[str, Any]], sla_by_id: Dict[str, Optional[str]]) -> List[Tuple[Any, ...]]:
+    """kpi_daily rows (KPI_COLUMNS order) for per-work-order metrics; sla_by_id maps id -> sla_view.state.
+
+    Durations are summed as timedeltas (exact microseconds) and turned into minutes once
+    per row, so the result does not depend on the order work orders are added in.
+    """
     aggregates: Dict[Tuple[date, Optional[str]], Dict[str, Any]] = {}
     for record in work_orders:
-        day = record["day"]
-        client_id = record["client_id"]
-        key = (day, client_id)
+        if record["day"] is None:
+            continue
+        key = (record["day"], record["client_id"])
         agg = aggregates.setdefault(
             key,
             {
-                "reaction_sum": 0.0,
+                "reaction_sum": timedelta(0),
                 "reaction_count": 0,
-                "mttr_sum": 0.0,
+                "mttr_sum": timedelta(0),
                 "mttr_count": 0,
                 "work_orders": 0,
+                "sla_states": [],
+                "reaction_sketch": DDSketch(),
+                "mttr_sketch": DDSketch(),
             },
         )
         agg["work_orders"] += 1
+        agg["sla_states"].append(sla_by_id.get(str(record["work_order_id"])))
         if record["created_time"] and record["started_time"]:
-            diff = record["started_time"] - record["created_time"]
-            agg["reaction_sum"] += diff.total_seconds() / 60.0
+            reaction = record["started_time"] - record["created_time"]
+            agg["reaction_sum"] += reaction
             agg["reaction_count"] += 1
+            agg["reaction_sketch"].add(reaction.total_seconds() / 60.0)
         if record["started_time"] and record["completed_time"]:
-            diff = record["completed_time"] - record["started_time"]
-            agg["mttr_sum"] += diff.total_seconds() / 60.0
+            mttr = record["completed_time"] - record["started_time"]
+            agg["mttr_sum"] += mttr
             agg["mttr_count"] += 1
-
-    sla_states = _fetch_sla_states(conn, work_orders)
+            agg["mttr_sketch"].add(mttr.total_seconds() / 60.0)
 
     rows = []
     for (day, client_id), agg in aggregates.items():
-        reaction_avg = agg["reaction_sum"] / agg["reaction_count"] if agg["reaction_count"] else None
-        mttr_avg = agg["mttr_sum"] / agg["mttr_count"] if agg["mttr_count"] else None
-        sla_percent = _calc_sla_percent(sla_states.get((day, client_id), []))
-        rows.append((day, client_id, reaction_avg, mttr_avg, sla_percent, agg["work_orders"]))
+        reaction_sum = agg["reaction_sum"].total_seconds() / 60.0
+        mttr_sum = agg["mttr_sum"].total_seconds() / 60.0
+        states = agg["sla_states"]
+        rows.append(
+            (
+                day,
+                client_id,
+                reaction_sum / agg["reaction_count"] if agg["reaction_count"] else None,
+                mttr_sum / agg["mttr_count"] if agg["mttr_count"] else None,
+                _calc_sla_percent(states),
+                agg["work_orders"],
+                reaction_sum,
+                agg["reaction_count"],
+                mttr_sum,
+                agg["mttr_count"],
+                sum(1 for state in states if state and state != "BREACHED"),
+                len(states),
+                agg["reaction_sketch"].to_bytes() if agg["reaction_count"] else None,
+                agg["mttr_sketch"].to_bytes() if agg["mttr_count"] else None,
+            )
+        )
+    return rows
+
+
+def write_kpi_rows(conn: psycopg.Connection, rows: Iterable[Tuple[Any, ...]]) -> None:
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY kpi_daily ({', '.join(KPI_COLUMNS)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def fact_rows(work_orders: List[Dict[str, Any]], sla_by_id: Dict[str, Optional[str]]) -> List[Tuple[Any, ...]]:
+    """kpi_work_order_facts rows (FACT_COLUMNS order).
+
+    A completed work order is a first-time fix when it took at most one visit on site and
+    was never paused waiting for parts. paused_minutes counts pauses after work started,
+    so mttr_minutes - paused_minutes is the net repair time.
+    """
+    rows = []
+    for record in work_orders:
+        if record["day"] is None:
+            continue
+        created, started, completed = record["created_time"], record["started_time"], record["completed_time"]
+        first_time_fix = None
+        if completed:
+            first_time_fix = record["visits"] <= 1 and not record["parts_pause"]
+        rows.append(
+            (
+                record["work_order_id"],
+                record["day"],
+                record["client_id"],
+                record["priority"],
+                record["work_type"],
+                record["engineer_id"],
+                record["asset_id"],
+                (started - created).total_seconds() / 60.0 if created and started else None,
+                (completed - started).total_seconds() / 60.0 if started and completed else None,
+                record["paused_seconds"] / 60.0,
+                record["visits"],
+                first_time_fix,
+                record["parts_quantity"],
+                sla_by_id.get(str(record["work_order_id"])),
+            )
+        )
+    return rows
 
+
+def write_fact_rows(conn: psycopg.Connection, rows: List[Tuple[Any, ...]]) -> None:
     with conn.cursor() as cur:
-        cur.executemany(
-            """
-            INSERT INTO kpi_daily (day, client_id, reaction_avg_minutes, mttr_avg_minutes, sla_compliance_percent, work_orders_total)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """,
-            rows,
+        # A work order rebuilt under another day than before replaces its old fact.
+        cur.execute(
+            "DELETE FROM kpi_work_order_facts WHERE work_order_id = ANY(%s::uuid[])",
+            ([str(row[0]) for row in rows],),
         )
+        with cur.copy(f"COPY kpi_work_order_facts ({', '.join(FACT_COLUMNS)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
 
 
-def _fetch_sla_states(conn: psycopg.Connection, work_orders: List[Dict[str, Any]]) -> Dict[Tuple[date, Optional[str]], List[str]]:
-    ids = [wo_id for wo_id in {w.get("work_order_id") for w in work_orders} if wo_id]
+def _fetch_sla_states(conn: psycopg.Connection, work_order_ids: List[Any]) -> Dict[str, Optional[str]]:
+    ids = sorted({str(wo_id) for wo_id in work_order_ids if wo_id})
     if not ids:
         return {}
-    query = "SELECT work_order_id, state FROM sla_view WHERE work_order_id = ANY(%s)"
+    query = "SELECT work_order_id::text AS work_order_id, state FROM sla_view WHERE work_order_id = ANY(%s::uuid[])"
     with conn.cursor() as cur:
         cur.execute(query, (ids,))
-        rows = cur.fetchall()
-    states_by_id = {row["work_order_id"]: row.get("state") for row in rows}
-    states: Dict[Tuple[date, Optional[str]], List[str]] = {}
-    for record in work_orders:
-        key = (record["day"], record["client_id"])
-        states.setdefault(key, []).append(states_by_id.get(record.get("work_order_id")))
-    return states
+        return {row["work_order_id"]: row["state"] for row in cur}
 
 
 def _calc_sla_percent(states: List[Optional[str]]) -> Optional[float]:
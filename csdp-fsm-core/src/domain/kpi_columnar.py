@@ -0,0 +1,325 @@
+"""Columnar kpi_daily rebuild on NumPy arrays.
+
+Same rows as the per-event path in kpi (kpi_rows over _build_work_order_metrics). SQL
+resolves effective times and hands over NOT NULL bigints only, through a binary COPY that
+is read as one structured array: UUIDs as (hi, lo) halves, times as epoch microseconds,
+days as day numbers. After the fetch everything is array
+work: work orders are factorized by sorting their keys, "last event of each kind" is the
+tail of each sorted run, SLA states are joined by merging sorted keys and per-(day, client)
+sums are int64 np.add.reduceat, so they are exact and independent of order. Sketch buckets
+are counted with np.unique over (group, bucket) keys.
+
+NumPy is optional; available() tells whether this path can be used.
+"""
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import psycopg
+
+from src.domain import sketch
+
+try:  # optional accelerator
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the deployment
+    np = None
+
+CREATED, STARTED, COMPLETED = 0, 1, 2
+EPOCH = date(1970, 1, 1)
+_MASK64 = (1 << 64) - 1
+# PGCOPY signature, flags and header extension length; the body ends with an int16 -1 trailer.
+_COPY_HEADER_SIZE = 19
+# Sketch bucket ids lie in [-_BUCKET_SPAN, _BUCKET_SPAN].
+_BUCKET_SPAN = sketch.MAX_BUCKET
+
+_RANGE = """
+    created_at_system::date >= %(date_from)s AND created_at_system::date <= %(date_to)s
+    AND event_type IN ('WORK_ORDER.CREATED', 'WORK.STARTED', 'WORK.COMPLETED')
+"""
+
+
+def _uuid_halves(expression: str) -> Tuple[str, str]:
+    text = f"replace(({expression})::text, '-', '')"
+    return (
+        f"COALESCE(('x' || left({text}, 16))::bit(64)::bigint, 0)",
+        f"COALESCE(('x' || right({text}, 16))::bit(64)::bigint, 0)",
+    )
+
+
+_WO_HI, _WO_LO = _uuid_halves("entity_id")
+_CLIENT = "CASE WHEN event_type = 'WORK_ORDER.CREATED' THEN (payload->>'client_id')::uuid END"
+_CLIENT_HI, _CLIENT_LO = _uuid_halves(_CLIENT)
+
+# Mirrors kpi._effective_time: the reported time from the payload, else created_at_reported,
+# else created_at_system. Client halves are 0 (with has_client 0) when there is no client_id.
+_FETCH_EVENTS = f"""
+    SELECT {_WO_HI}, {_WO_LO},
+           (CASE event_type WHEN 'WORK_ORDER.CREATED' THEN 0 WHEN 'WORK.STARTED' THEN 1 ELSE 2 END)::bigint,
+           (extract(epoch FROM COALESCE(
+               CASE event_type
+                 WHEN 'WORK.STARTED' THEN NULLIF(payload->>'actual_start_reported', '')::timestamptz
+                 WHEN 'WORK.COMPLETED' THEN NULLIF(payload->>'actual_end_reported', '')::timestamptz
+               END,
+               created_at_reported,
+               created_at_system
+           )) * 1000000)::bigint,
+           (created_at_system::date - DATE '1970-01-01')::bigint,
+           ({_CLIENT} IS NOT NULL)::int::bigint,
+           {_CLIENT_HI},
+           {_CLIENT_LO}
+    FROM event_store
+    WHERE {_RANGE}
+    ORDER BY created_at_system
+"""
+
+_FETCH_SLA = f"""
+    SELECT {", ".join(_uuid_halves("work_order_id"))}, (state IS NOT NULL AND state <> 'BREACHED')::int::bigint
+    FROM sla_view
+    WHERE work_order_id IN (SELECT entity_id FROM event_store WHERE {_RANGE})
+"""
+
+
+@dataclass
+class EventColumns:
+    """KPI events in created_at_system order, one int64 array entry per event."""
+
+    wo_hi: Any
+    wo_lo: Any
+    kinds: Any  # CREATED / STARTED / COMPLETED
+    effective_us: Any  # microseconds since the epoch
+    day_numbers: Any  # days since EPOCH
+    has_client: Any  # 1 on CREATED events with a client_id
+    client_hi: Any
+    client_lo: Any
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple[int, ...]]) -> "EventColumns":
+        return cls(*np.array(rows, dtype=np.int64).reshape(-1, 8).T)
+
+    @classmethod
+    def from_copy(cls, data: bytes) -> "EventColumns":
+        return cls(*_binary_copy_columns(data, 8))
+
+
+@dataclass
+class SlaColumns:
+    """sla_view as (hi, lo, compliant) arrays; compliant is state set and not BREACHED."""
+
+    wo_hi: Any
+    wo_lo: Any
+    compliant: Any
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple[int, int, int]]) -> "SlaColumns":
+        return cls(*np.array(rows, dtype=np.int64).reshape(-1, 3).T)
+
+    @classmethod
+    def from_copy(cls, data: bytes) -> "SlaColumns":
+        return cls(*_binary_copy_columns(data, 3))
+
+
+def available() -> bool:
+    return np is not None
+
+
+def uuid_halves(value: Any) -> Tuple[int, int]:
+    """(hi, lo) signed bigint halves of a UUID, as _FETCH_EVENTS computes them."""
+    number = uuid.UUID(str(value)).int
+    return _signed(number >> 64), _signed(number & _MASK64)
+
+
+def fetch_columns(conn: psycopg.Connection, date_from: date, date_to: date) -> Tuple[EventColumns, SlaColumns]:
+    params = {"date_from": date_from, "date_to": date_to}
+    with conn.cursor() as cur:
+        events = EventColumns.from_copy(_copy_out(cur, _FETCH_EVENTS, params))
+        sla = SlaColumns.from_copy(_copy_out(cur, _FETCH_SLA, params))
+    return events, sla
+
+
+def _copy_out(cur: psycopg.Cursor, query: str, params: Any) -> bytes:
+    with cur.copy(f"COPY ({query}) TO STDOUT (FORMAT BINARY)", params) as copy:
+        return b"".join(bytes(block) for block in copy)
+
+
+def _binary_copy_columns(data: bytes, width: int) -> List[Any]:
+    """int64 columns of a binary COPY whose columns are all NOT NULL bigints.
+
+    Such rows have a fixed layout (int16 field count, then int32 length + int64 value per
+    field), so the body is read as one structured array instead of row by row.
+    """
+    if not data:
+        return [np.zeros(0, dtype=np.int64) for _ in range(width)]
+    fields = [("count", ">i2")]
+    for i in range(width):
+        fields += [(f"length{i}", ">i4"), (f"value{i}", ">i8")]
+    row_type = np.dtype(fields)
+    offset = _COPY_HEADER_SIZE + int.from_bytes(data[15:19], "big")
+    rows = (len(data) - offset - 2) // row_type.itemsize
+    body = np.frombuffer(data, dtype=row_type, offset=offset, count=rows)
+    return [body[f"value{i}"].astype(np.int64) for i in range(width)]
+
+
+def kpi_rows(columns: EventColumns, sla: SlaColumns) -> List[Tuple[Any, ...]]:
+    """kpi_daily rows (kpi.KPI_COLUMNS order), identical to kpi.kpi_rows for the same events."""
+    if len(columns.kinds) == 0:
+        return []
+
+    codes, first_index = _factorize(columns.wo_hi, columns.wo_lo)
+    count = len(first_index)
+    wo_hi, wo_lo = columns.wo_hi[first_index], columns.wo_lo[first_index]
+
+    # Last event of each kind per work order (later events of a kind overwrite earlier
+    # ones): sort (key, event index) as one int64 and take the tail of every key's run.
+    events = len(codes)
+    ranked = np.sort((codes * 3 + columns.kinds) * events + np.arange(events))
+    run_keys = ranked // events
+    last_index = ranked[np.r_[run_keys[1:] != run_keys[:-1], True]] % events
+    times = np.zeros((3, count), dtype=np.int64)
+    present = np.zeros((3, count), dtype=bool)
+    times[columns.kinds[last_index], codes[last_index]] = columns.effective_us[last_index]
+    present[columns.kinds[last_index], codes[last_index]] = True
+
+    # Day and client come from the last CREATED event, else the day of the first event.
+    days = columns.day_numbers[first_index].copy()
+    has_client = np.zeros(count, dtype=np.int64)
+    client_hi = np.zeros(count, dtype=np.int64)
+    client_lo = np.zeros(count, dtype=np.int64)
+    created = last_index[columns.kinds[last_index] == CREATED]
+    days[codes[created]] = columns.day_numbers[created]
+    has_client[codes[created]] = columns.has_client[created]
+    client_hi[codes[created]] = columns.client_hi[created]
+    client_lo[codes[created]] = columns.client_lo[created]
+
+    compliant = _join_sla(wo_hi, wo_lo, sla)
+
+    # Group work orders by (day, client); the order inside a group does not matter.
+    client_codes, _ = _factorize(client_hi, client_lo)
+    group_keys = (days * 2 + has_client) * (int(client_codes.max()) + 1) + client_codes
+    order = np.argsort(group_keys)
+    starts = _run_starts(group_keys[order])
+
+    def group_sum(values: Any) -> Any:
+        return np.add.reduceat(values[order], starts)
+
+    has_reaction = present[CREATED] & present[STARTED]
+    has_mttr = present[STARTED] & present[COMPLETED]
+    reaction_us = group_sum(np.where(has_reaction, times[STARTED] - times[CREATED], 0))
+    mttr_us = group_sum(np.where(has_mttr, times[COMPLETED] - times[STARTED], 0))
+    reaction_count = group_sum(has_reaction.astype(np.int64))
+    mttr_count = group_sum(has_mttr.astype(np.int64))
+    work_orders = group_sum(np.ones(count, dtype=np.int64))
+    sla_compliant = group_sum(compliant)
+
+    # Same float operations, in the same order, as kpi.kpi_rows.
+    reaction_minutes = reaction_us / 1_000_000 / 60.0
+    mttr_minutes = mttr_us / 1_000_000 / 60.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reaction_avg = reaction_minutes / reaction_count
+        mttr_avg = mttr_minutes / mttr_count
+        sla_percent = sla_compliant / work_orders * 100.0
+
+    group_of = np.empty(count, dtype=np.int64)
+    group_of[order] = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, count]))
+    reaction_sketches = _group_sketches(group_of, has_reaction, times[STARTED] - times[CREATED], len(starts))
+    mttr_sketches = _group_sketches(group_of, has_mttr, times[COMPLETED] - times[STARTED], len(starts))
+
+    first = order[starts]
+    rows = []
+    for i, wo in enumerate(first.tolist()):
+        client_id = _uuid_text(client_hi[wo], client_lo[wo]) if has_client[wo] else None
+        rows.append(
+            (
+                EPOCH + timedelta(days=int(days[wo])),
+                client_id,
+                float(reaction_avg[i]) if reaction_count[i] else None,
+                float(mttr_avg[i]) if mttr_count[i] else None,
+                float(sla_percent[i]),
+                int(work_orders[i]),
+                float(reaction_minutes[i]),
+                int(reaction_count[i]),
+                float(mttr_minutes[i]),
+                int(mttr_count[i]),
+                int(sla_compliant[i]),
+                int(work_orders[i]),
+                reaction_sketches[i],
+                mttr_sketches[i],
+            )
+        )
+    return rows
+
+
+def _bucket_ids(values: Any) -> Any:
+    """sketch.bucket_id over an array."""
+    magnitude = np.abs(values)
+    indexable = magnitude > sketch.MIN_INDEXABLE
+    with np.errstate(divide="ignore"):
+        ratio = np.log(np.where(indexable, magnitude, 1.0)) / sketch.LOG_GAMMA
+    keys = np.clip(np.ceil(ratio), -sketch.KEY_LIMIT, sketch.KEY_LIMIT).astype(np.int64) + sketch.KEY_OFFSET
+    buckets = np.where(indexable, np.where(values > 0, keys, -keys), 0)
+    # np.log may differ from math.log in the last bit; only a ratio next to an integer can
+    # land in another bucket because of it, so those few go through sketch.bucket_id.
+    edge = np.flatnonzero(indexable & (np.abs(ratio - np.rint(ratio)) < 1e-9))
+    buckets[edge] = [sketch.bucket_id(value) for value in values[edge].tolist()]
+    return buckets
+
+
+def _group_sketches(group_of: Any, mask: Any, durations_us: Any, groups: int) -> List[Optional[bytes]]:
+    """Serialized DDSketch of the masked durations (in minutes) of every group, None when empty."""
+    buckets = _bucket_ids(durations_us[mask] / 1_000_000 / 60.0)
+    span = 2 * _BUCKET_SPAN + 1
+    pairs, counts = np.unique(group_of[mask] * span + buckets + _BUCKET_SPAN, return_counts=True)
+    per_group: List[Dict[int, int]] = [{} for _ in range(groups)]
+    for pair, bucket_count in zip(pairs.tolist(), counts.tolist()):
+        group, bucket = divmod(pair, span)
+        per_group[group][bucket - _BUCKET_SPAN] = bucket_count
+    return [sketch.DDSketch(counts).to_bytes() if counts else None for counts in per_group]
+
+
+def _join_sla(wo_hi: Any, wo_lo: Any, sla: SlaColumns) -> Any:
+    """compliant flag per work order: merge both key sets, a match is an SLA row right after its work order."""
+    count = len(wo_hi)
+    compliant = np.zeros(count, dtype=np.int64)
+    if len(sla.wo_hi) == 0:
+        return compliant
+    hi = np.concatenate([wo_hi, sla.wo_hi])
+    lo = np.concatenate([wo_lo, sla.wo_lo])
+    is_sla = np.r_[np.zeros(count, dtype=np.int8), np.ones(len(sla.wo_hi), dtype=np.int8)]
+    order = np.lexsort((is_sla, lo, hi))
+    hi, lo, is_sla = hi[order], lo[order], is_sla[order]
+    match = np.flatnonzero((is_sla[1:] == 1) & (is_sla[:-1] == 0) & (hi[1:] == hi[:-1]) & (lo[1:] == lo[:-1]))
+    compliant[order[match]] = sla.compliant[order[match + 1] - count]
+    return compliant
+
+
+def _factorize(hi: Any, lo: Any) -> Tuple[Any, Any]:
+    """Dense codes for (hi, lo) keys and the first index of every code."""
+    order = np.argsort(hi)
+    sorted_hi, sorted_lo = hi[order], lo[order]
+    if np.any((sorted_hi[1:] == sorted_hi[:-1]) & (sorted_lo[1:] != sorted_lo[:-1])):
+        # Two keys share a high half: order by both halves so equal keys are adjacent.
+        order = np.lexsort((lo, hi))
+        sorted_hi, sorted_lo = hi[order], lo[order]
+    starts = _run_starts(sorted_hi, sorted_lo)
+    run_marks = np.zeros(len(order), dtype=np.int64)
+    run_marks[starts] = 1
+    codes = np.empty(len(order), dtype=np.int64)
+    codes[order] = np.cumsum(run_marks) - 1
+    return codes, np.minimum.reduceat(order, starts)
+
+
+def _run_starts(*sorted_columns: Any) -> Any:
+    changed = np.zeros(len(sorted_columns[0]) - 1, dtype=bool)
+    for column in sorted_columns:
+        changed |= column[1:] != column[:-1]
+    return np.flatnonzero(np.r_[True, changed])
+
+
+def _signed(half: int) -> int:
+    return half - (1 << 64) if half >= 1 << 63 else half
+
+
+def _uuid_text(hi: Any, lo: Any) -> str:
+    return str(uuid.UUID(int=((int(hi) & _MASK64) << 64) | (int(lo) & _MASK64)))
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import psycopg
+
+from src.domain import fold as f
+from src.domain.counters import counter_deltas
+from src.domain.fold import TransitionRejected, WorkOrderState, effective_time_of, fold
+from src.domain.sla_policy import policy_for_event
+from src.domain.state_store import load_state, persist_effects, projection_params, state_cache
+
+
+def iter_events(
+    conn: psycopg.Connection, work_order_id: str, as_of: Optional[datetime] = None
+) -> Iterator[Dict[str, Any]]:
+    query = """
+        SELECT event_id, entity_id, event_type, payload, created_at_system, created_at_reported, created_by
+        FROM event_store
+        WHERE entity_id = %(work_order_id)s
+          AND (%(as_of)s::timestamptz IS NULL OR created_at_system <= %(as_of)s::timestamptz)
+        ORDER BY event_seq
+    """
+    with conn.cursor() as cur:
+        cur.execute(query, {"work_order_id": work_order_id, "as_of": as_of})
+        for event in cur:
+            event["effective_time"] = effective_time_of(event)
+            event["sla_policy"] = policy_for_event(conn, event)
+            yield event
+
+
+def state_at(conn: psycopg.Connection, work_order_id: str, as_of: Optional[datetime] = None) -> Optional[WorkOrderState]:
+    """Point-in-time read: the work order as it was after the last event stored at or before as_of."""
+    state, _ = _fold_events(iter_events(conn, work_order_id, as_of))
+    return state
+
+
+def rebuild_work_orders(conn: psycopg.Connection, work_order_ids: Sequence[str]) -> Dict[str, int]:
+    """Rebuild projections of the given work orders from event_store.
+
+    Events are folded in memory; each work order then costs one projection insert, one
+    sla_view upsert and batched timeline/parts/evidence writes, instead of a round trip
+    per event. Events the FSM rejects on replay are skipped and counted. Dashboard counters
+    move by the difference between the old and the rebuilt projection, in one batch at the end.
+    """
+    stats = {"work_orders": 0, "events": 0, "skipped": 0}
+    counter_effects: List[f.Effect] = []
+    for work_order_id in work_order_ids:
+        old_state = load_state(conn, work_order_id)
+        state_cache.invalidate(work_order_id)
+        _delete_projection(conn, work_order_id)
+        state, effects = _fold_events(iter_events(conn, work_order_id), stats)
+        deltas = counter_deltas(old_state, state)
+        if deltas:
+            counter_effects.append((f.COUNTERS, work_order_id, deltas))
+        # Devices of an engineer the rebuilt order no longer belongs to are told to drop it.
+        handover = (old_state.assigned_engineer_id if old_state else None, state.assigned_engineer_id if state else None)
+        if str(handover[0] or "") != str(handover[1] or ""):
+            persist_effects(conn, [(f.ENGINEER_HANDOVER, work_order_id, handover)])
+        if state is None:
+            continue
+        _insert_snapshot(conn, state)
+        persist_effects(conn, [effect for effect in effects if effect[0] in (f.PARTS, f.EVIDENCE, f.TIMELINE)])
+        for kind in (f.ENGINEER_BOARD, f.ENGINEER_POSITION, f.ENGINEER_ASSIGNMENT):
+            latest = [effect for effect in effects if effect[0] == kind][-1:]
+            persist_effects(conn, latest)
+        stats["work_orders"] += 1
+    persist_effects(conn, counter_effects)
+    return stats
+
+
+def _fold_events(events: Iterator[Dict[str, Any]], stats: Optional[Dict[str, int]] = None) -> tuple:
+    state: Optional[WorkOrderState] = None
+    effects: List[f.Effect] = []
+    for event in events:
+        try:
+            state, event_effects = fold(state, event)
+        except TransitionRejected:
+            if stats is not None:
+                stats["skipped"] += 1
+            continue
+        effects.extend(event_effects)
+        if stats is not None:
+            stats["events"] += 1
+    return state, effects
+
+
+def _delete_projection(conn: psycopg.Connection, work_order_id: str) -> None:
+    with conn.cursor() as cur:
+        for table in (
+            "work_order_timeline",
+            "work_order_parts",
+            "work_order_evidence",
+            "sla_view",
+            "engineer_assignments",
+            "work_orders_current",
+        ):
+            cur.execute(f"DELETE FROM {table} WHERE work_order_id = %s", (work_order_id,))
+
+
+def _insert_snapshot(conn: psycopg.Connection, state: WorkOrderState) -> None:
+    columns = ("work_order_id",) + f.PROJECTION_COLUMNS + ("version",)
+    query = f"""
+        INSERT INTO work_orders_current ({", ".join(columns)}, last_event_at)
+        VALUES ({", ".join(f"%({column})s" for column in columns)}, now())
+    """
+    with conn.cursor() as cur:
+        cur.execute(query, projection_params(state.as_dict()))
+        cur.execute(
+            """
+            INSERT INTO sla_view (
+              work_order_id, reaction_deadline_at, restore_deadline_at, calendar_id, due_at, state, breached_at, last_calc_at
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, CASE WHEN %s = 'BREACHED' THEN now() END, now())
+            """,
+            (
+                state.work_order_id,
+                state.reaction_deadline_at,
+                state.restore_deadline_at,
+                state.sla_calendar_id,
+                f.pending_deadline(state),
+                state.sla_view_state or "IN_SLA",
+                state.sla_view_state,
+            ),
+        )
+
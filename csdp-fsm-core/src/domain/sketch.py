@@ -0,0 +1,148 @@
+"""DDSketch: mergeable quantile sketch with relative-error guarantees.
+
+Values are counted in logarithmic buckets: every quantile is answered within
+RELATIVE_ACCURACY of the exact value, and two sketches merge by adding bucket counts, so
+sketches of days combine into weeks, months or any range without the raw values.
+
+Buckets are numbered so that their order is the order of the values they hold:
+0 is (near) zero, positive ids hold positive values, negative ids their mirror image.
+"""
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+# |values| below this count as zero; keys are clamped so ids fit comfortably in a varint.
+MIN_INDEXABLE = 1e-9
+KEY_LIMIT = 4095
+KEY_OFFSET = KEY_LIMIT + 1
+MAX_BUCKET = KEY_LIMIT + KEY_OFFSET
+
+_FORMAT_VERSION = 1
+
+
+def bucket_id(value: float) -> int:
+    if value > MIN_INDEXABLE:
+        return _key(value) + KEY_OFFSET
+    if value < -MIN_INDEXABLE:
+        return -(_key(-value) + KEY_OFFSET)
+    return 0
+
+
+def bucket_value(bucket: int) -> float:
+    """Representative value of a bucket: within RELATIVE_ACCURACY of everything in it."""
+    if bucket == 0:
+        return 0.0
+    key = abs(bucket) - KEY_OFFSET
+    value = 2 * GAMMA**key / (GAMMA + 1)
+    return value if bucket > 0 else -value
+
+
+class DDSketch:
+    def __init__(self, counts: Optional[Dict[int, int]] = None) -> None:
+        self.counts: Dict[int, int] = dict(counts or {})
+
+    @classmethod
+    def of(cls, values: Iterable[float]) -> "DDSketch":
+        sketch = cls()
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    def add(self, value: float, count: int = 1) -> None:
+        bucket = bucket_id(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+
+    def merge(self, other: "DDSketch") -> None:
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1); None for an empty sketch."""
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen > rank:
+                return bucket_value(bucket)
+        return bucket_value(max(self.counts))
+
+    def to_bytes(self) -> bytes:
+        """Version byte, entry count, then (bucket delta, count) varint pairs in bucket order."""
+        out = bytearray([_FORMAT_VERSION])
+        _put_varint(out, len(self.counts))
+        previous = 0
+        for bucket in sorted(self.counts):
+            _put_varint(out, _zigzag(bucket - previous))
+            _put_varint(out, self.counts[bucket])
+            previous = bucket
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DDSketch":
+        data = bytes(data)
+        if not data or data[0] != _FORMAT_VERSION:
+            raise ValueError("Unsupported sketch format")
+        entries, position = _get_varint(data, 1)
+        counts: Dict[int, int] = {}
+        bucket = 0
+        for _ in range(entries):
+            delta, position = _get_varint(data, position)
+            count, position = _get_varint(data, position)
+            bucket += _unzigzag(delta)
+            counts[bucket] = count
+        return cls(counts)
+
+
+def merge_bytes(sketches: Iterable[Optional[bytes]]) -> Optional[DDSketch]:
+    """Merge serialized sketches, skipping NULLs; None when there is nothing to merge."""
+    merged: Optional[DDSketch] = None
+    for data in sketches:
+        if data is None:
+            continue
+        sketch = DDSketch.from_bytes(data)
+        if merged is None:
+            merged = sketch
+        else:
+            merged.merge(sketch)
+    return merged
+
+
+def _key(magnitude: float) -> int:
+    return max(-KEY_LIMIT, min(KEY_LIMIT, math.ceil(math.log(magnitude) / LOG_GAMMA)))
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data: bytes, position: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
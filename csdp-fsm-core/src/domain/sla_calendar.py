@@ -0,0 +1,177 @@
+"""Working-time calendars for SLA deadlines.
+
+A calendar is a weekly schedule of working hours in a time zone minus holidays. It is
+compiled, one year at a time, into a table of working segments [start, end) in UTC epoch
+seconds plus the working seconds before each segment. "start + N working minutes" and
+"working minutes between t1 and t2" are then a bisect into that table instead of a walk
+over the minutes. Compiled years are cached per calendar (CalendarSpec is hashable).
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Any, FrozenSet, Iterable, List, Mapping, Tuple
+from zoneinfo import ZoneInfo
+
+# Calendars without any working time in this many years are rejected instead of searched forever.
+_MAX_YEARS_AHEAD = 5
+
+Hours = Tuple[Tuple[int, int], ...]  # (open, close) minutes after local midnight
+
+
+@dataclass(frozen=True)
+class CalendarSpec:
+    timezone: str
+    week: Tuple[Hours, ...]  # Monday .. Sunday
+    holidays: FrozenSet[date] = frozenset()
+
+    @classmethod
+    def from_config(cls, tz: str, week_hours: Mapping[str, Any], holidays: Iterable[date] = ()) -> "CalendarSpec":
+        """week_hours as stored in sla_calendars: {"0": [["09:00", "18:00"]], ...}, 0 = Monday."""
+        week = []
+        for weekday in range(7):
+            hours = []
+            for opens, closes in week_hours.get(str(weekday)) or []:
+                start, end = _minutes(opens), _minutes(closes)
+                if not 0 <= start < end <= 24 * 60:
+                    raise ValueError(f"Invalid working hours {opens}-{closes}")
+                hours.append((start, end))
+            week.append(_merge(hours))
+        if not any(week):
+            raise ValueError("Calendar has no working hours")
+        return cls(tz, tuple(week), frozenset(holidays))
+
+
+def _merge(hours: List[Tuple[int, int]]) -> Hours:
+    # Overlapping or touching ranges become one, so no working second is counted twice.
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(hours):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return tuple(merged)
+
+
+@dataclass(frozen=True)
+class _Year:
+    starts: List[int]
+    ends: List[int]
+    # working seconds before / after each segment, counted from the start of the year
+    before: List[int]
+    after: List[int]
+
+    @property
+    def total(self) -> int:
+        return self.after[-1] if self.after else 0
+
+    def worked(self, at: int) -> int:
+        """Working seconds from the start of the year up to epoch second `at`."""
+        i = bisect_right(self.starts, at) - 1
+        if i < 0:
+            return 0
+        return self.before[i] + min(at, self.ends[i]) - self.starts[i]
+
+    def instant(self, worked: int) -> int:
+        """Epoch second at which `worked` working seconds (0 < worked <= total) are reached."""
+        i = bisect_left(self.after, worked)
+        return self.ends[i] - (self.after[i] - worked)
+
+
+class BusinessCalendar:
+    def __init__(self, spec: CalendarSpec) -> None:
+        self.spec = spec
+        self._zone = ZoneInfo(spec.timezone)
+
+    def add_minutes(self, start: datetime, minutes: float) -> datetime:
+        """start + `minutes` working minutes; a deadline that falls on a closing time stays there."""
+        remaining = round(minutes * 60)
+        if remaining <= 0:
+            return start
+        at = _epoch(start)
+        year = self._local_year(at)
+        remaining += _compile_year(self.spec, year).worked(at)
+        for _ in range(_MAX_YEARS_AHEAD + 1):
+            table = _compile_year(self.spec, year)
+            if remaining <= table.total:
+                return datetime.fromtimestamp(table.instant(remaining), timezone.utc)
+            remaining -= table.total
+            year += 1
+        raise ValueError("No working time within the calendar horizon")
+
+    def minutes_between(self, start: datetime, end: datetime) -> float:
+        """Working minutes in [start, end); negative when end is before start."""
+        if end < start:
+            return -self.minutes_between(end, start)
+        first_year = self._local_year(_epoch(start))
+        return (self._worked_since(_epoch(end), first_year) - self._worked_since(_epoch(start), first_year)) / 60
+
+    def _worked_since(self, at: int, first_year: int) -> int:
+        # Working seconds from the start of first_year up to `at`: whole years, then a bisect.
+        year = self._local_year(at)
+        whole_years = sum(_compile_year(self.spec, y).total for y in range(first_year, year))
+        return whole_years + _compile_year(self.spec, year).worked(at)
+
+    def _local_year(self, at: int) -> int:
+        return datetime.fromtimestamp(at, self._zone).year
+
+
+class WallClock:
+    """Calendar stand-in for SLAs counted in plain elapsed time."""
+
+    def add_minutes(self, start: datetime, minutes: float) -> datetime:
+        return start + timedelta(minutes=minutes)
+
+    def minutes_between(self, start: datetime, end: datetime) -> float:
+        return (end - start).total_seconds() / 60
+
+
+WALL_CLOCK = WallClock()
+
+
+@lru_cache(maxsize=256)
+def get_calendar(spec: CalendarSpec) -> BusinessCalendar:
+    return BusinessCalendar(spec)
+
+
+@lru_cache(maxsize=256)
+def _compile_year(spec: CalendarSpec, year: int) -> _Year:
+    zone = ZoneInfo(spec.timezone)
+    starts: List[int] = []
+    ends: List[int] = []
+    before: List[int] = []
+    after: List[int] = []
+    worked = 0
+    day = date(year, 1, 1)
+    while day.year == year:
+        if day not in spec.holidays:
+            for opens, closes in spec.week[day.weekday()]:
+                start = _epoch(_local(day, opens, zone))
+                end = _epoch(_local(day, closes, zone))
+                if end <= start:  # swallowed by a DST jump
+                    continue
+                starts.append(start)
+                ends.append(end)
+                before.append(worked)
+                worked += end - start
+                after.append(worked)
+        day += timedelta(days=1)
+    return _Year(starts, ends, before, after)
+
+
+def _local(day: date, minutes: int, zone: ZoneInfo) -> datetime:
+    if minutes == 24 * 60:
+        return datetime.combine(day + timedelta(days=1), time(), zone)
+    return datetime.combine(day, time(minutes // 60, minutes % 60), zone)
+
+
+def _epoch(value: datetime) -> int:
+    return int(value.timestamp())
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
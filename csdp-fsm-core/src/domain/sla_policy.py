@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+import psycopg
+
+from src.domain import contracts_repo
+from src.domain.sla_calendar import WALL_CLOCK, CalendarSpec, get_calendar
+from src.storage import projections_repo
+
+
+@dataclass(frozen=True)
+class SlaPolicy:
+    """Contract SLA handed to fold with WORK_ORDER.CREATED: minutes counted in `calendar`."""
+
+    reaction_minutes: int
+    restore_minutes: Optional[int]
+    calendar_id: Optional[str] = None
+    calendar: Any = WALL_CLOCK
+
+
+def policy_for_event(conn: psycopg.Connection, event: Mapping[str, Any]) -> Optional[SlaPolicy]:
+    """SLA policy of the contract a WORK_ORDER.CREATED names, None for other events or without one."""
+    if event["event_type"] != "WORK_ORDER.CREATED":
+        return None
+    contract_id = event["payload"].get("contract_id")
+    if not contract_id:
+        return None
+    contract = contracts_repo.get_contract_by_id(conn, contract_id)
+    if contract is None:
+        return None
+    calendar_id = contract.get("calendar_id")
+    return SlaPolicy(
+        reaction_minutes=contract["reaction_minutes"],
+        restore_minutes=contract["restore_minutes"],
+        calendar_id=str(calendar_id) if calendar_id else None,
+        calendar=load_calendar(conn, calendar_id) if calendar_id else WALL_CLOCK,
+    )
+
+
+def load_calendar(conn: psycopg.Connection, calendar_id: Any) -> Any:
+    """Compiled calendar of an sla_calendars row; WALL_CLOCK when it does not exist.
+
+    Compilation is cached per calendar content, so an unchanged calendar costs one query.
+    """
+    row = projections_repo.fetch_sla_calendar(conn, calendar_id)
+    if row is None:
+        return WALL_CLOCK
+    return get_calendar(CalendarSpec.from_config(row["timezone"], row["week_hours"], row["holidays"]))
+
+
+def load_calendars(conn: psycopg.Connection, calendar_ids: Any) -> Dict[str, Any]:
+    return {str(calendar_id): load_calendar(conn, calendar_id) for calendar_id in set(calendar_ids) if calendar_id}
@@ -0,0 +1,101 @@
+"""Periodic SLA pass over open work orders: IN_SLA -> AT_RISK -> BREACHED.
+
+The pending deadline is reaction until work started, restore after. Remaining time is
+counted in the work order's SLA calendar, so a deadline after a weekend is not "at risk"
+on Friday evening.
+
+Each change is submitted as a system SLA.AT_RISK / SLA.RECOVERED / SLA.BREACHED event and
+goes through validation, event_store and apply_event like any other event, so the work
+order's sla_state, version, counters, sla_view and replay all follow it. The event pins
+the version the scan read: an order that moved in the meantime is skipped and picked up
+by the next pass.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import psycopg
+
+from src.domain.ingest import submit_event
+from src.domain.sla_calendar import WALL_CLOCK
+from src.domain.sla_policy import load_calendars
+from src.domain.validator import Actor
+
+# Working minutes before the pending deadline at which an order turns AT_RISK.
+AT_RISK_MINUTES = int(os.environ.get("SLA_AT_RISK_MINUTES", "60"))
+
+SCANNER_ACTOR = Actor(role="SYSTEM", actor_id=None)
+
+# Event moving the work order's sla_state to the state the scan computed.
+_SLA_EVENTS = {"AT_RISK": "SLA.AT_RISK", "IN_SLA": "SLA.RECOVERED", "BREACHED": "SLA.BREACHED"}
+
+# A deadline already missed on the event path (late start/completion) is final in sla_view:
+# the scan carries it over to the work order's sla_state.
+_OPEN_SLA_QUERY = """
+    SELECT w.work_order_id, w.version, w.sla_state, w.actual_start_effective,
+           s.state AS sla_view_state, s.calendar_id, s.reaction_deadline_at, s.restore_deadline_at
+    FROM work_orders_current w
+    JOIN sla_view s ON s.work_order_id = w.work_order_id
+    WHERE w.sla_state IN ('IN_SLA', 'AT_RISK')
+      AND w.business_state NOT IN ('COMPLETED', 'CLOSED', 'CANCELLED')
+"""
+
+
+def scan_sla(
+    conn: psycopg.Connection, now: Optional[datetime] = None, at_risk_minutes: int = AT_RISK_MINUTES
+) -> Dict[str, int]:
+    """Submit an SLA event for every open work order whose SLA state changed; counts per target state."""
+    now = now or datetime.now(timezone.utc)
+    with conn.cursor() as cur:
+        cur.execute(_OPEN_SLA_QUERY)
+        rows = cur.fetchall()
+    calendars = load_calendars(conn, [row["calendar_id"] for row in rows])
+
+    stats = {"scanned": len(rows), "IN_SLA": 0, "AT_RISK": 0, "BREACHED": 0, "skipped": 0}
+    for row in rows:
+        calendar = calendars.get(str(row["calendar_id"]), WALL_CLOCK)
+        if row["sla_view_state"] == "BREACHED":
+            state = "BREACHED"
+        else:
+            state = sla_state_at(row, now, calendar, at_risk_minutes)
+        if state is None or state == row["sla_state"]:
+            continue
+        result = submit_event(conn, _sla_event(row, state, now, calendar), SCANNER_ACTOR)
+        if result["decision"] == "ACCEPTED":
+            stats[state] += 1
+        else:
+            stats["skipped"] += 1
+    return stats
+
+
+def _sla_event(row: Dict[str, Any], state: str, now: datetime, calendar: Any) -> Dict[str, Any]:
+    # An open order breached on the event path started late: that breach is the reaction deadline.
+    restore = row["actual_start_effective"] is not None and row["sla_view_state"] != "BREACHED"
+    deadline_at = row["restore_deadline_at"] if restore else row["reaction_deadline_at"]
+    payload: Dict[str, Any] = {"metric": "RESTORE" if restore else "REACTION", "deadline_at": deadline_at.isoformat()}
+    if state == "AT_RISK":
+        payload["remaining_minutes"] = int(calendar.minutes_between(now, deadline_at))
+    elif state == "BREACHED":
+        payload["breached_at"] = deadline_at.isoformat()
+    return {
+        "event_type": _SLA_EVENTS[state],
+        "entity_type": "work_order",
+        "entity_id": str(row["work_order_id"]),
+        "source": "system",
+        "expected_version": row["version"],
+        "payload": payload,
+    }
+
+
+def sla_state_at(row: Dict[str, Any], now: datetime, calendar: Any, at_risk_minutes: int) -> Optional[str]:
+    """SLA state of an open work order at `now`; None when it has no pending deadline."""
+    deadline = row["restore_deadline_at"] if row["actual_start_effective"] else row["reaction_deadline_at"]
+    if deadline is None:
+        return None
+    if now > deadline:
+        return "BREACHED"
+    if calendar.minutes_between(now, deadline) <= at_risk_minutes:
+        return "AT_RISK"
+    return "IN_SLA"
@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import psycopg
+
+from src.domain import fold as f
+from src.domain.counters import counter_slot
+from src.domain.fold import WorkOrderState
+from src.storage.jsonb import as_jsonb
+
+_STATE_QUERY = """
+    SELECT w.*,
+           s.reaction_deadline_at,
+           s.restore_deadline_at,
+           s.calendar_id AS sla_calendar_id,
+           s.state AS sla_view_state
+    FROM work_orders_current w
+    LEFT JOIN sla_view s ON s.work_order_id = w.work_order_id
+    WHERE w.work_order_id = %s
+"""
+
+
+_VERSION_QUERY = """
+    SELECT version, last_event_id
+    FROM work_orders_current
+    WHERE work_order_id = %s
+"""
+
+
+class ConcurrencyConflict(Exception):
+    """The work order row is no longer at the version the event was folded from."""
+
+    def __init__(self, work_order_id: Any, expected_version: Optional[int]) -> None:
+        super().__init__(f"work order {work_order_id} is not at version {expected_version}")
+        self.work_order_id = work_order_id
+        self.expected_version = expected_version
+
+
+class StateCache:
+    """Per-process LRU of WorkOrderState keyed by work_order_id.
+
+    States are treated as immutable (fold copies before changing anything), so the cache
+    hands out shared instances. Entries are only a hint: load_state confirms them against
+    the row's (version, last_event_id) before use, which keeps several workers correct.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, WorkOrderState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, work_order_id: Any) -> Optional[WorkOrderState]:
+        key = str(work_order_id)
+        with self._lock:
+            state = self._entries.get(key)
+            if state is not None:
+                self._entries.move_to_end(key)
+            return state
+
+    def put(self, state: WorkOrderState) -> None:
+        if self.maxsize <= 0:
+            return
+        key = str(state.work_order_id)
+        with self._lock:
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, work_order_id: Any) -> None:
+        with self._lock:
+            self._entries.pop(str(work_order_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+state_cache = StateCache(int(os.environ.get("STATE_CACHE_SIZE", "10000")))
+
+
+def load_state(conn: psycopg.Connection, work_order_id: str) -> Optional[WorkOrderState]:
+    """Current state of a work order, served from state_cache when the row has not moved on.
+
+    A hit costs a single-row (version, last_event_id) probe instead of the projection + sla_view join.
+    """
+    cached = state_cache.get(work_order_id)
+    if cached is not None:
+        with conn.cursor() as cur:
+            cur.execute(_VERSION_QUERY, (work_order_id,))
+            row = cur.fetchone()
+        if row is None:
+            state_cache.invalidate(work_order_id)
+            return None
+        if _same_version(cached, row):
+            return cached
+
+    with conn.cursor() as cur:
+        cur.execute(_STATE_QUERY, (work_order_id,))
+        state = WorkOrderState.from_row(cur.fetchone())
+    if state is None:
+        state_cache.invalidate(work_order_id)
+    else:
+        state_cache.put(state)
+    return state
+
+
+def remember_state(state: WorkOrderState) -> None:
+    """Write-through after the state's effects were persisted on the current connection.
+
+    If the transaction rolls back, the row keeps its old (version, last_event_id) and the
+    next load_state drops the entry.
+    """
+    state_cache.put(state)
+
+
+def _same_version(state: WorkOrderState, row: Dict[str, Any]) -> bool:
+    return row["version"] == state.version and str(row["last_event_id"]) == str(state.last_event_id)
+
+
+def persist_effects(conn: psycopg.Connection, effects: Iterable[f.Effect]) -> None:
+    """Write fold side effects in order; runs of same-kind effects go out as one executemany.
+
+    Timeline rows are stamped with the change_seq the projection insert/update of the same
+    work order returned (other effects, e.g. the engineer board, draw from the same sequence).
+    """
+    batch: List[f.Effect] = []
+    change_seqs: Dict[str, int] = {}
+    for effect in effects:
+        if batch and effect[0] != batch[-1][0]:
+            _flush(conn, batch, change_seqs)
+            batch = []
+        batch.append(effect)
+    if batch:
+        _flush(conn, batch, change_seqs)
+
+
+def _flush(conn: psycopg.Connection, batch: List[f.Effect], change_seqs: Dict[str, int]) -> None:
+    kind = batch[0][0]
+    with conn.cursor() as cur:
+        if kind == f.INSERT_WORK_ORDER:
+            for _, work_order_id, state in batch:
+                cur.execute(_INSERT_WORK_ORDER, _insert_params(state))
+                row = cur.fetchone()
+                if row is None:
+                    raise ConcurrencyConflict(work_order_id, 0)
+                change_seqs[str(work_order_id)] = row["change_seq"]
+        elif kind == f.UPDATE_WORK_ORDER:
+            for _, work_order_id, (expected_version, changes) in batch:
+                change_seqs[str(work_order_id)] = _update_projection(cur, work_order_id, expected_version, changes)
+        elif kind == f.SLA_DEADLINES:
+            cur.executemany(
+                _UPSERT_SLA_DEADLINES,
+                [(wo_id, reaction, restore, calendar_id) for _, wo_id, (reaction, restore, calendar_id) in batch],
+            )
+        elif kind == f.SLA_BREACHED:
+            cur.executemany(_MARK_SLA_BREACHED, [(wo_id,) for _, wo_id, _ in batch])
+        elif kind == f.SLA_STATE:
+            cur.executemany(_UPSERT_SLA_STATE, [(wo_id, state) for _, wo_id, state in batch])
+        elif kind == f.SLA_DUE:
+            cur.executemany(_SET_SLA_DUE, [(due_at, wo_id) for _, wo_id, due_at in batch])
+        elif kind == f.COUNTERS:
+            # Sorted, so concurrent transactions lock counter rows in the same order.
+            rows = sorted((*delta[:4], counter_slot(wo_id), delta[4]) for _, wo_id, deltas in batch for delta in deltas)
+            cur.executemany(_ADD_COUNTER, rows)
+        elif kind == f.PARTS:
+            for _, wo_id, (qty_field, part_id, quantity) in batch:
+                cur.execute(_UPSERT_PARTS.format(qty_field=qty_field), (wo_id, part_id, quantity))
+        elif kind == f.EVIDENCE:
+            cur.executemany(
+                _INSERT_EVIDENCE,
+                [(wo_id, ev_type, url, as_jsonb(meta), created_by) for _, wo_id, (ev_type, url, meta, created_by) in batch],
+            )
+        elif kind == f.TIMELINE:
+            cur.executemany(
+                _INSERT_TIMELINE,
+                [
+                    (
+                        wo_id, event_id, event_id, event_type, created_at_system, created_by, as_jsonb(payload),
+                        change_seqs.get(str(wo_id)), wo_id,
+                    )
+                    for _, wo_id, (event_id, event_type, created_at_system, created_by, payload) in batch
+                ],
+            )
+        elif kind == f.ENGINEER_BOARD:
+            cur.executemany(
+                _UPSERT_ENGINEER_BOARD,
+                [(engineer_id, status, wo_id, team_id) for _, wo_id, (engineer_id, status, team_id) in batch],
+            )
+        elif kind == f.ENGINEER_POSITION:
+            cur.executemany(
+                _UPDATE_ENGINEER_POSITION,
+                [(lat, lon, at, engineer_id) for _, _, (engineer_id, lat, lon, at) in batch],
+            )
+        elif kind == f.ENGINEER_ASSIGNMENT:
+            for _, wo_id, (engineer_id, slot) in batch:
+                if engineer_id is None or slot is None:
+                    cur.execute(_DELETE_ENGINEER_ASSIGNMENT, (wo_id,))
+                else:
+                    cur.execute(_UPSERT_ENGINEER_ASSIGNMENT, (wo_id, engineer_id, slot[0], slot[1]))
+        elif kind == f.ENGINEER_HANDOVER:
+            for _, wo_id, (previous_engineer_id, engineer_id) in batch:
+                if previous_engineer_id:
+                    cur.execute(_UPSERT_SYNC_REMOVAL, (previous_engineer_id, wo_id))
+                if engineer_id:
+                    cur.execute(_DELETE_SYNC_REMOVAL, (engineer_id, wo_id))
+        else:
+            raise ValueError(f"Unknown effect kind: {kind}")
+
+
+def _update_projection(
+    cur: psycopg.Cursor, work_order_id: Any, expected_version: Optional[int], changes: Dict[str, Any]
+) -> int:
+    # Compare-and-set on version: a concurrent writer that committed first leaves no matching row.
+    params = projection_params(changes)
+    params["last_event_at"] = datetime.now(timezone.utc)
+    set_clause = ", ".join([f"{key} = %({key})s" for key in params.keys()])
+    query = f"""
+        UPDATE work_orders_current
+        SET {set_clause},
+            version = version + 1,
+            change_seq = nextval('projection_change_seq'),
+            change_xid = pg_current_xact_id()
+        WHERE work_order_id = %(work_order_id)s
+          AND version = %(expected_version)s
+        RETURNING change_seq
+    """
+    params["work_order_id"] = work_order_id
+    params["expected_version"] = expected_version
+    cur.execute(query, params)
+    row = cur.fetchone()
+    if row is None:
+        raise ConcurrencyConflict(work_order_id, expected_version)
+    return row["change_seq"]
+
+
+def projection_params(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values as query parameters: dicts (waiting_seconds) are bound as jsonb."""
+    return {key: as_jsonb(value) if isinstance(value, dict) else value for key, value in values.items()}
+
+
+def _insert_params(state: WorkOrderState) -> Dict[str, Any]:
+    return {
+        "work_order_id": state.work_order_id,
+        "client_id": state.client_id,
+        "asset_id": state.asset_id,
+        "priority": state.priority,
+        "work_type": state.work_type,
+        "last_event_id": state.last_event_id,
+    }
+
+
+_INSERT_WORK_ORDER = """
+    INSERT INTO work_orders_current (
+      work_order_id,
+      client_id,
+      asset_id,
+      priority,
+      work_type,
+      business_state,
+      execution_state,
+      sla_state,
+      last_event_id,
+      last_event_at,
+      version
+    ) VALUES (
+      %(work_order_id)s,
+      %(client_id)s,
+      %(asset_id)s,
+      %(priority)s,
+      %(work_type)s,
+      'NEW',
+      'NOT_STARTED',
+      'IN_SLA',
+      %(last_event_id)s,
+      now(),
+      1
+    )
+    ON CONFLICT (work_order_id) DO NOTHING
+    RETURNING change_seq
+"""
+
+_UPSERT_SLA_DEADLINES = """
+    INSERT INTO sla_view (work_order_id, reaction_deadline_at, restore_deadline_at, calendar_id, state, last_calc_at)
+    VALUES (%s, %s, %s, %s, 'IN_SLA', now())
+    ON CONFLICT (work_order_id)
+    DO UPDATE SET reaction_deadline_at = COALESCE(sla_view.reaction_deadline_at, EXCLUDED.reaction_deadline_at),
+                  restore_deadline_at = COALESCE(sla_view.restore_deadline_at, EXCLUDED.restore_deadline_at),
+                  calendar_id = COALESCE(sla_view.calendar_id, EXCLUDED.calendar_id),
+                  last_calc_at = EXCLUDED.last_calc_at
+"""
+
+_MARK_SLA_BREACHED = """
+    UPDATE sla_view
+    SET state = 'BREACHED',
+        breached_at = COALESCE(breached_at, now()),
+        last_calc_at = now()
+    WHERE work_order_id = %s
+"""
+
+_UPSERT_SLA_STATE = """
+    INSERT INTO sla_view (work_order_id, state, last_calc_at)
+    VALUES (%s, %s, now())
+    ON CONFLICT (work_order_id)
+    DO UPDATE SET state = EXCLUDED.state,
+                  breached_at = CASE WHEN EXCLUDED.state = 'BREACHED'
+                                     THEN COALESCE(sla_view.breached_at, now())
+                                     ELSE sla_view.breached_at END,
+                  last_calc_at = EXCLUDED.last_calc_at
+"""
+
+_SET_SLA_DUE = """
+    UPDATE sla_view
+    SET due_at = %s
+    WHERE work_order_id = %s
+"""
+
+_ADD_COUNTER = """
+    INSERT INTO work_order_counters (scope, scope_id, dimension, value, slot, count)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (scope, scope_id, dimension, value, slot)
+    DO UPDATE SET count = work_order_counters.count + EXCLUDED.count
+"""
+
+_UPSERT_PARTS = """
+    INSERT INTO work_order_parts (work_order_id, part_id, {qty_field}, last_event_at)
+    VALUES (%s, %s, %s, now())
+    ON CONFLICT (work_order_id, part_id)
+    DO UPDATE SET {qty_field} = work_order_parts.{qty_field} + EXCLUDED.{qty_field},
+                  last_event_at = now()
+"""
+
+_INSERT_EVIDENCE = """
+    INSERT INTO work_order_evidence (work_order_id, evidence_type, url, meta, created_by)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+_INSERT_TIMELINE = """
+    INSERT INTO work_order_timeline (
+      work_order_id,
+      event_id,
+      event_seq,
+      event_type,
+      created_at_system,
+      created_by,
+      payload,
+      change_seq
+    ) VALUES (
+      %s, %s, (SELECT event_seq FROM event_store WHERE event_id = %s), %s, COALESCE(%s, now()), %s, %s,
+      COALESCE(%s, (SELECT change_seq FROM work_orders_current WHERE work_order_id = %s))
+    )
+"""
+
+# Rows that would not change are left alone: no dead tuple, no change_seq bump, nothing for
+# board views to pick up.
+_UPSERT_ENGINEER_BOARD = """
+    INSERT INTO engineer_board (engineer_id, status, current_work_order_id, team_id, last_seen_at, change_seq)
+    VALUES (%s, %s, %s, %s, now(), nextval('projection_change_seq'))
+    ON CONFLICT (engineer_id)
+    DO UPDATE SET status = EXCLUDED.status,
+                  current_work_order_id = EXCLUDED.current_work_order_id,
+                  team_id = EXCLUDED.team_id,
+                  last_seen_at = EXCLUDED.last_seen_at,
+                  change_seq = EXCLUDED.change_seq,
+                  change_xid = pg_current_xact_id()
+    WHERE engineer_board.status IS DISTINCT FROM EXCLUDED.status
+       OR engineer_board.current_work_order_id IS DISTINCT FROM EXCLUDED.current_work_order_id
+       OR engineer_board.team_id IS DISTINCT FROM EXCLUDED.team_id
+"""
+
+_UPDATE_ENGINEER_POSITION = """
+    UPDATE engineer_board
+    SET last_lat = %s,
+        last_lon = %s,
+        last_position_at = COALESCE(%s, now()),
+        last_seen_at = now(),
+        change_seq = nextval('projection_change_seq'),
+        change_xid = pg_current_xact_id()
+    WHERE engineer_id = %s
+"""
+
+_UPSERT_ENGINEER_ASSIGNMENT = """
+    INSERT INTO engineer_assignments (work_order_id, engineer_id, during, updated_at)
+    VALUES (%s, %s, tstzrange(%s, %s, '[)'), now())
+    ON CONFLICT (work_order_id)
+    DO UPDATE SET engineer_id = EXCLUDED.engineer_id,
+                  during = EXCLUDED.during,
+                  updated_at = EXCLUDED.updated_at
+"""
+
+_DELETE_ENGINEER_ASSIGNMENT = "DELETE FROM engineer_assignments WHERE work_order_id = %s"
+
+_UPSERT_SYNC_REMOVAL = """
+    INSERT INTO engineer_sync_removals (engineer_id, work_order_id)
+    VALUES (%s, %s)
+    ON CONFLICT (engineer_id, work_order_id)
+    DO UPDATE SET change_seq = nextval('projection_change_seq'),
+                  change_xid = pg_current_xact_id()
+"""
+
+_DELETE_SYNC_REMOVAL = "DELETE FROM engineer_sync_removals WHERE engineer_id = %s AND work_order_id = %s"
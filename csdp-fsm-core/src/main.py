@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 
-from src.api import routes_engineers, routes_events, routes_kpi, routes_ref, routes_sla, routes_work_orders
+from src.api import routes_engineers, routes_events, routes_export, routes_kpi, routes_ref, routes_sla, routes_sync, routes_work_orders
 
 
 def create_app() -> FastAPI:
@@ -11,6 +11,8 @@ def create_app() -> FastAPI:
     app.include_router(routes_sla.router)
     app.include_router(routes_ref.router)
     app.include_router(routes_kpi.router)
+    app.include_router(routes_sync.router)
+    app.include_router(routes_export.router)
     return app
 
 
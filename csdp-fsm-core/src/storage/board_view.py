@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psycopg
+
+from src.storage import projections_repo
+from src.storage.geo_index import GridIndex
+
+class EngineerBoardView:
+    """In-memory copy of engineer_board, kept current from the (change_xid, change_seq) stream.
+
+    The first refresh loads the whole table; later ones read only rows after settled_key,
+    and at most once per refresh_interval, so polling clients are served from memory.
+    settled_key only moves over rows of finished transactions (see 021_board_watermark.sql):
+    newer rows are applied too but read again on the next refresh, so a transaction that
+    commits late is never skipped. settled_key is also the board version handed to clients.
+    Engineers with a known position are also kept in one grid index per status, so a
+    nearest() lookup for a status only scans engineers in that status.
+    """
+
+    def __init__(self, refresh_interval: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.refresh_interval = refresh_interval
+        self.settled_key: Tuple[int, int] = (0, 0)
+        self._clock = clock
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._ordered: Optional[List[Dict[str, Any]]] = None
+        self._positions: Dict[str, GridIndex] = {}
+        self._loaded = False
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def needs_refresh(self) -> bool:
+        return self._refreshed_at is None or self._clock() - self._refreshed_at >= self.refresh_interval
+
+    def refresh(self, conn: psycopg.Connection) -> None:
+        with self._lock:
+            now = self._clock()
+            if self._loaded:
+                rows = projections_repo.fetch_engineer_board_changes(conn, self.settled_key)
+            else:
+                rows = projections_repo.fetch_engineer_board(conn)
+                rows.sort(key=lambda row: (row["change_xid"], row["change_seq"]))
+            self._apply(rows)
+            self._loaded = True
+            self._refreshed_at = now
+
+    def items(
+        self,
+        status: Optional[str] = None,
+        team_id: Optional[str] = None,
+        since: Optional[Tuple[int, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Board rows ordered by engineer_id; with since only rows changed after that version.
+
+        Read settled_key before calling this: rows changed after it may be sent again, never skipped.
+        """
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = sorted(self._rows.values(), key=lambda row: str(row["engineer_id"]))
+            rows = self._ordered
+        if status is not None:
+            rows = [row for row in rows if row["status"] == status]
+        if team_id is not None:
+            rows = [row for row in rows if row.get("team_id") is not None and str(row["team_id"]) == team_id]
+        if since is not None:
+            rows = [row for row in rows if (row["change_xid"], row["change_seq"]) > since]
+        return rows
+
+    def nearest(
+        self, lat: float, lon: float, k: int, status: Optional[str] = None, max_km: Optional[float] = None
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """Up to k (distance_km, row) pairs closest to (lat, lon), optionally only engineers in status."""
+        with self._lock:
+            if status is not None:
+                indexes = [self._positions[status]] if status in self._positions else []
+            else:
+                indexes = list(self._positions.values())
+            matches = heapq.nsmallest(
+                k, (match for index in indexes for match in index.nearest(lat, lon, k, max_km=max_km))
+            )
+            return [(distance, self._rows[key]) for distance, key in matches]
+
+    def _apply(self, rows: List[Dict[str, Any]]) -> None:
+        settled = True
+        for row in rows:
+            settled = settled and row.pop("settled")
+            current = self._rows.get(str(row["engineer_id"]))
+            if current is None or current["change_seq"] != row["change_seq"]:
+                key = str(row["engineer_id"])
+                self._rows[key] = row
+                self._ordered = None
+                if current is not None and current["status"] != row["status"]:
+                    self._positions[current["status"]].remove(key)
+                positions = self._positions.setdefault(row["status"], GridIndex())
+                if row.get("last_lat") is not None and row.get("last_lon") is not None:
+                    positions.upsert(key, row["last_lat"], row["last_lon"])
+                else:
+                    positions.remove(key)
+            if settled:
+                self.settled_key = max(self.settled_key, (row["change_xid"], row["change_seq"]))
+
+
+board_view = EngineerBoardView(float(os.environ.get("BOARD_REFRESH_SECONDS", "1")))
@@ -1,8 +1,26 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 import psycopg
+from psycopg.rows import tuple_row
+
+from src.storage.jsonb import as_jsonb
+
+
+_INSERT_COLUMNS = (
+    "entity_type",
+    "entity_id",
+    "event_type",
+    "source",
+    "created_at_reported",
+    "client_event_id",
+    "idempotency_key",
+    "correlation_id",
+    "causation_id",
+    "schema_version",
+    "created_by",
+)
 
 
 def insert_event(conn: psycopg.Connection, event: Dict[str, Any]) -> tuple[str, bool]:
@@ -36,13 +54,17 @@ def insert_event(conn: psycopg.Connection, event: Dict[str, Any]) -> tuple[str,
         )
         RETURNING event_id
     """
+    params = {column: event.get(column) for column in _INSERT_COLUMNS}
+    # payload_json: the payload already serialized once by the caller (see jsonb.raw)
+    params["payload"] = as_jsonb(event.get("payload_json") or event["payload"])
+    params["schema_version"] = params["schema_version"] or 1
     try:
-        with conn.cursor() as cur:
-            cur.execute(query, event)
+        # Savepoint: a duplicate must not abort the caller's transaction.
+        with conn.transaction(), conn.cursor() as cur:
+            cur.execute(query, params)
             event_id = cur.fetchone()["event_id"]
         return event_id, False
     except psycopg.errors.UniqueViolation:
-        conn.rollback()
         event_id = _fetch_existing_event_id(conn, event)
         return event_id, True
 
@@ -76,3 +98,124 @@ def fetch_event_by_id(conn: psycopg.Connection, event_id: str) -> Optional[Dict[
         cur.execute(query, (event_id,))
         row = cur.fetchone()
     return row
+
+
+EXPORT_COLUMNS = (
+    "event_id",
+    "event_seq",
+    "entity_type",
+    "entity_id",
+    "event_type",
+    "payload",
+    "source",
+    "created_at_system",
+    "created_at_reported",
+    "client_event_id",
+    "idempotency_key",
+    "correlation_id",
+    "causation_id",
+    "schema_version",
+    "created_by",
+    "change_xid",
+)
+
+# change_xid is xid8 in the table; exports carry it as a number, like the cursor.
+_EXPORT_SELECT = ", ".join(
+    "change_xid::text::bigint AS change_xid" if column == "change_xid" else column for column in EXPORT_COLUMNS
+)
+
+
+def iter_export_ndjson(
+    conn: psycopg.Connection,
+    after: Optional[Tuple[int, int]] = None,
+    limit: Optional[int] = None,
+    batch_size: int = 5000,
+) -> Iterator[str]:
+    """Settled event_store rows after the (change_xid, event_seq) cursor, one JSON document per row.
+
+    JSON is rendered by Postgres and pulled through a server-side cursor, so each row costs a
+    single str on the Python side.
+    """
+    where, params = _export_where(after)
+    query = f"""
+        SELECT to_jsonb(e)::text
+        FROM (
+          SELECT {_EXPORT_SELECT}
+          FROM event_store
+          {where}
+          ORDER BY change_xid, event_seq
+          {"LIMIT %(limit)s" if limit else ""}
+        ) e
+    """
+    params["limit"] = limit
+    with conn.cursor(name="event_export", row_factory=tuple_row) as cur:
+        cur.itersize = batch_size
+        cur.execute(query, params)
+        for (line,) in cur:
+            yield line
+
+
+def iter_export_batches(
+    conn: psycopg.Connection,
+    after: Optional[Tuple[int, int]] = None,
+    limit: Optional[int] = None,
+    batch_size: int = 5000,
+) -> Iterator[str]:
+    """Columnar batches: one JSON document per batch_size rows, one array per column.
+
+    Each batch carries its last (change_xid, event_seq) for the next request's cursor.
+    Batches are keyset pages built entirely in SQL; each page takes the watermark of its
+    own statement, which only moves forward.
+    """
+    columns = ",\n".join(
+        f"'{column}', json_agg({column} ORDER BY change_xid, event_seq)" for column in EXPORT_COLUMNS
+    )
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        where, params = _export_where(after)
+        params["size"] = size
+        query = f"""
+            SELECT json_build_object(
+                     'count', count(*),
+                     'columns', json_build_object({columns}),
+                     'last', json_build_object('change_xid', max(change_xid), 'event_seq', max(last_seq))
+                   )::text AS batch,
+                   count(*) AS rows,
+                   max(change_xid) AS last_xid,
+                   max(last_seq) AS last_seq
+            FROM (
+              SELECT *,
+                     CASE WHEN row_number() OVER (ORDER BY change_xid DESC, event_seq DESC) = 1
+                          THEN event_seq END AS last_seq
+              FROM (
+                SELECT {_EXPORT_SELECT}
+                FROM event_store
+                {where}
+                ORDER BY change_xid, event_seq
+                LIMIT %(size)s
+              ) page
+            ) page
+        """
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            row = cur.fetchone()
+        if not row["rows"]:
+            return
+        yield row["batch"]
+        if row["rows"] < size:
+            return
+        after = (row["last_xid"], row["last_seq"])
+        if remaining is not None:
+            remaining -= row["rows"]
+
+
+def _export_where(after: Optional[Tuple[int, int]]) -> Tuple[str, Dict[str, Any]]:
+    # Only transactions older than the oldest one still running (see 020_export_watermark.sql);
+    # the sub-select is evaluated once, so the bound can use the index.
+    params: Dict[str, Any] = {}
+    where = "WHERE change_xid < (SELECT pg_snapshot_xmin(pg_current_snapshot()))"
+    if after is not None:
+        where += " AND (change_xid, event_seq) > (%(after_xid)s::text::xid8, %(after_seq)s)"
+        params["after_xid"], params["after_seq"] = after
+    return where, params
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+Cell = Tuple[int, int]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """Points bucketed into a lat/lon grid for k-nearest queries with cheap incremental updates.
+
+    A query scans rings of cells around the query point and stops as soon as no unscanned
+    cell can hold anything closer than the k-th best match, so the cost depends on the
+    density around the point, not on the total number of points.
+    """
+
+    def __init__(self, cell_degrees: float = 0.25) -> None:
+        self.cell_degrees = cell_degrees
+        self._lon_cells = int(math.ceil(360 / cell_degrees))
+        self._lat_cells = int(math.ceil(180 / cell_degrees))
+        self._cells: Dict[Cell, Dict[Hashable, Tuple[float, float]]] = {}
+        self._where: Dict[Hashable, Cell] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def upsert(self, key: Hashable, lat: float, lon: float) -> None:
+        cell = self._cell(lat, lon)
+        previous = self._where.get(key)
+        if previous is not None and previous != cell:
+            self._discard(key, previous)
+        self._cells.setdefault(cell, {})[key] = (lat, lon)
+        self._where[key] = cell
+
+    def remove(self, key: Hashable) -> None:
+        cell = self._where.pop(key, None)
+        if cell is not None:
+            self._discard(key, cell)
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int,
+        accept: Optional[Callable[[Hashable], bool]] = None,
+        max_km: Optional[float] = None,
+    ) -> List[Tuple[float, Hashable]]:
+        """Up to k (distance_km, key) pairs ordered by distance, skipping keys accept() rejects.
+
+        With max_km only points within that distance are returned and the scan stops there.
+        Once the rings have covered more cells than are occupied (a sparse index, or rings
+        that barely widen near the poles), the remaining occupied cells are swept directly,
+        so a query never costs more than about twice the occupied cells.
+        """
+        if k <= 0 or not self._where:
+            return []
+        center_y, center_x = self._cell(lat, lon)
+        best: List[Tuple[float, Any]] = []  # max-heap of the k closest, as (-distance, key)
+        visited: set = set()
+
+        def consider(bucket: Dict[Hashable, Tuple[float, float]]) -> None:
+            for key, (point_lat, point_lon) in bucket.items():
+                if accept is not None and not accept(key):
+                    continue
+                distance = haversine_km(lat, lon, point_lat, point_lon)
+                if max_km is not None and distance > max_km:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, key))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, key))
+
+        seen = 0
+        max_ring = max(self._lat_cells, self._lon_cells // 2)
+        for ring in range(max_ring + 1):
+            if len(visited) > len(self._cells):
+                for cell, bucket in self._cells.items():
+                    if cell not in visited:
+                        consider(bucket)
+                break
+            for cell in self._ring(center_y, center_x, ring):
+                if cell in visited:  # rings wider than the globe wrap onto scanned cells
+                    continue
+                visited.add(cell)
+                bucket = self._cells.get(cell)
+                if not bucket:
+                    continue
+                seen += len(bucket)
+                consider(bucket)
+            if seen == len(self._where):
+                break
+            bound = self._ring_bound_km(lat, ring)
+            if len(best) == k and -best[0][0] <= bound:
+                break
+            if max_km is not None and bound > max_km:
+                break
+        return sorted((-negative, key) for negative, key in best)
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        y = min(int((lat + 90) / self.cell_degrees), self._lat_cells - 1)
+        x = int(((lon + 180) % 360) / self.cell_degrees)
+        return y, x
+
+    def _ring(self, center_y: int, center_x: int, ring: int) -> List[Cell]:
+        if ring == 0:
+            return [(center_y, center_x)]
+        cells = set()
+        for dy in range(-ring, ring + 1):
+            y = center_y + dy
+            if not 0 <= y < self._lat_cells:
+                continue
+            steps = range(-ring, ring + 1) if abs(dy) == ring else (-ring, ring)
+            for dx in steps:
+                cells.add((y, (center_x + dx) % self._lon_cells))
+        return list(cells)
+
+    def _ring_bound_km(self, lat: float, ring: int) -> float:
+        # Lower bound on the distance to any cell outside rings 0..ring. East-west cells
+        # shrink with latitude, so use the narrowest parallel the scanned block reaches.
+        reach = ring * self.cell_degrees
+        widest_lat = min(90.0, abs(lat) + reach + self.cell_degrees)
+        return reach * KM_PER_DEGREE * min(1.0, math.cos(math.radians(widest_lat)))
+
+    def _discard(self, key: Hashable, cell: Cell) -> None:
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._cells[cell]
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+from psycopg.adapt import Loader
+from psycopg.types.json import Jsonb
+
+try:  # optional accelerator
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment
+    orjson = None
+
+
+class RawJSON(str):
+    """JSON text that is already serialized: written to jsonb as is, spliced into responses verbatim."""
+
+    __slots__ = ()
+
+
+def dumps(value: Any) -> Union[str, bytes]:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def raw(value: Any) -> RawJSON:
+    """Serialize once; the result can be bound to several jsonb parameters without re-encoding."""
+    if isinstance(value, RawJSON):
+        return value
+    data = dumps(value)
+    return RawJSON(data.decode("utf-8") if isinstance(data, bytes) else data)
+
+
+def as_jsonb(value: Any) -> Jsonb:
+    if isinstance(value, RawJSON):
+        return Jsonb(value, dumps=str)
+    return Jsonb(value, dumps=dumps)
+
+
+class RawJsonbLoader(Loader):
+    """Loads jsonb columns as RawJSON text instead of decoding them into dicts.
+
+    Register it on a cursor (cur.adapters.register_loader("jsonb", RawJsonbLoader)) for reads
+    whose JSON only goes back out to clients.
+    """
+
+    def load(self, data: Any) -> RawJSON:
+        return RawJSON(bytes(data).decode("utf-8"))
@@ -1,9 +1,19 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import psycopg
 
+from src.storage.jsonb import RawJsonbLoader
+
+
+def _raw_json_cursor(conn: psycopg.Connection, name: Optional[str] = None) -> psycopg.Cursor:
+    # Payload/meta columns only travel back to clients: keep them as JSON text (RawJSON).
+    cur = conn.cursor(name=name) if name else conn.cursor()
+    cur.adapters.register_loader("jsonb", RawJsonbLoader)
+    return cur
+
 
 def fetch_work_order(conn: psycopg.Connection, work_order_id: str) -> Optional[Dict[str, Any]]:
     query = "SELECT * FROM work_orders_current WHERE work_order_id = %s"
@@ -12,6 +22,13 @@ def fetch_work_order(conn: psycopg.Connection, work_order_id: str) -> Optional[D
         return cur.fetchone()
 
 
+def fetch_work_order_version(conn: psycopg.Connection, work_order_id: str) -> Optional[Dict[str, Any]]:
+    query = "SELECT version, last_event_id FROM work_orders_current WHERE work_order_id = %s"
+    with conn.cursor() as cur:
+        cur.execute(query, (work_order_id,))
+        return cur.fetchone()
+
+
 def list_work_orders(
     conn: psycopg.Connection,
     business_state: Optional[str],
@@ -47,17 +64,68 @@ def list_work_orders(
         return cur.fetchall()
 
 
-def fetch_timeline(conn: psycopg.Connection, work_order_id: str, limit: int) -> List[Dict[str, Any]]:
-    query = """
-        SELECT event_id, event_type, created_at_system, created_by, payload
+def fetch_timeline(
+    conn: psycopg.Connection,
+    work_order_id: str,
+    limit: int,
+    after: Optional[int] = None,
+    include_payload: bool = True,
+    payload_fields: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    query, params = _timeline_query(work_order_id, after, include_payload, payload_fields)
+    query += " LIMIT %(limit)s"
+    params["limit"] = limit
+    with _raw_json_cursor(conn) as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
+
+
+def iter_timeline(
+    conn: psycopg.Connection,
+    work_order_id: str,
+    after: Optional[int] = None,
+    include_payload: bool = True,
+    payload_fields: Optional[List[str]] = None,
+    batch_size: int = 500,
+) -> Iterator[Dict[str, Any]]:
+    # Server-side cursor: rows are pulled from Postgres in batches of batch_size,
+    # so memory stays flat no matter how long the timeline is.
+    query, params = _timeline_query(work_order_id, after, include_payload, payload_fields)
+    with _raw_json_cursor(conn, name="timeline_stream") as cur:
+        cur.itersize = batch_size
+        cur.execute(query, params)
+        yield from cur
+
+
+def _timeline_query(
+    work_order_id: str,
+    after: Optional[int],
+    include_payload: bool,
+    payload_fields: Optional[List[str]],
+) -> Tuple[str, Dict[str, Any]]:
+    params: Dict[str, Any] = {"work_order_id": work_order_id}
+    columns = "event_id, event_seq, event_type, created_at_system, created_by"
+    if payload_fields:
+        columns += """,
+               COALESCE(
+                 (SELECT jsonb_object_agg(key, value) FROM jsonb_each(payload) WHERE key = ANY(%(payload_fields)s)),
+                 '{}'::jsonb
+               ) AS payload"""
+        params["payload_fields"] = list(payload_fields)
+    elif include_payload:
+        columns += ", payload"
+    where = "work_order_id = %(work_order_id)s"
+    # event_seq, not created_at_system: events appended in one transaction share now().
+    if after is not None:
+        where += " AND event_seq > %(after_seq)s"
+        params["after_seq"] = after
+    query = f"""
+        SELECT {columns}
         FROM work_order_timeline
-        WHERE work_order_id = %s
-        ORDER BY created_at_system
-        LIMIT %s
+        WHERE {where}
+        ORDER BY event_seq
     """
-    with conn.cursor() as cur:
-        cur.execute(query, (work_order_id, limit))
-        return cur.fetchall()
+    return query, params
 
 
 def fetch_parts(conn: psycopg.Connection, work_order_id: str) -> List[Dict[str, Any]]:
@@ -79,18 +147,221 @@ def fetch_evidence(conn: psycopg.Connection, work_order_id: str) -> List[Dict[st
         WHERE work_order_id = %s
         ORDER BY created_at
     """
-    with conn.cursor() as cur:
+    with _raw_json_cursor(conn) as cur:
         cur.execute(query, (work_order_id,))
         return cur.fetchall()
 
 
+_WORK_ORDERS_BY_IDS = """
+    SELECT * FROM work_orders_current
+    WHERE work_order_id = ANY(%(ids)s::uuid[])
+"""
+
+_TIMELINES_BY_IDS = """
+    SELECT t.*
+    FROM unnest(%(ids)s::uuid[]) AS wo(work_order_id)
+    CROSS JOIN LATERAL (
+      SELECT work_order_id, event_id, event_seq, event_type, created_at_system, created_by, payload
+      FROM work_order_timeline
+      WHERE work_order_id = wo.work_order_id
+      ORDER BY event_seq
+      LIMIT %(limit)s
+    ) AS t
+"""
+
+_PARTS_BY_IDS = """
+    SELECT work_order_id, part_id, reserved_qty, installed_qty, consumed_qty, last_event_at
+    FROM work_order_parts
+    WHERE work_order_id = ANY(%(ids)s::uuid[])
+    ORDER BY work_order_id, part_id
+"""
+
+_EVIDENCE_BY_IDS = """
+    SELECT work_order_id, evidence_id, evidence_type, url, meta, created_at, created_by
+    FROM work_order_evidence
+    WHERE work_order_id = ANY(%(ids)s::uuid[])
+    ORDER BY work_order_id, created_at
+"""
+
+_SLA_VIEWS_BY_IDS = """
+    SELECT * FROM sla_view
+    WHERE work_order_id = ANY(%(ids)s::uuid[])
+"""
+
+
+def fetch_work_orders(
+    conn: psycopg.Connection,
+    work_order_ids: List[str],
+    since_versions: Optional[Dict[str, int]] = None,
+) -> List[Dict[str, Any]]:
+    """Current projections for many ids in one primary-key probe per id.
+
+    With since_versions, rows whose version is not newer than the caller's copy are skipped.
+    """
+    if not since_versions:
+        with conn.cursor() as cur:
+            cur.execute(_WORK_ORDERS_BY_IDS, {"ids": work_order_ids})
+            return cur.fetchall()
+    query = """
+        SELECT w.*
+        FROM unnest(%(ids)s::uuid[], %(versions)s::bigint[]) AS req(work_order_id, since_version)
+        JOIN work_orders_current w ON w.work_order_id = req.work_order_id
+        WHERE req.since_version IS NULL OR w.version > req.since_version
+    """
+    params = {"ids": work_order_ids, "versions": [since_versions.get(wo_id) for wo_id in work_order_ids]}
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
+
+
+def fetch_work_order_bundles(
+    conn: psycopg.Connection, work_order_ids: List[str], timeline_limit: int
+) -> List[Dict[str, Any]]:
+    """Everything a client needs to open work orders, in input order; unknown ids are skipped.
+
+    The five section queries are sent in one pipeline, so the cost is one round trip
+    in one transaction regardless of how many work orders are requested.
+    """
+    params = {"ids": work_order_ids, "limit": timeline_limit}
+    queries = (_WORK_ORDERS_BY_IDS, _TIMELINES_BY_IDS, _PARTS_BY_IDS, _EVIDENCE_BY_IDS, _SLA_VIEWS_BY_IDS)
+    with conn.pipeline():
+        cursors = []
+        for query in queries:
+            cur = _raw_json_cursor(conn)
+            cur.execute(query, params)
+            cursors.append(cur)
+        work_orders, timelines, parts, evidence, sla_views = [cur.fetchall() for cur in cursors]
+    for cur in cursors:
+        cur.close()
+
+    bundles: Dict[Any, Dict[str, Any]] = {
+        row["work_order_id"]: {"work_order": row, "timeline": [], "parts": [], "evidence": [], "sla": None}
+        for row in work_orders
+    }
+    for section, rows in (("timeline", timelines), ("parts", parts), ("evidence", evidence)):
+        for row in rows:
+            bundle = bundles.get(row.pop("work_order_id"))
+            if bundle is not None:
+                bundle[section].append(row)
+    for row in sla_views:
+        if row["work_order_id"] in bundles:
+            bundles[row["work_order_id"]]["sla"] = row
+    by_text = {str(key): bundle for key, bundle in bundles.items()}
+    return [by_text[wo_id] for wo_id in work_order_ids if wo_id in by_text]
+
+
+# Rows of transactions that finished before the oldest one still running: nothing can commit
+# behind them any more (see 019_sync_watermark.sql).
+SETTLED = "change_xid < pg_snapshot_xmin(pg_current_snapshot())"
+
+
+def fetch_engineer_changes(
+    conn: psycopg.Connection, engineer_id: str, after: Tuple[int, int], limit: int
+) -> List[Dict[str, Any]]:
+    """Work orders of the engineer changed, or taken from them, after the (change_xid, change_seq) cursor.
+
+    Removals come as rows with removed = true and only the work order id. One statement, so
+    both share a snapshot; rows not yet settled sort last.
+    """
+    query = f"""
+        SELECT work_order_id, version, change_xid::text::bigint AS change_xid, change_seq,
+               {SETTLED} AS settled, FALSE AS removed, last_event_at,
+               client_id, asset_id, priority, work_type,
+               business_state, execution_state, sla_state,
+               scheduled_start, scheduled_end, actual_start_effective, actual_end_effective
+        FROM work_orders_current
+        WHERE assigned_engineer_id = %(engineer_id)s
+          AND (change_xid, change_seq) > (%(after_xid)s::text::xid8, %(after_seq)s)
+        UNION ALL
+        SELECT work_order_id, NULL, change_xid::text::bigint, change_seq,
+               {SETTLED}, TRUE, NULL,
+               NULL, NULL, NULL, NULL,
+               NULL, NULL, NULL,
+               NULL, NULL, NULL, NULL
+        FROM engineer_sync_removals
+        WHERE engineer_id = %(engineer_id)s
+          AND (change_xid, change_seq) > (%(after_xid)s::text::xid8, %(after_seq)s)
+        ORDER BY change_xid, change_seq
+        LIMIT %(limit)s
+    """
+    params = {"engineer_id": engineer_id, "after_xid": after[0], "after_seq": after[1], "limit": limit}
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
+
+
+def fetch_timeline_changes(
+    conn: psycopg.Connection, work_order_ids: List[Any], after: Tuple[int, int]
+) -> List[Dict[str, Any]]:
+    query = """
+        SELECT work_order_id, event_id, event_type, created_at_system, payload
+        FROM work_order_timeline
+        WHERE work_order_id = ANY(%s::uuid[]) AND (change_xid, change_seq) > (%s::text::xid8, %s)
+        ORDER BY work_order_id, event_seq
+    """
+    with _raw_json_cursor(conn) as cur:
+        cur.execute(query, ([str(wo_id) for wo_id in work_order_ids], *after))
+        return cur.fetchall()
+
+
+def fetch_engineer_schedule(
+    conn: psycopg.Connection,
+    engineer_id: str,
+    window_from: datetime,
+    window_to: datetime,
+) -> List[Dict[str, Any]]:
+    """Assignments of the engineer overlapping [window_from, window_to), by start time.
+
+    One probe of the (engineer_id, during) GiST index: cost grows with the number of
+    matching slots, not with the engineer's whole history.
+    """
+    query = """
+        SELECT a.work_order_id,
+               lower(a.during) AS scheduled_start,
+               upper(a.during) AS scheduled_end,
+               w.business_state, w.execution_state, w.priority, w.work_type
+        FROM engineer_assignments a
+        LEFT JOIN work_orders_current w ON w.work_order_id = a.work_order_id
+        WHERE a.engineer_id = %(engineer_id)s
+          AND a.during && tstzrange(%(window_from)s, %(window_to)s, '[)')
+        ORDER BY lower(a.during), a.work_order_id
+    """
+    params = {
+        "engineer_id": engineer_id,
+        "window_from": window_from,
+        "window_to": window_to,
+    }
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
+
+
+_BOARD_SELECT = f"""
+    SELECT engineer_id, status, current_work_order_id, team_id, last_seen_at,
+           last_lat, last_lon, last_position_at,
+           change_xid::text::bigint AS change_xid, change_seq, {SETTLED} AS settled
+    FROM engineer_board
+"""
+
+
 def fetch_engineer_board(conn: psycopg.Connection) -> List[Dict[str, Any]]:
-    query = "SELECT * FROM engineer_board ORDER BY engineer_id"
+    query = _BOARD_SELECT + " ORDER BY engineer_id"
     with conn.cursor() as cur:
         cur.execute(query)
         return cur.fetchall()
 
 
+def fetch_engineer_board_changes(conn: psycopg.Connection, after: Tuple[int, int]) -> List[Dict[str, Any]]:
+    """Board rows changed after the (change_xid, change_seq) cursor; rows not yet settled sort last."""
+    query = _BOARD_SELECT + """
+        WHERE (change_xid, change_seq) > (%s::text::xid8, %s)
+        ORDER BY change_xid, change_seq
+    """
+    with conn.cursor() as cur:
+        cur.execute(query, after)
+        return cur.fetchall()
+
+
 def fetch_sla_view(conn: psycopg.Connection, work_order_id: str) -> Optional[Dict[str, Any]]:
     query = "SELECT * FROM sla_view WHERE work_order_id = %s"
     with conn.cursor() as cur:
@@ -98,6 +369,81 @@ def fetch_sla_view(conn: psycopg.Connection, work_order_id: str) -> Optional[Dic
         return cur.fetchone()
 
 
+def fetch_work_order_counts(conn: psycopg.Connection, scope: str, scope_id: str) -> List[Dict[str, Any]]:
+    """(dimension, value, count) of one counter scope: a primary-key range of work_order_counters."""
+    query = """
+        SELECT dimension, value, sum(count)::bigint AS count
+        FROM work_order_counters
+        WHERE scope = %s AND scope_id = %s
+        GROUP BY dimension, value
+        HAVING sum(count) <> 0
+        ORDER BY dimension, value
+    """
+    with conn.cursor() as cur:
+        cur.execute(query, (scope, scope_id))
+        return cur.fetchall()
+
+
+# The state filter is spliced in as a literal so every plan, generic ones for prepared
+# statements included, can prove the partial index predicate (016_sla_risk_board.sql).
+_SLA_BOARD_STATES = {
+    None: "s.state IN ('IN_SLA', 'AT_RISK')",
+    "IN_SLA": "s.state = 'IN_SLA'",
+    "AT_RISK": "s.state = 'AT_RISK'",
+}
+
+
+def fetch_sla_board(
+    conn: psycopg.Connection,
+    state: Optional[str],
+    limit: int,
+    due_before: Optional[datetime] = None,
+    after: Optional[Tuple[Any, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Open work orders by nearest pending deadline, with their projection fields.
+
+    Walks a partial (due_at, work_order_id) index and probes work_orders_current by primary
+    key for each row returned, so the cost depends on limit, not on the number of open orders.
+    """
+    clauses = [_SLA_BOARD_STATES[state], "s.due_at IS NOT NULL"]
+    params: Dict[str, Any] = {"limit": limit}
+    if due_before is not None:
+        clauses.append("s.due_at < %(due_before)s")
+        params["due_before"] = due_before
+    if after:
+        clauses.append("(s.due_at, s.work_order_id) > (%(after_at)s::timestamptz, %(after_id)s::uuid)")
+        params["after_at"], params["after_id"] = after
+    query = f"""
+        SELECT s.work_order_id, s.state, s.due_at, s.reaction_deadline_at, s.restore_deadline_at,
+               s.calendar_id, s.last_calc_at,
+               w.client_id, w.asset_id, w.priority, w.work_type, w.business_state, w.execution_state,
+               w.assigned_engineer_id, w.assigned_team_id, w.scheduled_start, w.actual_start_effective
+        FROM sla_view s
+        JOIN work_orders_current w ON w.work_order_id = s.work_order_id
+        WHERE {" AND ".join(clauses)}
+        ORDER BY s.due_at, s.work_order_id
+        LIMIT %(limit)s
+    """
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
+
+
+def fetch_sla_calendar(conn: psycopg.Connection, calendar_id: Any) -> Optional[Dict[str, Any]]:
+    """sla_calendars row with its holidays as a list of dates."""
+    query = """
+        SELECT c.*,
+               COALESCE(array_agg(h.day ORDER BY h.day) FILTER (WHERE h.day IS NOT NULL), '{}') AS holidays
+        FROM sla_calendars c
+        LEFT JOIN sla_calendar_holidays h ON h.calendar_id = c.calendar_id
+        WHERE c.calendar_id = %s
+        GROUP BY c.calendar_id
+    """
+    with conn.cursor() as cur:
+        cur.execute(query, (calendar_id,))
+        return cur.fetchone()
+
+
 def list_ref_catalog(conn: psycopg.Connection, catalog: str, active_only: bool) -> List[Dict[str, Any]]:
     if active_only:
         query = """
@@ -19,12 +19,35 @@ def _db_url() -> str:
 
 def _apply_migrations(conn: psycopg.Connection) -> None:
     migrations_dir = ROOT / "migrations"
-    for name in ["001_event_store.sql", "002_projections.sql", "003_add_missing_tables.sql"]:
+    for name in [
+        "001_event_store.sql",
+        "002_projections.sql",
+        "003_add_missing_tables.sql",
+        "005_timeline_keyset.sql",
+        "006_change_seq.sql",
+        "007_event_export.sql",
+        "008_engineer_board_changes.sql",
+        "009_engineer_position.sql",
+        "010_engineer_assignments.sql",
+        "014_work_order_pauses.sql",
+        "015_sla_calendars.sql",
+        "016_sla_risk_board.sql",
+        "017_work_order_counters.sql",
+        "018_event_seq.sql",
+        "019_sync_watermark.sql",
+        "020_export_watermark.sql",
+        "021_board_watermark.sql",
+    ]:
         sql = (migrations_dir / name).read_text(encoding="utf-8")
         with conn.cursor() as cur:
             cur.execute(sql)
 
 
+@pytest.fixture()
+def db_url() -> str:
+    return _db_url()
+
+
 @pytest.fixture()
 def db_conn():
     conn = psycopg.connect(_db_url(), row_factory=dict_row)
@@ -33,6 +56,10 @@ def db_conn():
     conn.execute("GRANT ALL ON SCHEMA public TO public")
     _apply_migrations(conn)
     conn.commit()
+    # The schema is recreated per test; cached work order states from earlier tests are meaningless.
+    from src.domain.state_store import state_cache
+
+    state_cache.clear()
     try:
         yield conn
     finally:
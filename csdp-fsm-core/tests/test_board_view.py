@@ -0,0 +1,57 @@
+from src.storage import board_view as board_view_module
+from src.storage.board_view import EngineerBoardView
+
+def _row(engineer_id, status, xid, seq, team_id=None, settled=True):
+    return {
+        "engineer_id": engineer_id,
+        "status": status,
+        "current_work_order_id": None,
+        "team_id": team_id,
+        "change_xid": xid,
+        "change_seq": seq,
+        "settled": settled,
+    }
+
+
+def test_board_view_loads_once_then_applies_changes(monkeypatch):
+    table = [_row("e-2", "WORK", 10, 2, team_id="t-1"), _row("e-1", "AVAILABLE", 10, 1, team_id="t-2")]
+    calls = []
+
+    def fetch_board(conn):
+        calls.append("full")
+        return [dict(row) for row in table]
+
+    def fetch_changes(conn, after):
+        calls.append(("delta", after))
+        rows = [dict(row) for row in table if (row["change_xid"], row["change_seq"]) > after]
+        return sorted(rows, key=lambda row: (row["change_xid"], row["change_seq"]))
+
+    monkeypatch.setattr(board_view_module.projections_repo, "fetch_engineer_board", fetch_board)
+    monkeypatch.setattr(board_view_module.projections_repo, "fetch_engineer_board_changes", fetch_changes)
+    now = [0.0]
+    view = EngineerBoardView(refresh_interval=1.0, clock=lambda: now[0])
+
+    assert view.needs_refresh()
+    view.refresh(None)
+    assert [row["engineer_id"] for row in view.items()] == ["e-1", "e-2"]
+    assert [row["engineer_id"] for row in view.items(status="WORK")] == ["e-2"]
+    assert [row["engineer_id"] for row in view.items(team_id="t-2")] == ["e-1"]
+    assert view.settled_key == (10, 2)
+    assert not view.needs_refresh()
+
+    # e-3 comes from a transaction still running, which may be followed by lower keys
+    table[1] = _row("e-1", "TRAVEL", 11, 4)
+    table.append(_row("e-3", "WORK", 12, 3, settled=False))
+    now[0] = 1.5
+    view.refresh(None)
+    assert calls == ["full", ("delta", (10, 2))]
+    assert [row["status"] for row in view.items()] == ["TRAVEL", "WORK", "WORK"]
+    assert view.settled_key == (11, 4)
+    assert [row["engineer_id"] for row in view.items(since=(10, 2))] == ["e-1", "e-3"]
+
+    # once settled, e-3 is read again and the cursor moves past it despite its lower change_seq
+    table[2] = _row("e-3", "WORK", 12, 3)
+    now[0] = 3.0
+    view.refresh(None)
+    assert calls[-1] == ("delta", (11, 4))
+    assert view.settled_key == (12, 3)
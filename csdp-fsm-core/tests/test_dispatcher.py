@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from src.domain.dispatcher import IngestDispatcher, QueueFull
+
+
+def test_events_of_one_entity_are_handled_in_order_on_one_worker():
+    seen = []
+
+    def handler(envelope, actor):
+        seen.append((envelope["entity_id"], envelope["seq"], threading.current_thread().name))
+        return {"decision": "ACCEPTED", "seq": envelope["seq"]}
+
+    dispatcher = IngestDispatcher(handler, shards=4, queue_size=100)
+    futures = [
+        dispatcher.submit({"entity_id": f"wo-{seq % 3}", "seq": seq}, None)
+        for seq in range(30)
+    ]
+    assert [future.result(timeout=5)["seq"] for future in futures] == list(range(30))
+    dispatcher.stop(timeout=5)
+
+    for entity_id in ("wo-0", "wo-1", "wo-2"):
+        handled = [(seq, thread) for entity, seq, thread in seen if entity == entity_id]
+        assert [seq for seq, _ in handled] == sorted(seq for seq, _ in handled)
+        assert len({thread for _, thread in handled}) == 1
+
+
+def test_full_shard_raises_queue_full_and_errors_reach_the_caller():
+    release = threading.Event()
+
+    def handler(envelope, actor):
+        release.wait(5)
+        if envelope.get("boom"):
+            raise RuntimeError("boom")
+        return {"decision": "ACCEPTED"}
+
+    dispatcher = IngestDispatcher(handler, shards=1, queue_size=1, retry_after=3)
+    first = dispatcher.submit({"entity_id": "wo-1", "boom": True}, None)
+    # wait until the worker picked up the first item, leaving the queue empty
+    while dispatcher.depths() != [0]:
+        pass
+    dispatcher.submit({"entity_id": "wo-1"}, None)
+    with pytest.raises(QueueFull) as excinfo:
+        dispatcher.submit({"entity_id": "wo-2"}, None)
+    assert excinfo.value.retry_after == 3
+
+    release.set()
+    with pytest.raises(RuntimeError):
+        first.result(timeout=5)
+    dispatcher.stop(timeout=5)
@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta, timezone
 
+import pytest
+
 from src.domain.apply_event import apply_event
+from src.domain.ingest import submit_event
+from src.domain.state_store import ConcurrencyConflict, load_state
 from src.domain.validator import Actor, validate_event
-from src.storage import event_store_repo
+from src.storage import event_store_repo, projections_repo
 
 
 def _submit_event(conn, envelope, actor):
@@ -623,3 +627,115 @@ def test_sla_breach_on_late_start(db_conn):
         row = cur.fetchone()
     assert row["state"] == "BREACHED"
     assert row["breached_at"] is not None
+
+
+def _create_work_order(conn, work_order_id):
+    created = _base_envelope("WORK_ORDER.CREATED", work_order_id)
+    created["payload"] = {
+        "client_id": "00000000-0000-0000-0000-000000000341",
+        "asset_id": "00000000-0000-0000-0000-000000000342",
+        "priority": "HIGH",
+        "type": "MAINTENANCE",
+        "description": "test",
+    }
+    return submit_event(conn, created, Actor(role="DISPATCHER", actor_id=None))
+
+
+def test_expected_version_conflict(db_conn):
+    dispatcher = Actor(role="DISPATCHER", actor_id=None)
+    work_order_id = "00000000-0000-0000-0000-000000000340"
+    result = _create_work_order(db_conn, work_order_id)
+    assert (result["decision"], result["reason_code"]) == ("ACCEPTED", "OK")
+
+    stale = _base_envelope("WORK_ORDER.ASSIGNED", work_order_id)
+    stale["payload"] = {
+        "engineer_id": "00000000-0000-0000-0000-000000000343",
+        "scheduled_start": "2026-01-27T09:00:00Z",
+        "scheduled_end": "2026-01-27T11:00:00Z",
+    }
+    stale["expected_version"] = 0
+    result = submit_event(db_conn, stale, dispatcher)
+    assert (result["decision"], result["reason_code"]) == ("REJECTED", "ERR_VERSION_CONFLICT")
+    assert result["details"] == {"expected_version": 0, "current_version": 1}
+
+    stale["expected_version"] = 1
+    result = submit_event(db_conn, stale, dispatcher)
+    assert (result["decision"], result["reason_code"]) == ("ACCEPTED", "OK")
+    assert _fetch_projection(db_conn, work_order_id)["version"] == 2
+
+
+def test_projection_update_is_compare_and_set(db_conn):
+    work_order_id = "00000000-0000-0000-0000-000000000344"
+    result = _create_work_order(db_conn, work_order_id)
+    assert (result["decision"], result["reason_code"]) == ("ACCEPTED", "OK")
+    state = load_state(db_conn, work_order_id)
+
+    # Another writer commits an event for the same work order after we read the state.
+    db_conn.execute("UPDATE work_orders_current SET version = version + 1 WHERE work_order_id = %s", (work_order_id,))
+
+    assigned = _base_envelope("WORK_ORDER.ASSIGNED", work_order_id)
+    assigned["payload"] = {
+        "engineer_id": "00000000-0000-0000-0000-000000000343",
+        "scheduled_start": "2026-01-27T09:00:00Z",
+        "scheduled_end": "2026-01-27T11:00:00Z",
+    }
+    assigned["event_id"] = "00000000-0000-0000-0000-000000000345"
+    with pytest.raises(ConcurrencyConflict):
+        apply_event(db_conn, assigned, state)
+
+
+def _assign(conn, work_order_id, engineer_id, start, end):
+    assigned = _base_envelope("WORK_ORDER.ASSIGNED", work_order_id)
+    assigned["payload"] = {"engineer_id": engineer_id, "scheduled_start": start, "scheduled_end": end}
+    return submit_event(conn, assigned, Actor(role="DISPATCHER", actor_id=None))
+
+
+def test_overlapping_assignment_needs_review(db_conn):
+    engineer_id = "00000000-0000-0000-0000-000000000350"
+    first_id = "00000000-0000-0000-0000-000000000351"
+    second_id = "00000000-0000-0000-0000-000000000352"
+    for work_order_id in (first_id, second_id):
+        result = _create_work_order(db_conn, work_order_id)
+        assert (result["decision"], result["reason_code"]) == ("ACCEPTED", "OK")
+    result = _assign(db_conn, first_id, engineer_id, "2026-03-02T08:00:00Z", "2026-03-02T11:00:00Z")
+    assert (result["decision"], result["reason_code"]) == ("ACCEPTED", "OK")
+
+    result = _assign(db_conn, second_id, engineer_id, "2026-03-02T10:30:00Z", "2026-03-02T12:00:00Z")
+    assert (result["decision"], result["reason_code"]) == ("NEEDS_REVIEW", "REV_SCHEDULE_CONFLICT")
+    assert [conflict["work_order_id"] for conflict in result["details"]["conflicts"]] == [first_id]
+
+    # Back-to-back slots do not overlap.
+    result = _assign(db_conn, second_id, engineer_id, "2026-03-02T11:00:00Z", "2026-03-02T12:00:00Z")
+    assert (result["decision"], result["reason_code"]) == ("ACCEPTED", "OK")
+
+    schedule = projections_repo.fetch_engineer_schedule(
+        db_conn,
+        engineer_id,
+        datetime(2026, 3, 2, tzinfo=timezone.utc),
+        datetime(2026, 3, 3, tzinfo=timezone.utc),
+    )
+    assert [str(row["work_order_id"]) for row in schedule] == [first_id, second_id]
+    assert schedule[0]["scheduled_start"] == datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+
+    cancelled = _base_envelope("WORK_ORDER.CANCELLED", first_id)
+    cancelled["payload"] = {"reason_code": "CLIENT_REQUEST"}
+    result = submit_event(db_conn, cancelled, Actor(role="DISPATCHER", actor_id=None))
+    assert (result["decision"], result["reason_code"]) == ("ACCEPTED", "OK")
+    schedule = projections_repo.fetch_engineer_schedule(
+        db_conn,
+        engineer_id,
+        datetime(2026, 3, 2, tzinfo=timezone.utc),
+        datetime(2026, 3, 3, tzinfo=timezone.utc),
+    )
+    assert [str(row["work_order_id"]) for row in schedule] == [second_id]
+
+
+def test_assignment_ending_before_it_starts_is_rejected(db_conn):
+    work_order_id = "00000000-0000-0000-0000-000000000353"
+    result = _create_work_order(db_conn, work_order_id)
+    assert (result["decision"], result["reason_code"]) == ("ACCEPTED", "OK")
+
+    engineer_id = "00000000-0000-0000-0000-000000000354"
+    result = _assign(db_conn, work_order_id, engineer_id, "2026-03-02T11:00:00Z", "2026-03-02T09:00:00Z")
+    assert (result["decision"], result["reason_code"]) == ("REJECTED", "ERR_GUARD_FAILED")
+    assert _fetch_projection(db_conn, work_order_id)["business_state"] == "NEW"
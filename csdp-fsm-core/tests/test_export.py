@@ -0,0 +1,71 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from src.storage import event_store_repo
+
+WORK_ORDER_ID = "00000000-0000-0000-0000-000000000371"
+
+
+def _insert(conn, n, created_at_system):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO event_store (entity_type, entity_id, event_type, payload, source, created_at_system)
+            VALUES ('work_order', %s, 'EVIDENCE.PHOTO_ADDED', %s::jsonb, 'api', %s)
+            """,
+            (WORK_ORDER_ID, json.dumps({"n": n}), created_at_system),
+        )
+
+
+def _seed(conn, count):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for index in range(count):
+        _insert(conn, index, start + timedelta(minutes=index // 2))
+    conn.commit()
+    # one event of a transaction still in flight is held back
+    _insert(conn, -1, datetime.now(timezone.utc))
+
+
+def test_ndjson_export_resumes_from_cursor(db_conn):
+    _seed(db_conn, 7)
+
+    first = [json.loads(line) for line in event_store_repo.iter_export_ndjson(db_conn, limit=4, batch_size=2)]
+    assert len(first) == 4
+    after = (first[-1]["change_xid"], first[-1]["event_seq"])
+    rest = [json.loads(line) for line in event_store_repo.iter_export_ndjson(db_conn, after)]
+
+    exported = first + rest
+    assert [event["payload"]["n"] for event in exported] == list(range(7))
+    keys = [(event["change_xid"], event["event_seq"]) for event in exported]
+    assert keys == sorted(keys)
+
+
+def test_columnar_batches_carry_their_cursor(db_conn):
+    _seed(db_conn, 7)
+
+    batches = [json.loads(batch) for batch in event_store_repo.iter_export_batches(db_conn, batch_size=3)]
+    assert [batch["count"] for batch in batches] == [3, 3, 1]
+    assert sorted(n for batch in batches for n in (p["n"] for p in batch["columns"]["payload"])) == list(range(7))
+
+    last = batches[0]["last"]
+    assert last["event_seq"] == batches[0]["columns"]["event_seq"][-1]
+    resumed = [
+        json.loads(batch)
+        for batch in event_store_repo.iter_export_batches(db_conn, (last["change_xid"], last["event_seq"]), batch_size=10)
+    ]
+    assert resumed[0]["count"] == 4
+
+
+def test_backdated_event_committed_after_cursor_is_exported(db_conn):
+    _seed(db_conn, 3)
+    exported = [json.loads(line) for line in event_store_repo.iter_export_ndjson(db_conn)]
+    assert [event["payload"]["n"] for event in exported] == [0, 1, 2]
+    after = (exported[-1]["change_xid"], exported[-1]["event_seq"])
+
+    # An import backdates created_at_system to before everything already exported.
+    db_conn.rollback()
+    _insert(db_conn, 99, datetime(2020, 1, 1, tzinfo=timezone.utc))
+    db_conn.commit()
+
+    resumed = [json.loads(line) for line in event_store_repo.iter_export_ndjson(db_conn, after)]
+    assert [event["payload"]["n"] for event in resumed] == [99]
@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.domain import fold as f
+from src.domain.fold import TransitionRejected, fold
+from src.domain.sla_calendar import CalendarSpec, get_calendar
+from src.domain.sla_policy import SlaPolicy
+
+T0 = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def _event(event_type, payload, minutes=0, **extra):
+    at = T0 + timedelta(minutes=minutes)
+    event = {
+        "event_id": f"{event_type}-{minutes}",
+        "entity_id": "wo-1",
+        "event_type": event_type,
+        "payload": payload,
+        "created_at_system": at,
+        "created_at_reported": at,
+        "created_by": "dispatcher-1",
+        "effective_time": at,
+    }
+    event.update(extra)
+    return event
+
+
+def _created(priority="HIGH"):
+    return _event(
+        "WORK_ORDER.CREATED",
+        {"client_id": "c-1", "asset_id": "a-1", "priority": priority, "type": "REPAIR"},
+    )
+
+
+def _kinds(effects):
+    return [effect[0] for effect in effects]
+
+
+def _data(effects, kind):
+    return next(data for effect_kind, _, data in effects if effect_kind == kind)
+
+
+def test_lifecycle_without_database():
+    state, effects = fold(None, _created())
+    assert (state.business_state, state.execution_state, state.version) == ("NEW", "NOT_STARTED", 1)
+    assert state.reaction_deadline_at == T0 + timedelta(hours=4)
+    assert _kinds(effects) == [f.INSERT_WORK_ORDER, f.SLA_DEADLINES, f.SLA_DUE, f.COUNTERS, f.TIMELINE]
+
+    state, effects = fold(state, _event("WORK_ORDER.ASSIGNED", {"engineer_id": "eng-1"}, 5))
+    assert state.business_state == "PLANNED"
+    assert effects[-1] == (f.ENGINEER_BOARD, "wo-1", ("eng-1", "AVAILABLE", None))
+
+    state, effects = fold(state, _event("WORK.STARTED", {}, 30))
+    assert effects[-1] == (f.ENGINEER_BOARD, "wo-1", ("eng-1", "WORK", None))
+    state, effects = fold(state, _event("WORK.PAUSED", {"reason_code": "PARTS"}, 60))
+    # WORK -> WAITING_PARTS is still "WORK" on the board: nothing to write
+    assert f.ENGINEER_BOARD not in _kinds(effects)
+    assert (state.business_state, state.execution_state) == ("ON_HOLD", "WAITING_PARTS")
+
+    state, _ = fold(state, _event("WORK.RESUMED", {}, 90))
+    state, effects = fold(state, _event("WORK.COMPLETED", {}, 150))
+    assert (state.business_state, state.execution_state) == ("COMPLETED", "FINISHED")
+    assert state.downtime_minutes == 120
+    # 30 minutes waiting for parts: counted by reason, left out of the net downtime
+    assert state.net_downtime_minutes == 90
+    assert state.waiting_seconds == {"PARTS": 1800}
+    assert (state.paused_at, state.pause_reason) == (None, None)
+    assert state.version == 6
+    assert f.SLA_BREACHED not in _kinds(effects)
+
+
+def test_pause_seconds_counts_only_work_time_as_net():
+    start = T0 + timedelta(minutes=30)
+    assert f.pause_seconds(T0, T0 + timedelta(minutes=60), start) == (3600, 1800)
+    assert f.pause_seconds(T0, T0 + timedelta(minutes=10), None) == (600, 0)
+    assert f.pause_seconds(start, start - timedelta(minutes=1), start) == (0, 0)
+
+
+def test_sla_policy_counts_contract_minutes_in_its_calendar():
+    calendar = get_calendar(CalendarSpec.from_config("UTC", {str(day): [["09:00", "18:00"]] for day in range(5)}))
+    policy = SlaPolicy(reaction_minutes=120, restore_minutes=None, calendar_id="cal-1", calendar=calendar)
+    # Friday 2024-01-05 17:00: one working hour left that day
+    friday = datetime(2024, 1, 5, 17, 0, tzinfo=timezone.utc)
+    state, effects = fold(None, _event("WORK_ORDER.CREATED", _created()["payload"], sla_policy=policy, created_at_system=friday))
+
+    assert state.reaction_deadline_at == datetime(2024, 1, 8, 10, 0, tzinfo=timezone.utc)
+    # no contract restore time: the priority default (HIGH, 16h) in the same calendar
+    assert state.restore_deadline_at == datetime(2024, 1, 9, 15, 0, tzinfo=timezone.utc)
+    assert effects[1] == (f.SLA_DEADLINES, "wo-1", (state.reaction_deadline_at, state.restore_deadline_at, "cal-1"))
+
+
+def test_pending_deadline_follows_start_and_completion():
+    state, effects = fold(None, _created())
+    assert (f.SLA_DUE, "wo-1", state.reaction_deadline_at) in effects
+    state, effects = fold(state, _event("WORK_ORDER.ASSIGNED", {"engineer_id": "eng-1"}, 5))
+    assert f.SLA_DUE not in _kinds(effects)
+    state, effects = fold(state, _event("WORK.STARTED", {}, 30))
+    assert (f.SLA_DUE, "wo-1", state.restore_deadline_at) in effects
+    state, effects = fold(state, _event("WORK.COMPLETED", {}, 90))
+    assert (f.SLA_DUE, "wo-1", None) in effects
+    assert f.pending_deadline(state) is None
+
+
+def test_counter_deltas_move_one_work_order_between_values():
+    _, effects = fold(None, _created())
+    created = _data(effects, f.COUNTERS)
+    assert ("all", "", "business_state", "NEW", 1) in created
+    assert ("client", "c-1", "priority", "HIGH", 1) in created
+    assert len(created) == 8
+
+    state, _ = fold(None, _created())
+    _, effects = fold(state, _event("WORK_ORDER.ASSIGNED", {"engineer_id": "eng-1", "team_id": "team-1"}, 5))
+    deltas = _data(effects, f.COUNTERS)
+    # the order now also counts for its team; priority did not change for the client
+    assert ("all", "", "business_state", "NEW", -1) in deltas
+    assert ("client", "c-1", "business_state", "PLANNED", 1) in deltas
+    assert ("team", "team-1", "priority", "HIGH", 1) in deltas
+    assert not [delta for delta in deltas if delta[:2] != ("team", "team-1") and delta[2] == "priority"]
+
+
+def test_update_effect_carries_only_changed_columns():
+    created, _ = fold(None, _created())
+    state, effects = fold(created, _event("WORK_ORDER.ASSIGNED", {"engineer_id": "eng-1", "team_id": "team-1"}, 5))
+    kind, work_order_id, (expected_version, changes) = effects[0]
+    assert (kind, work_order_id, expected_version) == (f.UPDATE_WORK_ORDER, "wo-1", 1)
+    assert changes == {
+        "last_event_id": "WORK_ORDER.ASSIGNED-5",
+        "business_state": "PLANNED",
+        "assigned_engineer_id": "eng-1",
+        "assigned_team_id": "team-1",
+    }
+    # fold never mutates its input
+    assert created.business_state == "NEW" and created.version == 1
+
+
+def test_late_start_marks_reaction_breach():
+    state, _ = fold(None, _created(priority="CRITICAL"))
+    state, _ = fold(state, _event("WORK_ORDER.ASSIGNED", {"engineer_id": "eng-1"}, 5))
+    state, effects = fold(state, _event("WORK.STARTED", {}, 180))
+    assert state.sla_view_state == "BREACHED"
+    assert (f.SLA_BREACHED, "wo-1", None) in effects
+
+
+def test_rejected_transition_raises():
+    state, _ = fold(None, _created())
+    with pytest.raises(TransitionRejected) as excinfo:
+        fold(state, _event("WORK.COMPLETED", {}, 10))
+    assert excinfo.value.reason_code == "ERR_INVALID_TRANSITION"
+
+    with pytest.raises(TransitionRejected):
+        fold(state, _created())
+    with pytest.raises(TransitionRejected):
+        fold(None, _event("WORK.STARTED", {}, 10))
+
+
+def test_parts_and_evidence_effects():
+    state, _ = fold(None, _created())
+    state, effects = fold(state, _event("PART.RESERVED", {"part_id": "p-1", "quantity": 2}, 1))
+    assert (f.PARTS, "wo-1", ("reserved_qty", "p-1", 2)) in effects
+    assert state.version == 2
+
+    payload = {"url": "https://example.test/1.jpg", "caption": "before"}
+    _, effects = fold(state, _event("EVIDENCE.PHOTO_ADDED", payload, 2))
+    assert (f.EVIDENCE, "wo-1", ("PHOTO", "https://example.test/1.jpg", {"caption": "before"}, "dispatcher-1")) in effects
+    assert payload == {"url": "https://example.test/1.jpg", "caption": "before"}
+
+
+def test_arrival_with_gps_records_engineer_position():
+    state, _ = fold(None, _created())
+    state, _ = fold(state, _event("WORK_ORDER.ASSIGNED", {"engineer_id": "eng-1"}, 5))
+    state, _ = fold(state, _event("WORK.DISPATCHED", {}, 10))
+    _, effects = fold(state, _event("WORK.ARRIVED_ON_SITE", {"gps": {"lat": 55.75, "lon": 37.62}}, 40))
+    assert (f.ENGINEER_POSITION, "wo-1", ("eng-1", 55.75, 37.62, T0 + timedelta(minutes=40))) in effects
+
+    _, effects = fold(state, _event("WORK.ARRIVED_ON_SITE", {"gps": None}, 40))
+    assert f.ENGINEER_POSITION not in _kinds(effects)
+
+
+def test_assignment_slot_effect():
+    payload = {
+        "engineer_id": "eng-1",
+        "scheduled_start": "2024-01-01T09:00:00Z",
+        "scheduled_end": "2024-01-01T10:00:00Z",
+        "expected_duration_minutes": 90,
+    }
+    state, _ = fold(None, _created())
+    state, effects = fold(state, _event("WORK_ORDER.ASSIGNED", payload, 5))
+    # expected_duration_minutes runs past scheduled_end: the slot is stretched to fit it
+    slot = (datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc), datetime(2024, 1, 1, 10, 30, tzinfo=timezone.utc))
+    assert (f.ENGINEER_ASSIGNMENT, "wo-1", ("eng-1", slot)) in effects
+
+    _, effects = fold(state, _event("WORK_ORDER.CANCELLED", {"reason_code": "CLIENT_REQUEST"}, 10))
+    assert (f.ENGINEER_ASSIGNMENT, "wo-1", (None, None)) in effects
@@ -0,0 +1,39 @@
+from src.domain import fsm
+
+
+def test_business_and_execution_targets():
+    transition = fsm.lookup("PLANNED", "TRAVEL", "IN_SLA", "WORK.STARTED")
+    assert transition.decision == "ACCEPTED"
+    assert transition.next_states({}) == ("IN_PROGRESS", "WORK", "IN_SLA")
+
+    transition = fsm.lookup("IN_PROGRESS", "WORK", "AT_RISK", "WORK.COMPLETED")
+    assert transition.next_states({}) == ("COMPLETED", "FINISHED", "AT_RISK")
+
+
+def test_pause_execution_target_depends_on_reason():
+    transition = fsm.lookup("IN_PROGRESS", "WORK", "IN_SLA", "WORK.PAUSED")
+    assert transition.next_states({"reason_code": "PARTS"}) == ("ON_HOLD", "WAITING_PARTS", "IN_SLA")
+    assert transition.next_states({"reason_code": "CLIENT"}) == ("ON_HOLD", "WAITING_CLIENT", "IN_SLA")
+    assert transition.next_states({"reason_code": "SAFETY"}) == ("ON_HOLD", "WORK", "IN_SLA")
+
+
+def test_rejections():
+    assert fsm.lookup("PLANNED", "NOT_STARTED", "IN_SLA", "WORK_ORDER.CLOSED").reason_code == "ERR_INVALID_TRANSITION"
+    assert fsm.lookup("NEW", "NOT_STARTED", "IN_SLA", "WORK.DISPATCHED").reason_code == "ERR_INVALID_TRANSITION"
+    assert fsm.lookup("IN_SLA", "NOT_STARTED", "IN_SLA", "WORK.STARTED").reason_code == "ERR_INVALID_TRANSITION"
+
+    mismatch = fsm.lookup("COMPLETED", "WORK", "IN_SLA", "WORK_ORDER.CLOSED")
+    assert mismatch.reason_code == "ERR_STATE_MISMATCH"
+    assert mismatch.details == {"business_state": "COMPLETED", "execution_state": "WORK"}
+
+
+def test_sla_transitions():
+    assert fsm.lookup("PLANNED", "NOT_STARTED", "AT_RISK", "SLA.BREACHED").next_states({})[2] == "BREACHED"
+    assert fsm.lookup("PLANNED", "NOT_STARTED", "BREACHED", "SLA.RECOVERED").decision == "REJECTED"
+
+
+def test_state_neutral_events_only_on_open_work_orders():
+    transition = fsm.lookup("PLANNED", "NOT_STARTED", "IN_SLA", "PART.RESERVED")
+    assert transition.decision == "ACCEPTED"
+    assert transition.next_states({}) == ("PLANNED", "NOT_STARTED", "IN_SLA")
+    assert fsm.lookup("CLOSED", "FINISHED", "IN_SLA", "EVIDENCE.PHOTO_ADDED").decision == "REJECTED"
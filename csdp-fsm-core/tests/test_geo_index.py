@@ -0,0 +1,103 @@
+import random
+
+from src.storage.board_view import EngineerBoardView
+from src.storage.geo_index import GridIndex, haversine_km
+
+
+def test_haversine_known_distance():
+    # Moscow -> Saint Petersburg, about 634 km
+    assert 630 < haversine_km(55.7558, 37.6173, 59.9343, 30.3351) < 640
+    assert haversine_km(10.0, 20.0, 10.0, 20.0) == 0
+
+
+def test_grid_nearest_matches_brute_force():
+    rng = random.Random(7)
+    index = GridIndex(cell_degrees=0.5)
+    points = {}
+    for i in range(2000):
+        # a dense cluster, a sparse spread and points across the antimeridian and near the poles
+        if i % 4 == 0:
+            lat, lon = rng.uniform(-89.9, 89.9), rng.uniform(-180, 180)
+        elif i % 4 == 1:
+            lat, lon = rng.uniform(-5, 5), rng.choice([rng.uniform(175, 180), rng.uniform(-180, -175)])
+        else:
+            lat, lon = rng.gauss(55.7, 0.3), rng.gauss(37.6, 0.5)
+        points[i] = (lat, lon)
+        index.upsert(i, lat, lon)
+
+    for key in range(0, 2000, 3):  # move some points, drop others
+        lat, lon = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        points[key] = (lat, lon)
+        index.upsert(key, lat, lon)
+    for key in range(1, 2000, 10):
+        del points[key]
+        index.remove(key)
+    assert len(index) == len(points)
+
+    queries = [(55.7, 37.6), (0.0, 179.9), (0.0, -179.9), (89.5, 0.0), (-33.9, 151.2), (rng.uniform(-80, 80), 0.0)]
+    for lat, lon in queries:
+        for accept in (None, lambda key: key % 2 == 0):
+            candidates = [key for key in points if accept is None or accept(key)]
+            expected = sorted(haversine_km(lat, lon, *points[key]) for key in candidates)[:7]
+            got = index.nearest(lat, lon, 7, accept)
+            assert [round(distance, 6) for distance, _ in got] == [round(distance, 6) for distance in expected]
+
+
+def test_grid_scan_is_bounded_by_occupied_cells(monkeypatch):
+    index = GridIndex(cell_degrees=0.25)
+    for i in range(50):
+        index.upsert(i, 89.5 + i * 0.005, i * 7.0)
+    index.upsert("far", -60.0, 10.0)
+    scanned = []
+    ring = index._ring
+
+    def counting_ring(*args):
+        cells = ring(*args)
+        scanned.extend(cells)
+        return cells
+
+    monkeypatch.setattr(index, "_ring", counting_ring)
+    # near the pole rings barely widen; past the occupied cells the rest is swept directly
+    assert len(index.nearest(89.9, 0.0, 100)) == 51
+    assert len(scanned) < 1000
+
+    assert len(index.nearest(89.9, 0.0, 100, max_km=500)) == 50
+    assert index.nearest(-60.0, 10.0, 5, max_km=1) == [(0.0, "far")]
+
+
+def _board_row(engineer_id, status, seq, lat=None, lon=None):
+    return {
+        "engineer_id": engineer_id,
+        "status": status,
+        "last_seen_at": None,
+        "change_xid": 1,
+        "change_seq": seq,
+        "settled": True,
+        "last_lat": lat,
+        "last_lon": lon,
+    }
+
+
+def test_board_view_nearest_filters_by_status():
+    view = EngineerBoardView(refresh_interval=1.0)
+    view._apply(
+        [
+            _board_row("e-1", "AVAILABLE", 1, 55.76, 37.62),
+            _board_row("e-2", "WORK", 2, 55.75, 37.61),
+            _board_row("e-3", "AVAILABLE", 3, 59.93, 30.33),
+            _board_row("e-4", "AVAILABLE", 4),
+        ]
+    )
+    nearest = view.nearest(55.75, 37.61, 5, status="AVAILABLE")
+    assert [row["engineer_id"] for _, row in nearest] == ["e-1", "e-3"]
+    assert [row["engineer_id"] for _, row in view.nearest(55.75, 37.61, 1)] == ["e-2"]
+    assert [row["engineer_id"] for _, row in view.nearest(55.75, 37.61, 5, status="AVAILABLE", max_km=100)] == ["e-1"]
+
+    # a row without a position drops out of the index
+    view._apply([_board_row("e-1", "AVAILABLE", 5)])
+    assert [row["engineer_id"] for _, row in view.nearest(55.75, 37.61, 5, status="AVAILABLE")] == ["e-3"]
+
+    # a status change moves the engineer to the other status' index
+    view._apply([_board_row("e-2", "AVAILABLE", 6, 55.75, 37.61)])
+    assert [row["engineer_id"] for _, row in view.nearest(55.75, 37.61, 1, status="AVAILABLE")] == ["e-2"]
+    assert view.nearest(55.75, 37.61, 1, status="WORK") == []
@@ -0,0 +1,105 @@
+import json
+
+from src.cli.import_events import run_import
+
+WORK_ORDER_ID = "00000000-0000-0000-0000-000000000361"
+
+
+def _created(client_event_id, **extra):
+    return {
+        "event_type": "WORK_ORDER.CREATED",
+        "entity_type": "work_order",
+        "entity_id": WORK_ORDER_ID,
+        "source": "mobile",
+        "client_event_id": client_event_id,
+        "payload": {
+            "client_id": "00000000-0000-0000-0000-000000000362",
+            "asset_id": "00000000-0000-0000-0000-000000000363",
+            "priority": "LOW",
+            "type": "MAINTENANCE",
+            "description": "legacy",
+        },
+        **extra,
+    }
+
+
+def _write_input(tmp_path):
+    lines = [
+        json.dumps(_created("legacy-0001", created_at_system="2019-03-01T08:00:00+00:00")),
+        "not json",
+        json.dumps({**_created("legacy-0002"), "payload": {}}),
+        json.dumps(_created("legacy-0001")),
+    ]
+    path = tmp_path / "events.ndjson"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def test_dry_run_validates_dedupes_and_reports(tmp_path):
+    path = _write_input(tmp_path)
+    report = tmp_path / "rejected.ndjson"
+
+    for workers in (0, 2):
+        stats = run_import([str(path)], workers=workers, dry_run=True, rejected_path=str(report))
+        assert (stats["lines"], stats["valid"], stats["rejected"], stats["duplicates"]) == (4, 1, 2, 1)
+        assert stats["inserted"] == 0
+
+        rejected = [json.loads(line) for line in report.read_text(encoding="utf-8").splitlines()]
+        assert [(row["line"], row["reason_code"]) for row in rejected] == [
+            (2, "ERR_INVALID_JSON"),
+            (3, "ERR_PAYLOAD_MISSING"),
+            (4, "DUPLICATE_IGNORED"),
+        ]
+
+
+def test_import_copies_events_and_rebuilds_projection(db_conn, db_url, tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", db_url)
+    path = _write_input(tmp_path)
+
+    stats = run_import([str(path)], workers=0)
+    assert (stats["inserted"], stats["rebuilt_work_orders"]) == (1, 1)
+
+    # Re-running the same file leaves event_store untouched.
+    stats = run_import([str(path)], workers=0)
+    assert (stats["inserted"], stats["already_stored"]) == (0, 1)
+
+    with db_conn.cursor() as cur:
+        cur.execute("SELECT created_at_system::text AS at FROM event_store WHERE entity_id = %s", (WORK_ORDER_ID,))
+        assert cur.fetchone()["at"].startswith("2019-03-01")
+        cur.execute("SELECT business_state, version FROM work_orders_current WHERE work_order_id = %s", (WORK_ORDER_ID,))
+        assert cur.fetchone() == {"business_state": "NEW", "version": 1}
+
+
+def test_import_keeps_file_order_of_untimestamped_events(db_conn, db_url, tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", db_url)
+    work_order_id = "00000000-0000-0000-0000-000000000364"
+    assigned = {
+        "event_type": "WORK_ORDER.ASSIGNED",
+        "entity_type": "work_order",
+        "entity_id": work_order_id,
+        "source": "web",
+        "client_event_id": "legacy-0011",
+        "payload": {
+            "team_id": "00000000-0000-0000-0000-000000000365",
+            "scheduled_start": "2019-03-02T08:00:00+00:00",
+            "scheduled_end": "2019-03-02T10:00:00+00:00",
+        },
+    }
+    created = {**_created("legacy-0010"), "entity_id": work_order_id}
+    path = tmp_path / "events.ndjson"
+    path.write_text("\n".join(json.dumps(line) for line in (created, assigned, created)) + "\n", encoding="utf-8")
+
+    # batch_size=1: the repeated CREATED lands in a later batch and is skipped by the store.
+    stats = run_import([str(path)], workers=0, batch_size=1)
+    assert (stats["valid"], stats["inserted"], stats["already_stored"]) == (3, 2, 1)
+
+    with db_conn.cursor() as cur:
+        cur.execute(
+            "SELECT event_type, created_at_system FROM event_store WHERE entity_id = %s ORDER BY event_seq",
+            (work_order_id,),
+        )
+        rows = cur.fetchall()
+        cur.execute("SELECT business_state FROM work_orders_current WHERE work_order_id = %s", (work_order_id,))
+        assert cur.fetchone()["business_state"] == "PLANNED"
+    assert [row["event_type"] for row in rows] == ["WORK_ORDER.CREATED", "WORK_ORDER.ASSIGNED"]
+    assert rows[0]["created_at_system"] < rows[1]["created_at_system"]
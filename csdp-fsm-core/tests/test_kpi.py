@@ -1,8 +1,15 @@
+import random
+import struct
+import uuid
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 
+import pytest
+
 from src.domain.apply_event import apply_event
-from src.domain.kpi import rebuild_kpi_daily
+from src.domain import kpi, kpi_columnar
+from src.domain.sketch import DDSketch, merge_bytes
+from src.domain.kpi import combine, plan_buckets, rebuild_kpi_daily, rebuild_kpi_facts
 from src.domain.validator import Actor, validate_event
 from src.storage import event_store_repo
 
@@ -42,6 +49,9 @@ def _base_envelope(event_type, entity_id):
 
 def test_kpi_daily_averages(db_conn):
     _apply_migration(db_conn, "004_kpi.sql")
+    _apply_migration(db_conn, "011_kpi_rollups.sql")
+    _apply_migration(db_conn, "012_kpi_sketches.sql")
+    _apply_migration(db_conn, "013_kpi_work_order_facts.sql")
 
     now = datetime.now(timezone.utc)
     work_order_id = "00000000-0000-0000-0000-000000002001"
@@ -75,7 +85,7 @@ def test_kpi_daily_averages(db_conn):
     _submit_event(db_conn, completed, Actor(role="ENGINEER", actor_id=engineer_id))
 
     today = date.today()
-    rebuild_kpi_daily(db_conn, today, today)
+    rebuild_kpi_daily(db_conn, today, today, facts=True)
 
     with db_conn.cursor() as cur:
         cur.execute("SELECT reaction_avg_minutes, mttr_avg_minutes FROM kpi_daily WHERE day = %s AND client_id IS NULL", (today,))
@@ -88,3 +98,218 @@ def test_kpi_daily_averages(db_conn):
     assert row["work_orders_total"] == 1
     assert float(row["reaction_avg_minutes"]) == 60.0
     assert float(row["mttr_avg_minutes"]) == 60.0
+
+    with db_conn.cursor() as cur:
+        cur.execute("SELECT * FROM kpi_weekly WHERE client_id = %s", (created["payload"]["client_id"],))
+        weekly = cur.fetchall()
+        cur.execute("SELECT * FROM kpi_monthly WHERE client_id = %s", (created["payload"]["client_id"],))
+        monthly = cur.fetchall()
+    assert [row["bucket_start"] for row in weekly] == [today - timedelta(days=today.weekday())]
+    assert [row["bucket_start"] for row in monthly] == [today.replace(day=1)]
+    assert combine(monthly)["mttr_avg_minutes"] == 60.0
+    assert combine(monthly)["work_orders_total"] == 1
+    assert combine(monthly)["mttr_quantiles_minutes"]["p90"] == pytest.approx(60.0, rel=0.01)
+
+    with db_conn.cursor() as cur:
+        cur.execute("SELECT * FROM kpi_work_order_facts WHERE work_order_id = %s", (work_order_id,))
+        fact = cur.fetchone()
+    assert fact["priority"] == "LOW"
+    assert fact["work_type"] == "MAINTENANCE"
+    assert str(fact["engineer_id"]) == engineer_id
+    assert fact["mttr_minutes"] == 60.0
+    assert fact["first_time_fix"] is True
+
+    # without facts=True the rebuild leaves kpi_work_order_facts alone
+    with db_conn.cursor() as cur:
+        cur.execute("DELETE FROM kpi_work_order_facts")
+    rebuild_kpi_daily(db_conn, today, today, engine="scalar")
+    with db_conn.cursor() as cur:
+        cur.execute("SELECT count(*) AS n FROM kpi_work_order_facts")
+        assert cur.fetchone()["n"] == 0
+        cur.execute("SELECT mttr_avg_minutes FROM kpi_daily WHERE day = %s AND client_id = %s", (today, created["payload"]["client_id"]))
+        assert float(cur.fetchone()["mttr_avg_minutes"]) == 60.0
+    rebuild_kpi_facts(db_conn, today, today)
+    with db_conn.cursor() as cur:
+        cur.execute("SELECT work_order_id FROM kpi_work_order_facts")
+        assert [str(row["work_order_id"]) for row in cur.fetchall()] == [work_order_id]
+
+
+def test_plan_buckets_prefers_coarse_buckets():
+    assert plan_buckets(date(2024, 3, 1), date(2024, 3, 31)) == [("month", date(2024, 3, 1), date(2024, 3, 1))]
+    assert plan_buckets(date(2024, 3, 5), date(2024, 3, 9)) == [("day", date(2024, 3, 5), date(2024, 3, 9))]
+
+    plan = plan_buckets(date(2024, 1, 15), date(2025, 12, 20))
+    assert plan == [
+        ("week", date(2024, 1, 15), date(2024, 1, 22)),
+        ("day", date(2024, 1, 29), date(2024, 1, 31)),
+        ("month", date(2024, 2, 1), date(2025, 11, 1)),
+        ("week", date(2025, 12, 1), date(2025, 12, 8)),
+        ("day", date(2025, 12, 15), date(2025, 12, 20)),
+    ]
+
+
+def test_combine_weights_by_volume():
+    busy = {"reaction_sum_minutes": 900, "reaction_count": 9, "mttr_sum_minutes": 0, "mttr_count": 0,
+            "sla_compliant_total": 9, "sla_total": 9, "work_orders_total": 9}
+    quiet = {"reaction_sum_minutes": 10, "reaction_count": 1, "mttr_sum_minutes": 30, "mttr_count": 1,
+             "sla_compliant_total": 0, "sla_total": 1, "work_orders_total": 1}
+    aggregate = combine([busy, quiet])
+    # not (100 + 10) / 2: the busy day carries nine times the weight
+    assert aggregate["reaction_time_avg_minutes"] == 91.0
+    assert aggregate["mttr_avg_minutes"] == 30.0
+    assert aggregate["sla_compliance_percent"] == 90.0
+    assert aggregate["work_orders_total"] == 10
+    assert combine([])["reaction_time_avg_minutes"] is None
+    assert combine([busy])["reaction_time_quantiles_minutes"] == {"p50": None, "p90": None, "p99": None}
+
+
+def test_fact_rows_first_time_fix_pauses_and_parts():
+    base = datetime(2024, 5, 1, 8, tzinfo=timezone.utc)
+
+    def event(event_type, entity_id, minutes, payload=None):
+        return {
+            "event_type": event_type,
+            "entity_id": entity_id,
+            "payload": payload or {},
+            "created_at_system": base + timedelta(minutes=minutes),
+            "created_at_reported": None,
+        }
+
+    created = {"client_id": "c1", "priority": "HIGH", "type": "EMERGENCY_REPAIR", "asset_id": "a1"}
+    events = [
+        event("WORK_ORDER.CREATED", "wo-1", 0, created),
+        event("WORK_ORDER.ASSIGNED", "wo-1", 5, {"engineer_id": "e1"}),
+        event("WORK.ARRIVED_ON_SITE", "wo-1", 20),
+        event("WORK.STARTED", "wo-1", 30),
+        event("WORK.PAUSED", "wo-1", 40, {"reason_code": "CLIENT"}),
+        event("WORK.RESUMED", "wo-1", 50),
+        event("PART.CONSUMED", "wo-1", 55, {"part_id": "p1", "quantity": 2}),
+        event("WORK.COMPLETED", "wo-1", 90),
+        event("WORK_ORDER.CREATED", "wo-2", 0, created),
+        event("WORK.STARTED", "wo-2", 60),
+        event("WORK.PAUSED", "wo-2", 70, {"reason_code": "PARTS"}),
+        event("WORK.COMPLETED", "wo-2", 100),
+        event("WORK_ORDER.CREATED", "wo-3", 0, created),
+        # only pauses in the rebuilt range: no day, no fact
+        event("WORK.PAUSED", "wo-4", 10, {"reason_code": "OTHER"}),
+    ]
+    facts = {row[0]: dict(zip(kpi.FACT_COLUMNS, row)) for row in kpi.fact_rows(kpi._build_work_order_metrics(events), {})}
+
+    assert set(facts) == {"wo-1", "wo-2", "wo-3"}
+    first = facts["wo-1"]
+    assert (first["priority"], first["work_type"], first["engineer_id"], first["asset_id"]) == ("HIGH", "EMERGENCY_REPAIR", "e1", "a1")
+    assert (first["reaction_minutes"], first["mttr_minutes"], first["paused_minutes"]) == (30.0, 60.0, 10.0)
+    assert first["first_time_fix"] is True
+    assert first["parts_quantity"] == 2
+    # waited for parts; the open pause ends at completion
+    assert facts["wo-2"]["first_time_fix"] is False
+    assert facts["wo-2"]["paused_minutes"] == 30.0
+    assert facts["wo-3"]["first_time_fix"] is None
+
+
+def test_sketch_quantiles_merge_across_buckets():
+    rng = random.Random(45)
+    days = [[rng.lognormvariate(4, 1) for _ in range(500)] for _ in range(7)]
+    week = sorted(value for day in days for value in day)
+
+    merged = merge_bytes([DDSketch.of(day).to_bytes() for day in days] + [None])
+    assert merged.count == len(week)
+    assert merged.counts == DDSketch.of(week).counts
+    for q in (0.5, 0.9, 0.99):
+        exact = week[int(q * (len(week) - 1))]
+        assert merged.quantile(q) == pytest.approx(exact, rel=0.01)
+
+    signed = DDSketch.of([-5.0, 0.0, 2.5])
+    assert DDSketch.from_bytes(signed.to_bytes()).counts == signed.counts
+    assert signed.quantile(0) == pytest.approx(-5.0, rel=0.01)
+    assert merge_bytes([None]) is None
+
+
+def _random_kpi_events(rng, work_orders=300):
+    base = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    clients = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(5)]
+    events = []
+    for _ in range(work_orders):
+        work_order_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        at = base + timedelta(seconds=rng.randint(0, 10 * 86400), microseconds=rng.randint(0, 999999))
+        kinds = ["WORK_ORDER.CREATED", "WORK.STARTED", "WORK.COMPLETED"][: rng.randint(1, 3)]
+        if rng.random() < 0.1:
+            kinds = kinds[1:] or kinds  # created before the rebuilt range
+        if rng.random() < 0.1:
+            kinds.append("WORK.STARTED")  # restarted: the later event wins
+        for event_type in kinds:
+            at += timedelta(minutes=rng.randint(1, 600), microseconds=rng.randint(0, 999999))
+            payload = {}
+            if event_type == "WORK_ORDER.CREATED":
+                payload["client_id"] = rng.choice(clients)
+            elif rng.random() < 0.5:
+                reported = at - timedelta(minutes=rng.randint(0, 90), microseconds=rng.randint(0, 999999))
+                key = "actual_start_reported" if event_type == "WORK.STARTED" else "actual_end_reported"
+                payload[key] = reported.isoformat()
+            reported_at = at - timedelta(seconds=rng.randint(0, 300)) if rng.random() < 0.5 else None
+            events.append(
+                {
+                    "event_type": event_type,
+                    "entity_id": work_order_id,
+                    "payload": payload,
+                    "created_at_system": at,
+                    "created_at_reported": reported_at,
+                }
+            )
+    events.sort(key=lambda event: event["created_at_system"])
+    return events
+
+
+def _columns(events, sla_by_id):
+    kinds = {"WORK_ORDER.CREATED": 0, "WORK.STARTED": 1, "WORK.COMPLETED": 2}
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for event in events:
+        effective = kpi._effective_time(
+            event["event_type"], event["payload"], event["created_at_reported"], event["created_at_system"]
+        )
+        client_id = event["payload"].get("client_id")
+        rows.append(
+            (
+                *kpi_columnar.uuid_halves(event["entity_id"]),
+                kinds[event["event_type"]],
+                (effective - epoch) // timedelta(microseconds=1),
+                (event["created_at_system"].date() - kpi_columnar.EPOCH).days,
+                int(client_id is not None),
+                *(kpi_columnar.uuid_halves(client_id) if client_id else (0, 0)),
+            )
+        )
+    sla_rows = [
+        (*kpi_columnar.uuid_halves(wo_id), int(state is not None and state != "BREACHED"))
+        for wo_id, state in sla_by_id.items()
+    ]
+    return kpi_columnar.EventColumns.from_rows(rows), kpi_columnar.SlaColumns.from_rows(sla_rows)
+
+
+def test_columnar_rows_match_scalar_rows():
+    pytest.importorskip("numpy")
+    rng = random.Random(44)
+    events = _random_kpi_events(rng)
+    ids = sorted({event["entity_id"] for event in events})
+    sla_by_id = {wo_id: rng.choice(["IN_SLA", "AT_RISK", "BREACHED", None]) for wo_id in ids[::2]}
+
+    scalar = kpi.kpi_rows(kpi._build_work_order_metrics(events), sla_by_id)
+    columnar = kpi_columnar.kpi_rows(*_columns(events, sla_by_id))
+
+    def key(row):
+        return (row[0], row[1] or "")
+
+    assert sorted(columnar, key=key) == sorted(scalar, key=key)
+    assert kpi_columnar.kpi_rows(*_columns([], {})) == []
+
+
+def test_columns_from_binary_copy():
+    pytest.importorskip("numpy")
+    rows = [(1, -2, 0, 10**15, 19800, 1, -(2**63), 2**63 - 1), (5, 6, 2, 7, 8, 0, 0, 0)]
+    data = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+    for row in rows:
+        data += struct.pack(">h", len(row)) + b"".join(struct.pack(">iq", 8, value) for value in row)
+    data += struct.pack(">h", -1)
+
+    columns = kpi_columnar.EventColumns.from_copy(data)
+    assert [tuple(int(value) for value in row) for row in zip(*vars(columns).values())] == rows
@@ -0,0 +1,41 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+
+from src.api.responses import FastJSONResponse
+from src.storage.jsonb import RawJSON, raw
+
+
+def test_fast_response_matches_jsonable_encoder_for_row_types():
+    row = {
+        "work_order_id": uuid4(),
+        "last_event_at": datetime(2024, 1, 1, 8, 0, 0, 123456, tzinfo=timezone.utc),
+        "scheduled_start": datetime(2024, 1, 1, 8, 0),
+        "day": date(2024, 1, 1),
+        "reserved_qty": Decimal("2"),
+        "installed_qty": Decimal("1.500"),
+        "pause": timedelta(minutes=5),
+        "downtime_minutes": None,
+        "payload": {"comment": "ok", "codes": ["A1", "B2"], "ratio": 0.5},
+    }
+    body = FastJSONResponse({"items": [row]}).body
+    assert json.loads(body) == json.loads(json.dumps(jsonable_encoder({"items": [row]})))
+
+
+def test_raw_json_payloads_are_spliced_verbatim():
+    payload = raw({"engineer_id": "00000000-0000-0000-0000-000000000030", "note": "щит №2"})
+    assert isinstance(payload, RawJSON)
+    assert raw(payload) is payload
+
+    body = FastJSONResponse({"events": [{"event_type": "WORK_ORDER.ASSIGNED", "payload": payload}]}).body
+    assert json.loads(body) == {
+        "events": [
+            {
+                "event_type": "WORK_ORDER.ASSIGNED",
+                "payload": {"engineer_id": "00000000-0000-0000-0000-000000000030", "note": "щит №2"},
+            }
+        ]
+    }
@@ -1,9 +1,13 @@
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+from psycopg.types.json import Jsonb
+
 from src.domain.apply_event import apply_event
+from src.domain.replay import rebuild_work_orders
+from src.domain.sla_scanner import scan_sla
 from src.domain.validator import Actor, validate_event
-from src.storage import event_store_repo
+from src.storage import event_store_repo, projections_repo
 
 
 def _apply_migration(conn, name: str) -> None:
@@ -144,3 +148,107 @@ def test_breach_on_late_start_uses_effective_time(db_conn):
         cur.execute("SELECT state FROM sla_view WHERE work_order_id = %s", (work_order_id,))
         row = cur.fetchone()
     assert row["state"] == "BREACHED"
+
+
+def test_contract_calendar_deadlines_and_scan(db_conn):
+    _apply_migration(db_conn, "003_contracts.sql")
+    _apply_migration(db_conn, "015_sla_calendars.sql")
+    client_id = "00000000-0000-0000-0000-000000001130"
+    with db_conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO sla_calendars (name, timezone, week_hours)
+            VALUES ('always-on', 'UTC', %s)
+            RETURNING calendar_id
+            """,
+            (Jsonb({str(day): [["00:00", "24:00"]] for day in range(7)}),),
+        )
+        calendar_id = cur.fetchone()["calendar_id"]
+        cur.execute(
+            """
+            INSERT INTO contracts (client_id, contract_type, active_from, reaction_minutes, restore_minutes, is_active, calendar_id)
+            VALUES (%s, 'FULL_SERVICE', now() - interval '1 day', 30, 120, TRUE, %s)
+            RETURNING contract_id
+            """,
+            (client_id, calendar_id),
+        )
+        contract_id = cur.fetchone()["contract_id"]
+
+    work_order_id = "00000000-0000-0000-0000-000000001131"
+    created = _base_envelope("WORK_ORDER.CREATED", work_order_id)
+    created["payload"] = {
+        "client_id": client_id,
+        "asset_id": "00000000-0000-0000-0000-000000001132",
+        "priority": "LOW",
+        "type": "MAINTENANCE",
+        "description": "test",
+        "contract_id": str(contract_id),
+    }
+    assert _submit_event(db_conn, created, Actor(role="DISPATCHER", actor_id=None))["decision"] == "ACCEPTED"
+
+    sla = projections_repo.fetch_sla_view(db_conn, work_order_id)
+    assert sla["calendar_id"] == calendar_id
+    reaction_deadline = sla["reaction_deadline_at"]
+
+    assert scan_sla(db_conn, now=reaction_deadline - timedelta(minutes=90), at_risk_minutes=60)["AT_RISK"] == 0
+    assert scan_sla(db_conn, now=reaction_deadline - timedelta(minutes=10), at_risk_minutes=60)["AT_RISK"] == 1
+    assert projections_repo.fetch_sla_view(db_conn, work_order_id)["state"] == "AT_RISK"
+    work_order = projections_repo.fetch_work_order(db_conn, work_order_id)
+    assert (work_order["sla_state"], work_order["version"]) == ("AT_RISK", 2)
+    # Nothing changed since: a second pass submits nothing.
+    assert scan_sla(db_conn, now=reaction_deadline - timedelta(minutes=5), at_risk_minutes=60)["AT_RISK"] == 0
+
+    assert scan_sla(db_conn, now=reaction_deadline + timedelta(minutes=1))["BREACHED"] == 1
+    sla = projections_repo.fetch_sla_view(db_conn, work_order_id)
+    assert sla["state"] == "BREACHED"
+    assert sla["breached_at"] is not None
+    assert projections_repo.fetch_work_order(db_conn, work_order_id)["sla_state"] == "BREACHED"
+    counts = {
+        (row["dimension"], row["value"]): row["count"]
+        for row in projections_repo.fetch_work_order_counts(db_conn, "client", client_id)
+    }
+    assert counts[("sla_state", "BREACHED")] == 1 and ("sla_state", "AT_RISK") not in counts
+
+    # The transitions are events: they are on the timeline and a rebuild lands in the same state.
+    timeline = projections_repo.fetch_timeline(db_conn, work_order_id, 10, None, False, None)
+    assert [event["event_type"] for event in timeline] == ["WORK_ORDER.CREATED", "SLA.AT_RISK", "SLA.BREACHED"]
+    rebuild_work_orders(db_conn, [work_order_id])
+    assert projections_repo.fetch_work_order(db_conn, work_order_id)["sla_state"] == "BREACHED"
+    assert projections_repo.fetch_sla_view(db_conn, work_order_id)["state"] == "BREACHED"
+
+
+def test_sla_board_orders_open_work_orders_by_pending_deadline(db_conn):
+    actor = Actor(role="DISPATCHER", actor_id=None)
+    ids = {
+        "CRITICAL": "00000000-0000-0000-0000-000000001141",
+        "HIGH": "00000000-0000-0000-0000-000000001142",
+        "LOW": "00000000-0000-0000-0000-000000001143",
+    }
+    for priority, work_order_id in ids.items():
+        created = _base_envelope("WORK_ORDER.CREATED", work_order_id)
+        created["payload"] = {
+            "client_id": "00000000-0000-0000-0000-000000001140",
+            "asset_id": "00000000-0000-0000-0000-000000001144",
+            "priority": priority,
+            "type": "MAINTENANCE",
+            "description": "test",
+        }
+        _submit_event(db_conn, created, actor)
+    cancelled = _base_envelope("WORK_ORDER.CANCELLED", ids["HIGH"])
+    cancelled["payload"] = {"reason_code": "CLIENT_REQUEST"}
+    _submit_event(db_conn, cancelled, actor)
+
+    rows = projections_repo.fetch_sla_board(db_conn, None, limit=10)
+    assert [str(row["work_order_id"]) for row in rows] == [ids["CRITICAL"], ids["LOW"]]
+    assert rows[0]["priority"] == "CRITICAL"
+    assert rows[0]["due_at"] == rows[0]["reaction_deadline_at"]
+
+    page = projections_repo.fetch_sla_board(db_conn, None, limit=1, after=(rows[0]["due_at"], rows[0]["work_order_id"]))
+    assert [str(row["work_order_id"]) for row in page] == [ids["LOW"]]
+    assert projections_repo.fetch_sla_board(db_conn, None, limit=10, due_before=rows[0]["due_at"]) == []
+
+    scan_sla(db_conn, now=rows[0]["due_at"] - timedelta(minutes=30), at_risk_minutes=60)
+    at_risk = projections_repo.fetch_sla_board(db_conn, "AT_RISK", limit=10)
+    assert [str(row["work_order_id"]) for row in at_risk] == [ids["CRITICAL"]]
+    in_sla = projections_repo.fetch_sla_board(db_conn, "IN_SLA", limit=10)
+    assert [str(row["work_order_id"]) for row in in_sla] == [ids["LOW"]]
@@ -0,0 +1,91 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from src.domain.sla_calendar import WALL_CLOCK, CalendarSpec, get_calendar
+from src.domain.sla_scanner import sla_state_at
+
+WEEKDAYS = {str(day): [["09:00", "13:00"], ["14:00", "18:00"]] for day in range(5)}
+
+
+def _brute_minutes(spec, start, end):
+    zone = ZoneInfo(spec.timezone)
+    minutes = 0
+    at = start
+    while at < end:
+        local = at.astimezone(zone)
+        of_day = local.hour * 60 + local.minute
+        if local.date() not in spec.holidays:
+            minutes += any(opens <= of_day < closes for opens, closes in spec.week[local.weekday()])
+        at += timedelta(minutes=1)
+    return minutes
+
+
+@pytest.mark.parametrize("tz", ["Europe/Moscow", "America/New_York"])
+def test_calendar_matches_minute_walk(tz):
+    spec = CalendarSpec.from_config(tz, WEEKDAYS, [date(2024, 1, 1), date(2024, 3, 11)])
+    calendar = get_calendar(spec)
+    rng = random.Random(48)
+    # across New Year and the US DST switch
+    base = datetime(2023, 12, 20, tzinfo=timezone.utc)
+    for _ in range(40):
+        start = base + timedelta(minutes=rng.randint(0, 100 * 24 * 60))
+        end = start + timedelta(minutes=rng.randint(0, 4 * 24 * 60))
+        assert calendar.minutes_between(start, end) == _brute_minutes(spec, start, end)
+
+        minutes = rng.randint(1, 1500)
+        deadline = calendar.add_minutes(start, minutes)
+        assert calendar.minutes_between(start, deadline) == minutes
+        assert _brute_minutes(spec, start, deadline - timedelta(minutes=1)) == minutes - 1
+
+
+def test_deadline_skips_nights_weekends_and_holidays():
+    spec = CalendarSpec.from_config("UTC", WEEKDAYS, [date(2024, 1, 1)])
+    calendar = get_calendar(spec)
+    friday_evening = datetime(2023, 12, 29, 17, 0, tzinfo=timezone.utc)
+
+    # one hour on Friday, Monday is a holiday, the rest on Tuesday morning
+    assert calendar.add_minutes(friday_evening, 120) == datetime(2024, 1, 2, 10, 0, tzinfo=timezone.utc)
+    # ending exactly at closing time stays on that day
+    assert calendar.add_minutes(friday_evening, 60) == datetime(2023, 12, 29, 18, 0, tzinfo=timezone.utc)
+    assert calendar.minutes_between(datetime(2024, 1, 2, 10, tzinfo=timezone.utc), friday_evening) == -120
+    assert get_calendar(spec) is calendar
+
+
+def test_calendar_config_is_checked():
+    with pytest.raises(ValueError):
+        CalendarSpec.from_config("UTC", {"0": [["18:00", "09:00"]]})
+    with pytest.raises(ValueError):
+        CalendarSpec.from_config("UTC", {})
+
+
+def test_overlapping_hours_are_merged():
+    spec = CalendarSpec.from_config(
+        "UTC", {"0": [["12:00", "18:00"], ["09:00", "13:00"], ["09:00", "10:00"], ["18:00", "19:00"]]}
+    )
+    assert spec.week[0] == ((9 * 60, 19 * 60),)
+    calendar = get_calendar(spec)
+    monday = datetime(2024, 1, 8, 9, 0, tzinfo=timezone.utc)
+    assert calendar.minutes_between(monday, monday + timedelta(days=1)) == 10 * 60
+    assert calendar.add_minutes(monday, 10 * 60) == datetime(2024, 1, 8, 19, 0, tzinfo=timezone.utc)
+
+
+def test_sla_state_counts_working_time_to_the_pending_deadline():
+    calendar = get_calendar(CalendarSpec.from_config("UTC", WEEKDAYS))
+    friday_evening = datetime(2023, 12, 29, 17, 30, tzinfo=timezone.utc)
+    row = {
+        "reaction_deadline_at": datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc),
+        "restore_deadline_at": datetime(2024, 1, 1, 18, 0, tzinfo=timezone.utc),
+        "actual_start_effective": None,
+    }
+
+    # 90 working minutes left over the weekend, 62.5 wall-clock hours
+    assert sla_state_at(row, friday_evening, calendar, 120) == "AT_RISK"
+    assert sla_state_at(row, friday_evening, WALL_CLOCK, 120) == "IN_SLA"
+    assert sla_state_at(row, datetime(2024, 1, 1, 11, tzinfo=timezone.utc), calendar, 120) == "BREACHED"
+    # once work started, the restore deadline is the one that counts
+    started = {**row, "actual_start_effective": friday_evening}
+    assert sla_state_at(started, datetime(2024, 1, 1, 11, tzinfo=timezone.utc), calendar, 120) == "IN_SLA"
+    assert sla_state_at({**row, "reaction_deadline_at": None}, friday_evening, calendar, 120) is None
@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta, timezone
+
+from src.domain.apply_event import apply_event
+from src.domain.counters import reconcile_counters
+from src.domain.fold import WorkOrderState
+from src.domain.state_store import StateCache, load_state, state_cache
+from src.domain.replay import rebuild_work_orders
+from src.domain.validator import Actor, validate_event
+from src.storage import event_store_repo, projections_repo
+
+
+def _submit_event(conn, envelope, actor):
+    validation = validate_event(conn, envelope, actor)
+    if validation.decision != "ACCEPTED":
+        return validation
+    normalized = validation.normalized_event or envelope
+    normalized["created_by"] = actor.actor_id
+    event_id, duplicate = event_store_repo.insert_event(conn, normalized)
+    if duplicate:
+        return {
+            "decision": "ACCEPTED",
+            "reason_code": "DUPLICATE_IGNORED",
+            "event_id": event_id,
+        }
+    stored = event_store_repo.fetch_event_by_id(conn, event_id)
+    normalized["event_id"] = event_id
+    normalized["created_at_system"] = stored["created_at_system"]
+    apply_event(conn, normalized)
+    return {"decision": "ACCEPTED", "reason_code": "OK", "event_id": event_id}
+
+
+def _base_envelope(event_type, entity_id):
+    return {
+        "event_type": event_type,
+        "entity_type": "work_order",
+        "entity_id": entity_id,
+        "source": "web",
+        "payload": {},
+    }
+
+
+def test_state_cache_evicts_least_recently_used():
+    cache = StateCache(maxsize=2)
+    for work_order_id in ("a", "b"):
+        cache.put(WorkOrderState(work_order_id=work_order_id, version=1))
+    assert cache.get("a").work_order_id == "a"
+
+    cache.put(WorkOrderState(work_order_id="c", version=1))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_load_state_is_served_from_cache_until_the_row_moves(db_conn):
+    actor = Actor(role="DISPATCHER", actor_id=None)
+    work_order_id = "00000000-0000-0000-0000-000000000033"
+    created = _base_envelope("WORK_ORDER.CREATED", work_order_id)
+    created["payload"] = {
+        "client_id": "00000000-0000-0000-0000-000000000034",
+        "asset_id": "00000000-0000-0000-0000-000000000035",
+        "priority": "HIGH",
+        "type": "MAINTENANCE",
+        "description": "test",
+    }
+    created["created_at_reported"] = datetime.now(timezone.utc).isoformat()
+    assert _submit_event(db_conn, created, actor)["decision"] == "ACCEPTED"
+
+    # apply_event wrote the new state through to the cache
+    cached = state_cache.get(work_order_id)
+    assert cached is not None and cached.version == 1
+    assert load_state(db_conn, work_order_id) is cached
+
+    # Another worker moved the row: the version probe notices and the state is reloaded.
+    db_conn.execute(
+        "UPDATE work_orders_current SET version = version + 1, business_state = 'CANCELLED' WHERE work_order_id = %s",
+        (work_order_id,),
+    )
+    reloaded = load_state(db_conn, work_order_id)
+    assert reloaded is not cached
+    assert (reloaded.version, reloaded.business_state) == (2, "CANCELLED")
+
+
+def _counts(conn, scope="all", scope_id=""):
+    return {(row["dimension"], row["value"]): row["count"] for row in projections_repo.fetch_work_order_counts(conn, scope, scope_id)}
+
+
+def test_counters_follow_events_rebuilds_and_reconcile(db_conn):
+    actor = Actor(role="DISPATCHER", actor_id=None)
+    client_id = "00000000-0000-0000-0000-000000000040"
+    team_id = "00000000-0000-0000-0000-000000000041"
+    work_order_ids = ["00000000-0000-0000-0000-000000000042", "00000000-0000-0000-0000-000000000043"]
+    for work_order_id in work_order_ids:
+        created = _base_envelope("WORK_ORDER.CREATED", work_order_id)
+        created["payload"] = {
+            "client_id": client_id,
+            "asset_id": "00000000-0000-0000-0000-000000000044",
+            "priority": "HIGH",
+            "type": "MAINTENANCE",
+            "description": "test",
+        }
+        assert _submit_event(db_conn, created, actor)["decision"] == "ACCEPTED"
+    # Team-only assignment: the team scope counts orders assigned to the team itself.
+    assigned = _base_envelope("WORK_ORDER.ASSIGNED", work_order_ids[0])
+    assigned["payload"] = {
+        "team_id": team_id,
+        "scheduled_start": datetime.now(timezone.utc).isoformat(),
+        "scheduled_end": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(),
+    }
+    assert _submit_event(db_conn, assigned, actor)["decision"] == "ACCEPTED"
+
+    counts = _counts(db_conn)
+    assert counts[("business_state", "NEW")] == 1
+    assert counts[("business_state", "PLANNED")] == 1
+    assert counts[("priority", "HIGH")] == 2
+    assert _counts(db_conn, "client", client_id)[("priority", "HIGH")] == 2
+    assert _counts(db_conn, "team", team_id) == {
+        ("business_state", "PLANNED"): 1,
+        ("execution_state", "NOT_STARTED"): 1,
+        ("priority", "HIGH"): 1,
+        ("sla_state", "IN_SLA"): 1,
+    }
+
+    rebuild_work_orders(db_conn, work_order_ids)
+    assert _counts(db_conn) == counts
+    assert reconcile_counters(db_conn)["drifted"] == 0
+
+    with db_conn.cursor() as cur:
+        cur.execute("UPDATE work_order_counters SET count = count + 5 WHERE scope = 'all' AND value = 'NEW'")
+    assert reconcile_counters(db_conn)["drifted"] == 1
+    assert _counts(db_conn) == counts
+
+
+def test_timeline_change_seq_comes_from_the_projection_update(db_conn):
+    dispatcher = Actor(role="DISPATCHER", actor_id=None)
+    engineer_id = "00000000-0000-0000-0000-000000000045"
+    work_order_id = "00000000-0000-0000-0000-000000000046"
+    created = _base_envelope("WORK_ORDER.CREATED", work_order_id)
+    created["payload"] = {
+        "client_id": "00000000-0000-0000-0000-000000000047",
+        "asset_id": "00000000-0000-0000-0000-000000000048",
+        "priority": "LOW",
+        "type": "MAINTENANCE",
+        "description": "test",
+    }
+    assert _submit_event(db_conn, created, dispatcher)["decision"] == "ACCEPTED"
+    assigned = _base_envelope("WORK_ORDER.ASSIGNED", work_order_id)
+    assigned["payload"] = {
+        "engineer_id": engineer_id,
+        "scheduled_start": datetime.now(timezone.utc).isoformat(),
+        "scheduled_end": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(),
+    }
+    assert _submit_event(db_conn, assigned, dispatcher)["decision"] == "ACCEPTED"
+    assert _submit_event(db_conn, _base_envelope("WORK.DISPATCHED", work_order_id), dispatcher)["decision"] == "ACCEPTED"
+    # The engineer position update after the projection update draws its own change_seq.
+    arrived = _base_envelope("WORK.ARRIVED_ON_SITE", work_order_id)
+    arrived["payload"] = {"gps": {"lat": 55.75, "lon": 37.62}}
+    assert _submit_event(db_conn, arrived, Actor(role="ENGINEER", actor_id=engineer_id))["decision"] == "ACCEPTED"
+
+    with db_conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT t.change_seq AS timeline_seq, w.change_seq AS work_order_seq, b.change_seq AS board_seq
+            FROM work_order_timeline t
+            JOIN work_orders_current w USING (work_order_id)
+            JOIN engineer_board b ON b.engineer_id = w.assigned_engineer_id
+            WHERE t.work_order_id = %s AND t.event_type = 'WORK.ARRIVED_ON_SITE'
+            """,
+            (work_order_id,),
+        )
+        row = cur.fetchone()
+    assert row["timeline_seq"] == row["work_order_seq"]
+    assert row["board_seq"] > row["work_order_seq"]
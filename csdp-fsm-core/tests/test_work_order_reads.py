@@ -0,0 +1,181 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from src.api.conditional import etag_for, etag_matches
+from src.api.cursors import decode_cursor, encode_cursor
+from src.domain.apply_event import apply_event
+from src.domain.fold import ENGINEER_HANDOVER
+from src.domain.state_store import persist_effects
+from src.domain.validator import Actor, validate_event
+from src.storage import event_store_repo, projections_repo
+
+
+def _submit_event(conn, envelope, actor):
+    validation = validate_event(conn, envelope, actor)
+    if validation.decision != "ACCEPTED":
+        return validation
+    normalized = validation.normalized_event or envelope
+    normalized["created_by"] = actor.actor_id
+    event_id, duplicate = event_store_repo.insert_event(conn, normalized)
+    if duplicate:
+        return {"decision": "ACCEPTED", "reason_code": "DUPLICATE_IGNORED", "event_id": event_id}
+    stored = event_store_repo.fetch_event_by_id(conn, event_id)
+    normalized["event_id"] = event_id
+    normalized["created_at_system"] = stored["created_at_system"]
+    apply_event(conn, normalized)
+    return {"decision": "ACCEPTED", "reason_code": "OK", "event_id": event_id}
+
+
+def _base_envelope(event_type, entity_id):
+    return {
+        "event_type": event_type,
+        "entity_type": "work_order",
+        "entity_id": entity_id,
+        "source": "web",
+        "payload": {},
+    }
+
+
+def _create_assigned(conn, work_order_id, engineer_id):
+    dispatcher = Actor(role="DISPATCHER", actor_id=None)
+    created = _base_envelope("WORK_ORDER.CREATED", work_order_id)
+    created["payload"] = {
+        "client_id": "00000000-0000-0000-0000-000000003002",
+        "asset_id": "00000000-0000-0000-0000-000000003003",
+        "priority": "LOW",
+        "type": "MAINTENANCE",
+        "description": "test",
+    }
+    _submit_event(conn, created, dispatcher)
+
+    assigned = _base_envelope("WORK_ORDER.ASSIGNED", work_order_id)
+    assigned["payload"] = {
+        "engineer_id": engineer_id,
+        "scheduled_start": datetime.now(timezone.utc).isoformat(),
+        "scheduled_end": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(),
+    }
+    _submit_event(conn, assigned, dispatcher)
+
+
+def test_cursor_roundtrip():
+    at = datetime(2026, 1, 27, 9, 0, tzinfo=timezone.utc)
+    token = encode_cursor(at, "00000000-0000-0000-0000-000000003001")
+    assert decode_cursor(token, 2) == [at.isoformat(), "00000000-0000-0000-0000-000000003001"]
+
+
+def test_timeline_keyset_pagination(db_conn):
+    work_order_id = "00000000-0000-0000-0000-000000003001"
+    _create_assigned(db_conn, work_order_id, "00000000-0000-0000-0000-000000003004")
+
+    first = projections_repo.fetch_timeline(db_conn, work_order_id, 1)
+    assert [row["event_type"] for row in first] == ["WORK_ORDER.CREATED"]
+
+    rest = projections_repo.fetch_timeline(db_conn, work_order_id, 10, first[-1]["event_seq"], payload_fields=["engineer_id"])
+    assert [row["event_type"] for row in rest] == ["WORK_ORDER.ASSIGNED"]
+    assert set(json.loads(rest[0]["payload"])) == {"engineer_id"}
+
+    streamed = list(projections_repo.iter_timeline(db_conn, work_order_id, include_payload=False))
+    assert len(streamed) == 2
+    assert "payload" not in streamed[0]
+
+
+def test_etag_matches_if_none_match_forms():
+    etag = etag_for({"version": 3, "last_event_id": "00000000-0000-0000-0000-000000003010"})
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"2-00000000-0000-0000-0000-000000003010"', etag)
+
+
+def test_parts_event_bumps_version(db_conn):
+    work_order_id = "00000000-0000-0000-0000-000000003011"
+    engineer_id = "00000000-0000-0000-0000-000000003012"
+    _create_assigned(db_conn, work_order_id, engineer_id)
+    before = projections_repo.fetch_work_order_version(db_conn, work_order_id)
+
+    reserved = _base_envelope("PART.RESERVED", work_order_id)
+    reserved["payload"] = {"part_id": "00000000-0000-0000-0000-000000003013", "quantity": 1}
+    reserved["created_by"] = None
+    event_id, _ = event_store_repo.insert_event(db_conn, reserved)
+    reserved["event_id"] = event_id
+    apply_event(db_conn, reserved)
+
+    after = projections_repo.fetch_work_order_version(db_conn, work_order_id)
+    assert after["version"] == before["version"] + 1
+    assert after["last_event_id"] == event_id
+    assert etag_for(after) != etag_for(before)
+
+
+def test_work_order_bundles_in_one_pipeline(db_conn):
+    first_id = "00000000-0000-0000-0000-000000003021"
+    second_id = "00000000-0000-0000-0000-000000003022"
+    _create_assigned(db_conn, first_id, "00000000-0000-0000-0000-000000003023")
+    _create_assigned(db_conn, second_id, "00000000-0000-0000-0000-000000003024")
+
+    missing_id = "00000000-0000-0000-0000-000000003025"
+    bundles = projections_repo.fetch_work_order_bundles(db_conn, [second_id, missing_id, first_id], 1)
+
+    assert [str(bundle["work_order"]["work_order_id"]) for bundle in bundles] == [second_id, first_id]
+    assert [event["event_type"] for event in bundles[0]["timeline"]] == ["WORK_ORDER.CREATED"]
+    assert bundles[0]["sla"] is not None
+    assert bundles[0]["parts"] == []
+
+
+def test_fetch_work_orders_since_version(db_conn):
+    changed_id = "00000000-0000-0000-0000-000000003031"
+    unchanged_id = "00000000-0000-0000-0000-000000003032"
+    _create_assigned(db_conn, changed_id, "00000000-0000-0000-0000-000000003033")
+    _create_assigned(db_conn, unchanged_id, "00000000-0000-0000-0000-000000003034")
+
+    rows = projections_repo.fetch_work_orders(db_conn, [changed_id, unchanged_id])
+    versions = {str(row["work_order_id"]): row["version"] for row in rows}
+    assert set(versions) == {changed_id, unchanged_id}
+
+    since = {changed_id: versions[changed_id] - 1, unchanged_id: versions[unchanged_id]}
+    rows = projections_repo.fetch_work_orders(db_conn, [changed_id, unchanged_id], since)
+    assert [str(row["work_order_id"]) for row in rows] == [changed_id]
+
+
+def test_engineer_changes_follow_change_seq(db_conn):
+    engineer_id = "00000000-0000-0000-0000-000000003041"
+    work_order_id = "00000000-0000-0000-0000-000000003042"
+    _create_assigned(db_conn, work_order_id, engineer_id)
+
+    # Rows of the still-open transaction are returned but not settled.
+    rows = projections_repo.fetch_engineer_changes(db_conn, engineer_id, (0, 0), 10)
+    assert [str(row["work_order_id"]) for row in rows] == [work_order_id]
+    assert rows[0]["settled"] is False
+
+    db_conn.commit()
+    rows = projections_repo.fetch_engineer_changes(db_conn, engineer_id, (0, 0), 10)
+    assert rows[0]["settled"] is True and rows[0]["removed"] is False
+    key = (rows[0]["change_xid"], rows[0]["change_seq"])
+
+    timeline = projections_repo.fetch_timeline_changes(db_conn, [work_order_id], (0, 0))
+    assert [row["event_type"] for row in timeline] == ["WORK_ORDER.CREATED", "WORK_ORDER.ASSIGNED"]
+    assert projections_repo.fetch_timeline_changes(db_conn, [work_order_id], key) == []
+    assert projections_repo.fetch_engineer_changes(db_conn, engineer_id, key, 10) == []
+
+
+def test_engineer_changes_report_handed_over_work_orders(db_conn):
+    engineer_id = "00000000-0000-0000-0000-000000003043"
+    other_engineer_id = "00000000-0000-0000-0000-000000003044"
+    work_order_id = "00000000-0000-0000-0000-000000003045"
+    _create_assigned(db_conn, work_order_id, engineer_id)
+    db_conn.commit()
+    rows = projections_repo.fetch_engineer_changes(db_conn, engineer_id, (0, 0), 10)
+    key = (rows[-1]["change_xid"], rows[-1]["change_seq"])
+
+    persist_effects(db_conn, [(ENGINEER_HANDOVER, work_order_id, (engineer_id, other_engineer_id))])
+    db_conn.commit()
+
+    rows = projections_repo.fetch_engineer_changes(db_conn, engineer_id, key, 10)
+    assert [(str(row["work_order_id"]), row["removed"]) for row in rows] == [(work_order_id, True)]
+    assert projections_repo.fetch_engineer_changes(db_conn, other_engineer_id, (0, 0), 10) == []
+
+    # Handing it back clears the tombstone.
+    persist_effects(db_conn, [(ENGINEER_HANDOVER, work_order_id, (other_engineer_id, engineer_id))])
+    db_conn.commit()
+    rows = projections_repo.fetch_engineer_changes(db_conn, engineer_id, key, 10)
+    assert rows == []